@@ -99,6 +99,7 @@ export interface ProgrammaticFlashcardPage {
   };
   linkingRecommendations?: ProgrammaticLinkingRecommendations;
   structuredData?: Record<string, unknown>;
+  structuredDataVersion?: number;
   embeddedFlashcards?: ProgrammaticEmbeddedFlashcard[];
 }
 
@@ -53,6 +53,7 @@ export interface ProgrammaticMindMapPage {
   };
   linkingRecommendations?: ProgrammaticLinkingRecommendations;
   structuredData?: Record<string, unknown>;
+  structuredDataVersion?: number;
   embeddedMindMap?: ProgrammaticEmbeddedMindMap;
 }
 
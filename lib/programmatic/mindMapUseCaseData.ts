@@ -1,6 +1,6 @@
 import type { Metadata } from 'next';
 import mindmapTaxonomyJson from '@/data/mindmap_taxonomy.json';
-import { generatedMindMapPages } from '@/lib/programmatic/generated/mindMapPages';
+import { generatedMindMapPageIndex } from '@/lib/programmatic/generated/mindMapPagesIndex';
 
 export type MindMapLink = {
   slug: string;
@@ -67,14 +67,14 @@ type MindMapLinkMetadata = {
 };
 
 const mindMapPageMap = new Map<string, MindMapLinkMetadata>(
-  generatedMindMapPages.map((page) => [
-    page.slug,
+  generatedMindMapPageIndex.map((entry) => [
+    entry.slug,
     {
-      href: page.path ?? `/mind-maps/${page.slug}`,
-      title: page.hero.heading ?? humanize(page.slug),
-      description: page.metadata?.description ?? page.hero.subheading,
-      anchorText: page.linkingRecommendations?.anchorText,
-      descriptionVariants: page.linkingRecommendations?.descriptionVariants,
+      href: entry.path ?? `/mind-maps/${entry.slug}`,
+      title: entry.heading ?? humanize(entry.slug),
+      description: entry.description ?? entry.subheading,
+      anchorText: entry.anchorText,
+      descriptionVariants: entry.descriptionVariants,
     },
   ])
 );
@@ -1,6 +1,6 @@
 import type { Metadata } from 'next';
 import flashcardTaxonomyJson from '@/data/flashcard_taxonomy.json';
-import { generatedFlashcardPages } from '@/lib/programmatic/generated/flashcardPages';
+import { generatedFlashcardPageIndex } from '@/lib/programmatic/generated/flashcardPagesIndex';
 import { flashcardLinkMetadata } from '@/lib/programmatic/generated/flashcardLinkMetadata';
 
 export type UseCaseLink = {
@@ -60,12 +60,12 @@ const buildSubhubPath = (hubSlug: string, subhubSlug: string): string =>
   `/flashcards/${hubSlug}/${subhubSlug}`;
 
 const flashcardPageMap = new Map(
-  generatedFlashcardPages.map((page) => [
-    page.slug,
+  generatedFlashcardPageIndex.map((entry) => [
+    entry.slug,
     {
-      href: page.path ?? `/flashcards/${page.slug}`,
-      title: page.metadata?.title ?? humanize(page.slug),
-      description: page.metadata?.description,
+      href: entry.path ?? `/flashcards/${entry.slug}`,
+      title: entry.title ?? humanize(entry.slug),
+      description: entry.description,
     },
   ])
 );
@@ -1,5 +1,7 @@
-import { allFlashcardPages } from '@/lib/programmatic/flashcardPages';
-import { allMindMapPages } from '@/lib/programmatic/mindMapPages';
+import { defaultFlashcardLanding } from '@/lib/programmatic/flashcardLanding';
+import { generatedFlashcardPageIndex } from '@/lib/programmatic/generated/flashcardPagesIndex';
+import { generatedMindMapPageIndex } from '@/lib/programmatic/generated/mindMapPagesIndex';
+import { defaultMindMapLanding } from '@/lib/programmatic/mindMapLanding';
 import { mindMapUseCaseHubs } from '@/lib/programmatic/mindMapUseCaseData';
 import { useCaseHubs } from '@/lib/programmatic/useCaseData';
 import { ensureAbsoluteUrl, formatLastmod, SitemapEntry } from '@/lib/seo/sitemap';
@@ -73,15 +75,32 @@ export const getSubhubSitemapEntries = (): SitemapEntry[] => {
   return sortByLocation(dedupeEntries(entries));
 };
 
+type ProgrammaticSitemapPage = { slug: string; path?: string; canonical?: string };
+
+const toSitemapPage = (page: {
+  slug: string;
+  path?: string;
+  metadata: { canonical?: string };
+}): ProgrammaticSitemapPage => ({
+  slug: page.slug,
+  path: page.path,
+  canonical: page.metadata.canonical,
+});
+
+// The hand-written generator landings; their modules do not load the generated pages.
+const flashcardLandings: ProgrammaticSitemapPage[] = [toSitemapPage(defaultFlashcardLanding)];
+
+const mindMapLandings: ProgrammaticSitemapPage[] = [toSitemapPage(defaultMindMapLanding)];
+
 const addProgrammaticEntries = (
-  pages: { slug: string; path?: string; metadata: { canonical?: string } }[],
+  pages: ProgrammaticSitemapPage[],
   fallbackBase: string,
   entries: SitemapEntry[],
   seen: Set<string>
 ) => {
   pages.forEach((page) => {
     const canonical =
-      page.metadata.canonical ??
+      page.canonical ??
       page.path ??
       `${fallbackBase}/${page.slug}`;
     const loc = ensureAbsoluteUrl(canonical);
@@ -102,8 +121,19 @@ export const getProgrammaticLandingSitemapEntries = (): SitemapEntry[] => {
   const entries: SitemapEntry[] = [];
   const seen = new Set<string>();
 
-  addProgrammaticEntries(allFlashcardPages, '/flashcards', entries, seen);
-  addProgrammaticEntries(allMindMapPages, '/mind-maps', entries, seen);
+  // The slim page indexes carry slug, path and canonical without loading the page bodies.
+  addProgrammaticEntries(
+    [...flashcardLandings, ...generatedFlashcardPageIndex],
+    '/flashcards',
+    entries,
+    seen
+  );
+  addProgrammaticEntries(
+    [...mindMapLandings, ...generatedMindMapPageIndex],
+    '/mind-maps',
+    entries,
+    seen
+  );
 
   return sortByLocation(entries);
 };
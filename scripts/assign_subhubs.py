@@ -5,7 +5,10 @@ This utility inspects the generated landing pages and the hub/subhub taxonomy
 declared for the selected content type (flashcards or mind maps). Missing slugs
 are scored against every subhub using lightweight lexical similarity heuristics
 and placed with the best match. Ambiguous matches can be reported, reassigned,
-or routed to an explicit fallback subhub for manual curation.
+or routed to an explicit fallback subhub for manual curation. When new
+assignments are written, the breadcrumb structured data of the generated pages
+and the page index module next to them (if the generator wrote one) are rebuilt
+so their hub/subhub placements follow the taxonomy.
 
 Heuristic highlights:
   * Overlapping keyword phrases and slug tokens carry extra weight.
@@ -18,12 +21,16 @@ Heuristic highlights:
 from __future__ import annotations
 
 import argparse
+import importlib
 import json
 import re
 from dataclasses import dataclass, field
 from pathlib import Path
 from typing import Dict, Iterable, List, Mapping, MutableMapping, Optional, Sequence, Set, Tuple
 
+from programmatic_pipeline.page_index import page_index_path_for, taxonomy_placements
+from programmatic_pipeline.serializer import find_json_payload
+
 DEFAULT_PAGES = Path("lib/programmatic/generated/flashcardPages.ts")
 DEFAULT_TAXONOMY = Path("data/flashcard_taxonomy.json")
 
@@ -31,12 +38,14 @@ CONTENT_TYPES = {
     "flashcards": {
         "pages": DEFAULT_PAGES,
         "taxonomy": DEFAULT_TAXONOMY,
+        "generator": "generate_programmatic_flashcards",
         "fallback_hub": "Vocabulary & Specialized Concepts",
         "fallback_subhub": "General Concepts",
     },
     "mindmaps": {
         "pages": Path("lib/programmatic/generated/mindMapPages.ts"),
         "taxonomy": Path("data/mindmap_taxonomy.json"),
+        "generator": "generate_programmatic_mindmaps",
         "fallback_hub": "General Topic Mind Maps",
         "fallback_subhub": "Topics M-R",
     },
@@ -307,9 +316,17 @@ def parse_arguments() -> argparse.Namespace:
 
 
 def load_pages(path: Path) -> Tuple[str, int, int, List[Dict]]:
-    """Load the JSON array embedded in the generated TypeScript file."""
+    """Load the JSON array embedded in the generated TypeScript file.
+
+    Both output formats are understood; for a ``JSON.parse('...')`` payload the
+    returned offsets span the whole ``JSON.parse(...)`` call instead of the array.
+    """
     text = path.read_text(encoding="utf-8")
     assign_idx = text.index("=")
+    payload = find_json_payload(text, assign_idx)
+    if payload is not None:
+        start_idx, end_idx, array_text = payload
+        return text, start_idx, end_idx, json.loads(array_text)
     start_idx = text.index("[", assign_idx)
     end_idx = text.rfind("]")
     pages = json.loads(text[start_idx : end_idx + 1])
@@ -733,6 +750,35 @@ def write_taxonomy(path: Path, taxonomy: Mapping[str, Mapping[str, Sequence[str]
     path.write_text(f"{payload}\n", encoding="utf-8")
 
 
+def refresh_generated_output(
+    generator_name: str,
+    pages_path: Path,
+    pages: Sequence[Dict],
+    taxonomy: Mapping[str, Mapping[str, Sequence[str]]],
+) -> None:
+    """Recompute what the generated output derives from the taxonomy.
+
+    That is the breadcrumb JSON-LD of every page (rewriting ``pages_path`` when it
+    changed) and the page index next to it.
+    """
+
+    # Imported lazily: the generators pull in the OpenAI SDK.
+    generator = importlib.import_module(generator_name)
+    placements = taxonomy_placements(taxonomy)
+    pages = list(pages)
+    output = generator.CONTENT_TYPE.output
+    refreshed = generator.refresh_structured_data(pages, placements)
+    if refreshed:
+        # The page index below is written from the same placements, not the default taxonomy file.
+        output.configure(pages_path, page_index=False)
+        output.write(pages_path, pages)
+        print(f"Recomputed structured data for {refreshed} pages in {pages_path}.")
+    if page_index_path_for(pages_path).exists():
+        writer = output.index_writer(pages_path)
+        writer.write(pages, placements)
+        print(writer.summary_line())
+
+
 def collect_slugs(taxonomy: Mapping[str, Mapping[str, Sequence[str]]]) -> Set[str]:
     slugs: Set[str] = set()
     for subhubs in taxonomy.values():
@@ -968,6 +1014,7 @@ def main() -> None:
     if updates:
         write_taxonomy(taxonomy_path, taxonomy)
         print(f"Wrote {updates} new assignments to {taxonomy_path}.")
+        refresh_generated_output(content_config["generator"], pages_path, pages, taxonomy)
     else:
         print("Assignments matched existing taxonomy; no filesystem changes made.")
 
@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+"""Load-test the programmatic page generators against the local mock endpoint.
+
+For every requested row count the benchmark writes a synthetic CSV, starts
+``mock_openai_server`` in-process with the configured latency distribution and
+429/500 injection rates, runs the chosen generator as a subprocess against it and
+reports rows/sec, p50/p95/p99 request latency, retries and the generator's peak
+RSS. No network access or API quota is used, so regressions in the threading,
+retry and write paths can be measured locally.
+
+Example usage::
+
+python scripts/benchmark_generators.py --generator flashcards --rows 1000 10000 50000 --engine async --concurrency 64 --latency-ms 800 --rate-429 0.02 --rate-500 0.005
+"""
+
+from __future__ import annotations
+
+import argparse
+import csv
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterable, List
+
+from mock_openai_server import LATENCY_DISTRIBUTIONS, MockConfig, create_server
+
+SCRIPTS_DIR = Path(__file__).resolve().parent
+GENERATORS = {
+  "flashcards": SCRIPTS_DIR / "generate_programmatic_flashcards.py",
+  "mindmaps": SCRIPTS_DIR / "generate_programmatic_mindmaps.py",
+}
+DEFAULT_ROW_COUNTS = [1000, 10000, 50000]
+
+
+def write_synthetic_csv(path: Path, rows: int) -> None:
+  with path.open("w", newline="", encoding="utf-8") as handle:
+    writer = csv.writer(handle)
+    writer.writerow(["slug", "target_keyword"])
+    for idx in range(rows):
+      writer.writerow([f"benchmark-topic-{idx}", f"benchmark topic {idx}"])
+
+
+def percentile(values: List[float], fraction: float) -> float:
+  if not values:
+    return 0.0
+  ordered = sorted(values)
+  return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def run_generator(command: List[str], log_path: Path) -> tuple[int, float, int]:
+  """Run ``command`` and return ``(exit code, wall seconds, peak RSS in KiB)``."""
+
+  started = time.monotonic()
+  with log_path.open("w", encoding="utf-8") as log:
+    process = subprocess.Popen(command, stdout=log, stderr=subprocess.STDOUT, cwd=SCRIPTS_DIR.parent)
+    # wait4 reports the child's own resource usage, unlike RUSAGE_CHILDREN which
+    # accumulates the maximum over every run of the benchmark.
+    _, status, usage = os.wait4(process.pid, 0)
+    process.returncode = os.waitstatus_to_exitcode(status)
+  return process.returncode, time.monotonic() - started, usage.ru_maxrss
+
+
+def benchmark(args: argparse.Namespace, rows: int, work_dir: Path) -> Dict[str, Any]:
+  config = MockConfig(
+    latency_ms=args.latency_ms,
+    latency_distribution=args.latency_distribution,
+    latency_sigma=args.latency_sigma,
+    rate_429=args.rate_429,
+    rate_500=args.rate_500,
+    prompt_tokens=args.prompt_tokens,
+    completion_tokens=args.completion_tokens,
+    seed=args.seed,
+  )
+  server = create_server("127.0.0.1", 0, config)
+  thread = threading.Thread(target=server.serve_forever, daemon=True)
+  thread.start()
+
+  input_path = work_dir / f"rows-{rows}.csv"
+  output_path = work_dir / f"{args.generator}-{rows}.ts"
+  log_path = work_dir / f"{args.generator}-{rows}.log"
+  write_synthetic_csv(input_path, rows)
+  command = [
+    sys.executable,
+    str(GENERATORS[args.generator]),
+    "--input",
+    str(input_path),
+    "--output",
+    str(output_path),
+    "--base-url",
+    f"http://127.0.0.1:{server.server_address[1]}/v1/",
+    "--api-key",
+    "benchmark",
+    "--engine",
+    args.engine,
+    "--concurrency",
+    str(args.concurrency),
+    "--cache-mode",
+    "off",
+    "--max-requests-per-minute",
+    "0",
+    "--max-api-calls",
+    str(rows),
+    *args.generator_arg,
+  ]
+  try:
+    exit_code, wall, peak_rss_kib = run_generator(command, log_path)
+  finally:
+    server.shutdown()
+    server.server_close()
+
+  stats = server.state.stats()
+  latencies = stats["latencies"]
+  return {
+    "rows": rows,
+    "exit_code": exit_code,
+    "wall_seconds": round(wall, 2),
+    "rows_per_second": round(rows / wall, 2) if wall else 0.0,
+    "requests": stats["chat_requests"],
+    "retries": max(0, stats["chat_requests"] - rows),
+    "injected_429": stats["injected_429"],
+    "injected_500": stats["injected_500"],
+    "latency_p50_ms": round(percentile(latencies, 0.50) * 1000, 1),
+    "latency_p95_ms": round(percentile(latencies, 0.95) * 1000, 1),
+    "latency_p99_ms": round(percentile(latencies, 0.99) * 1000, 1),
+    "peak_rss_mib": round(peak_rss_kib / 1024, 1),
+    "log": str(log_path),
+  }
+
+
+def format_table(results: List[Dict[str, Any]]) -> str:
+  columns = [
+    ("rows", "rows"),
+    ("rows/s", "rows_per_second"),
+    ("wall s", "wall_seconds"),
+    ("p50 ms", "latency_p50_ms"),
+    ("p95 ms", "latency_p95_ms"),
+    ("p99 ms", "latency_p99_ms"),
+    ("requests", "requests"),
+    ("retries", "retries"),
+    ("429/500", None),
+    ("peak RSS MiB", "peak_rss_mib"),
+    ("exit", "exit_code"),
+  ]
+  rows = [[label for label, _ in columns]]
+  for result in results:
+    rows.append(
+      [
+        f"{result['injected_429']}/{result['injected_500']}" if key is None else str(result[key])
+        for _, key in columns
+      ]
+    )
+  widths = [max(len(row[idx]) for row in rows) for idx in range(len(columns))]
+  return "\n".join("  ".join(cell.rjust(width) for cell, width in zip(row, widths)) for row in rows)
+
+
+def parse_args(argv: Iterable[str] | None = None) -> argparse.Namespace:
+  parser = argparse.ArgumentParser(description="Benchmark the page generators against the local mock endpoint")
+  parser.add_argument("--generator", choices=sorted(GENERATORS), default="flashcards", help="Generator script to run")
+  parser.add_argument("--rows", type=int, nargs="+", default=DEFAULT_ROW_COUNTS, help="Row counts to benchmark")
+  parser.add_argument("--engine", default="async", help="Value passed to the generator's --engine")
+  parser.add_argument("--concurrency", type=int, default=64, help="Value passed to the generator's --concurrency")
+  parser.add_argument("--latency-ms", type=float, default=800.0, help="Typical mock latency in milliseconds")
+  parser.add_argument("--latency-distribution", choices=LATENCY_DISTRIBUTIONS, default="lognormal")
+  parser.add_argument("--latency-sigma", type=float, default=0.5)
+  parser.add_argument("--rate-429", type=float, default=0.0, help="Share of requests answered with 429")
+  parser.add_argument("--rate-500", type=float, default=0.0, help="Share of requests answered with 500")
+  parser.add_argument("--prompt-tokens", type=int, help="Pin the prompt token count reported by the mock")
+  parser.add_argument("--completion-tokens", type=int, help="Pin the completion token count reported by the mock")
+  parser.add_argument("--seed", type=int, default=1234, help="Seed for latency and fault sampling")
+  parser.add_argument(
+    "--generator-arg",
+    action="append",
+    default=[],
+    help="Extra argument forwarded to the generator (repeatable), e.g. --generator-arg=--stream",
+  )
+  parser.add_argument("--work-dir", help="Keep CSVs, outputs and logs here instead of a temporary directory")
+  parser.add_argument("--json-out", help="Also write the results as JSON to this path")
+  return parser.parse_args(argv)
+
+
+def main(argv: Iterable[str] | None = None) -> int:
+  args = parse_args(argv)
+  with tempfile.TemporaryDirectory(prefix="generator-benchmark-") as temp_dir:
+    work_dir = Path(args.work_dir) if args.work_dir else Path(temp_dir)
+    work_dir.mkdir(parents=True, exist_ok=True)
+    results = []
+    for rows in args.rows:
+      print(f"Benchmarking {args.generator} with {rows} rows...", flush=True)
+      result = benchmark(args, rows, work_dir)
+      if result["exit_code"] != 0:
+        tail = Path(result["log"]).read_text(encoding="utf-8").splitlines()[-5:]
+        print(
+          f"Warning: generator exited with {result['exit_code']}:\n" + "\n".join(tail),
+          file=sys.stderr,
+        )
+      results.append(result)
+
+  print(format_table(results))
+  if args.json_out:
+    Path(args.json_out).write_text(json.dumps(results, indent=2), encoding="utf-8")
+  return 0 if all(result["exit_code"] == 0 for result in results) else 1
+
+
+if __name__ == "__main__":
+  raise SystemExit(main())
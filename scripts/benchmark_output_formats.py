@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""Compare how fast JS engines load the two generated page module formats.
+
+For every requested page count the benchmark writes the same pages once as an
+object literal (``--output-format literal``) and once as a ``JSON.parse`` payload
+(``--output-format json``), using the generator's own serializer. It then imports
+each module in fresh ``node`` processes and reports the median and p95 import
+time and the heap growth. The type-only import and the array annotation are
+stripped so node can run the modules directly. The file size and the Python read
+time (what a resuming generator pays) are reported as well.
+
+Pages are synthetic (the mock endpoint's page builder) unless ``--source`` points
+at an existing output, whose pages are then repeated with unique slugs.
+
+Example usage::
+
+python scripts/benchmark_output_formats.py --generator flashcards --pages 1000 10000 50000 --runs 7
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterable, List
+
+import generate_programmatic_flashcards
+import generate_programmatic_mindmaps
+from benchmark_generators import percentile
+from mock_openai_server import synthetic_page
+from programmatic_pipeline.serializer import OUTPUT_FORMATS, PageSerializer
+
+GENERATORS = {
+  "flashcards": generate_programmatic_flashcards,
+  "mindmaps": generate_programmatic_mindmaps,
+}
+DEFAULT_PAGE_COUNTS = [1000, 10000]
+DEFAULT_RUNS = 5
+
+_TYPE_IMPORT_RE = re.compile(r"^import type .*\n", re.MULTILINE)
+_ANNOTATION_RE = re.compile(r"^(export const \w+): \w+\[\] =", re.MULTILINE)
+
+# Prints the import time and heap growth of one module as JSON.
+NODE_LOADER = """
+const { pathToFileURL } = require('node:url');
+const before = process.memoryUsage().heapUsed;
+const started = performance.now();
+import(pathToFileURL(process.argv[1]).href).then((module) => {
+  const ms = performance.now() - started;
+  const pages = Object.values(module).find(Array.isArray);
+  console.log(JSON.stringify({ ms, heap: process.memoryUsage().heapUsed - before, pages: pages.length }));
+});
+"""
+
+
+def build_pages(generator: str, count: int, source: Path | None) -> List[Dict[str, Any]]:
+  module = GENERATORS[generator]
+  if source is not None:
+    templates = module.CONTENT_TYPE.output.read(source)
+    if not templates:
+      raise ValueError(f"No pages found in {source}")
+    return [dict(templates[idx % len(templates)], slug=f"benchmark-page-{idx}") for idx in range(count)]
+  schema_name = "mindmap" if generator == "mindmaps" else "flashcard"
+  pages = []
+  for idx in range(count):
+    slug = f"benchmark-page-{idx}"
+    page = synthetic_page(schema_name, {"slug": slug, "context": {"target_keyword": f"benchmark topic {idx}"}})
+    pages.append(dict(page, slug=slug, path=f"/{generator}/{slug}"))
+  return pages
+
+
+def as_node_module(source: str) -> str:
+  return _ANNOTATION_RE.sub(r"\1 =", _TYPE_IMPORT_RE.sub("", source))
+
+
+def time_node_import(node: str, path: Path, runs: int) -> Dict[str, float]:
+  timings: List[float] = []
+  heap: List[float] = []
+  for _ in range(runs):
+    completed = subprocess.run(
+      [node, "-e", NODE_LOADER, str(path)], capture_output=True, text=True, check=False
+    )
+    if completed.returncode != 0:
+      raise RuntimeError(f"node failed to import {path}: {completed.stderr.strip()}")
+    result = json.loads(completed.stdout)
+    timings.append(result["ms"])
+    heap.append(result["heap"] / (1024 * 1024))
+  return {
+    "load_p50_ms": round(percentile(timings, 0.50), 1),
+    "load_p95_ms": round(percentile(timings, 0.95), 1),
+    "heap_mib": round(percentile(heap, 0.50), 1),
+  }
+
+
+def benchmark(args: argparse.Namespace, node: str, count: int, work_dir: Path) -> List[Dict[str, Any]]:
+  module = GENERATORS[args.generator]
+  pages = build_pages(args.generator, count, Path(args.source) if args.source else None)
+  results = []
+  for output_format in OUTPUT_FORMATS:
+    serializer = PageSerializer(module.OUTPUT_HEADER, module.OUTPUT_FOOTER, output_format=output_format)
+    output_path = work_dir / f"{args.generator}-{count}-{output_format}.ts"
+    output_path.write_bytes(serializer.serialize(pages))
+    node_path = output_path.with_suffix(".mjs")
+    node_path.write_text(as_node_module(output_path.read_text(encoding="utf-8")), encoding="utf-8")
+
+    started = time.perf_counter()
+    module.CONTENT_TYPE.output.read(output_path)
+    read_ms = (time.perf_counter() - started) * 1000
+    results.append(
+      {
+        "pages": count,
+        "format": output_format,
+        "size_mib": round(output_path.stat().st_size / (1024 * 1024), 2),
+        **time_node_import(node, node_path, args.runs),
+        "python_read_ms": round(read_ms, 1),
+      }
+    )
+  return results
+
+
+def format_table(results: List[Dict[str, Any]]) -> str:
+  columns = [
+    ("pages", "pages"),
+    ("format", "format"),
+    ("size MiB", "size_mib"),
+    ("load p50 ms", "load_p50_ms"),
+    ("load p95 ms", "load_p95_ms"),
+    ("heap MiB", "heap_mib"),
+    ("python read ms", "python_read_ms"),
+  ]
+  rows = [[label for label, _ in columns]]
+  for result in results:
+    rows.append([str(result[key]) for _, key in columns])
+  widths = [max(len(row[idx]) for row in rows) for idx in range(len(columns))]
+  return "\n".join("  ".join(cell.rjust(width) for cell, width in zip(row, widths)) for row in rows)
+
+
+def parse_args(argv: Iterable[str] | None = None) -> argparse.Namespace:
+  parser = argparse.ArgumentParser(description="Benchmark node load times of the literal and JSON.parse output formats")
+  parser.add_argument("--generator", choices=sorted(GENERATORS), default="flashcards", help="Generator whose module layout to use")
+  parser.add_argument("--pages", type=int, nargs="+", default=DEFAULT_PAGE_COUNTS, help="Page counts to benchmark")
+  parser.add_argument("--source", help="Existing generated module whose pages are repeated instead of synthetic pages")
+  parser.add_argument("--runs", type=int, default=DEFAULT_RUNS, help="Fresh node processes per module")
+  parser.add_argument("--node", default="node", help="node executable")
+  parser.add_argument("--work-dir", help="Keep the generated modules here instead of a temporary directory")
+  parser.add_argument("--json-out", help="Also write the results as JSON to this path")
+  return parser.parse_args(argv)
+
+
+def main(argv: Iterable[str] | None = None) -> int:
+  args = parse_args(argv)
+  node = shutil.which(args.node)
+  if node is None:
+    print(f"Error: {args.node!r} not found; the benchmark needs node to load the modules.", file=sys.stderr)
+    return 1
+  with tempfile.TemporaryDirectory(prefix="format-benchmark-") as temp_dir:
+    work_dir = Path(args.work_dir) if args.work_dir else Path(temp_dir)
+    work_dir.mkdir(parents=True, exist_ok=True)
+    results = []
+    for count in args.pages:
+      print(f"Benchmarking {args.generator} modules with {count} pages...", flush=True)
+      results.extend(benchmark(args, node, count, work_dir))
+
+  print(format_table(results))
+  if args.json_out:
+    Path(args.json_out).write_text(json.dumps(results, indent=2), encoding="utf-8")
+  return 0
+
+
+if __name__ == "__main__":
+  raise SystemExit(main())
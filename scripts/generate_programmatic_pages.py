@@ -0,0 +1,41 @@
+#!/usr/bin/env python3
+"""Generate flashcard and mind map landing pages from one keyword queue.
+
+Launching a topic used to mean running ``generate_programmatic_flashcards.py`` and
+then ``generate_programmatic_mindmaps.py``. Each run had its own executor and rate
+limiter, so quota sat idle while one corpus finished and the other had not started.
+Each generator registers a content-type plugin: its prompt, schema,
+``normalise_page`` and output file. This script runs every registered type through
+the generation loop the single-content scripts use (``programmatic_pipeline.runner``):
+every CSV row becomes one work item per content type in a single queue, drained by
+one engine that shares the rate limiter, adaptive concurrency limit, HTTP pool,
+response cache, budget and hedging across both corpora.
+
+Example usage::
+
+python scripts/generate_programmatic_pages.py --input data/topic_launch.csv --content flashcards,mindmaps --concurrency 20
+
+Each corpus keeps its own output file, checkpoint journal, fingerprint manifest and
+dead-letter queue, so a later run of either single-content script picks up where
+this one stopped. Packed requests (one content type per request), ``--sections``,
+batch mode, ``--shard`` and the ``merge``, ``index`` and ``structured-data``
+subcommands work as in the single-content scripts.
+"""
+
+from __future__ import annotations
+
+from typing import Iterable
+
+# Imported for their side effect: each registers its content type.
+import generate_programmatic_flashcards  # noqa: F401
+import generate_programmatic_mindmaps  # noqa: F401
+from programmatic_pipeline import runner
+from programmatic_pipeline.content import CONTENT_TYPES
+
+
+def main(argv: Iterable[str] | None = None) -> int:
+  return runner.main(list(CONTENT_TYPES.values()), argv, combined=True)
+
+
+if __name__ == "__main__":
+  raise SystemExit(main())
@@ -0,0 +1,489 @@
+#!/usr/bin/env python3
+"""Local stand-in for the OpenAI-compatible Gemini endpoint used by the page generators.
+
+The server answers ``/v1/chat/completions`` with schema-valid synthetic landing pages
+and implements the ``/v1/files`` + ``/v1/batches`` subset needed by ``--mode batch``,
+so the generators can be exercised end to end without network access or quota.
+Response latency follows a configurable distribution, a share of requests can be
+answered with 429/500 errors, and the reported token usage can be pinned, so the
+threading, retry and write paths can be load-tested (see ``benchmark_generators.py``).
+
+Example usage::
+
+python scripts/mock_openai_server.py --port 8787 --latency-ms 800 --latency-distribution lognormal --rate-429 0.02 --rate-500 0.005
+python scripts/generate_programmatic_flashcards.py --input data/flashcard_pages_old_345.csv --output /tmp/flashcardPages.ts --base-url http://127.0.0.1:8787/v1/ --mode batch --batch-poll-interval 1
+"""
+
+from __future__ import annotations
+
+import argparse
+import itertools
+import json
+import math
+import random
+import threading
+import time
+from dataclasses import dataclass
+from email.parser import BytesParser
+from email.policy import HTTP
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Iterable, List, Tuple
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8787
+STREAM_CHUNK_CHARS = 64
+LATENCY_DISTRIBUTIONS = ("fixed", "uniform", "exponential", "lognormal")
+
+
+def _rows_from_messages(messages: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+  """Recover the CSV row JSON (one object, or a packed array) embedded in the user message."""
+
+  for message in reversed(messages):
+    content = str(message.get("content") or "")
+    marker = content.find("CSV row")
+    start = min((idx for idx in (content.find("{", marker), content.find("[", marker)) if idx != -1), default=-1)
+    if message.get("role") == "user" and marker != -1 and start != -1:
+      try:
+        parsed = json.loads(content[start:])
+      except json.JSONDecodeError:
+        continue
+      return parsed if isinstance(parsed, list) else [parsed]
+  return [{}]
+
+
+def synthetic_page(schema_name: str, row: Dict[str, Any]) -> Dict[str, Any]:
+  slug = str(row.get("slug") or "sample-topic")
+  context = row.get("context") if isinstance(row.get("context"), dict) else {}
+  keyword = str(context.get("target_keyword") or slug.replace("-", " "))
+  title = keyword.title()
+  page: Dict[str, Any] = {
+    "metadata": {
+      "title": f"{title} | AI Study Tool",
+      "description": f"Turn your notes into {keyword} study material in seconds with AI and spaced repetition. Try CogniGuide free today.",
+      "keywords": [keyword, f"{keyword} ai", f"{keyword} study", f"{keyword} online", f"free {keyword}"],
+    },
+    "hero": {
+      "heading": f"{title} Made Simple",
+      "subheading": f"Upload your files or type a prompt and get {keyword} material instantly.",
+      "primaryCta": {"type": "modal", "label": "Start Free"},
+    },
+    "featuresSection": {
+      "heading": f"Why use AI for {keyword}",
+      "subheading": "Spend less time preparing and more time learning.",
+      "features": [
+        {"title": "Upload anything", "description": "PDFs, slides, documents and images."},
+        {"title": "Learn faster", "description": "Focus on the concepts that matter."},
+        {"title": "Share easily", "description": "Send a public link to classmates."},
+      ],
+    },
+    "howItWorksSection": {
+      "heading": "How it works",
+      "subheading": "Three steps from material to mastery.",
+      "steps": [
+        {"title": "Upload", "description": "Add your study material."},
+        {"title": "Generate", "description": "The AI structures it for you."},
+        {"title": "Study", "description": "Review on a smart schedule."},
+      ],
+      "cta": {"type": "modal", "label": "Start Free"},
+    },
+    "seoSection": {
+      "heading": f"Study {keyword} smarter",
+      "body": [
+        {"type": "paragraph", "html": f"{title} becomes manageable when your material is organised for active recall."},
+        {"type": "list", "items": [f"{keyword} revision", f"{keyword} exam prep"]},
+        {"type": "paragraph", "html": f"Use it for lectures, textbooks and notes about {keyword}."},
+      ],
+    },
+    "faqSection": {
+      "heading": "FAQs",
+      "subheading": "Answers before you start.",
+      "items": [
+        {"question": f"Is the {keyword} tool free?", "answer": "Yes, you can start for free."},
+        {"question": "What files can I upload?", "answer": "PDF, DOCX, PPTX and images."},
+        {"question": "Can I share my results?", "answer": "Yes, with a public link."},
+        {"question": "Does it use spaced repetition?", "answer": "Yes, reviews are scheduled automatically."},
+      ],
+      "cta": {"type": "modal", "label": "Start Free"},
+    },
+    "linkingRecommendations": {
+      "anchorText": f"{title} generator",
+      "descriptionVariants": [f"Create {keyword} material with AI.", f"AI-powered {keyword} from your notes."],
+    },
+  }
+  if "mindmap" in schema_name:
+    page["embeddedMindMap"] = {"markdown": f"# {title}\n- Key ideas\n  - Definitions\n  - Examples\n- Practice"}
+  else:
+    page["embeddedFlashcards"] = [
+      {"question": f"What is {keyword}?", "answer": f"A core topic worth reviewing: {keyword}."},
+      {"question": f"Why study {keyword}?", "answer": "It appears frequently in exams."},
+      {"question": f"How do you revise {keyword}?", "answer": "Use active recall and spaced repetition."},
+    ]
+  return page
+
+
+@dataclass
+class MockConfig:
+  """Latency, fault-injection and usage knobs for the chat-completions endpoint."""
+
+  latency_ms: float = 0.0
+  latency_distribution: str = "lognormal"
+  latency_sigma: float = 0.5
+  rate_429: float = 0.0
+  rate_500: float = 0.0
+  prompt_tokens: int | None = None
+  completion_tokens: int | None = None
+  batch_delay: float = 1.0
+  seed: int | None = None
+
+
+class MockState:
+  """In-memory storage for uploaded files and batch jobs, plus request statistics."""
+
+  def __init__(self, config: MockConfig):
+    self.config = config
+    self.batch_delay = config.batch_delay
+    self.lock = threading.Lock()
+    self.files: Dict[str, bytes] = {}
+    self.batches: Dict[str, Dict[str, Any]] = {}
+    self.ids = itertools.count(1)
+    self.rng = random.Random(config.seed)
+    self.chat_requests = 0
+    self.injected = {429: 0, 500: 0}
+    self.latencies: List[float] = []
+
+  def next_id(self, prefix: str) -> str:
+    return f"{prefix}-{next(self.ids)}"
+
+  def draw_request(self) -> Tuple[float, int | None]:
+    """Return the simulated latency (seconds) and injected status for one chat request."""
+
+    config = self.config
+    with self.lock:
+      self.chat_requests += 1
+      roll = self.rng.random()
+      base = max(0.0, config.latency_ms) / 1000.0
+      if base <= 0 or config.latency_distribution == "fixed":
+        latency = base
+      elif config.latency_distribution == "uniform":
+        latency = self.rng.uniform(0.0, 2 * base)
+      elif config.latency_distribution == "exponential":
+        latency = self.rng.expovariate(1 / base)
+      else:
+        latency = self.rng.lognormvariate(math.log(base), config.latency_sigma)
+    if roll < config.rate_429:
+      return latency, 429
+    if roll < config.rate_429 + config.rate_500:
+      return latency, 500
+    return latency, None
+
+  def record(self, latency: float, status: int | None) -> None:
+    with self.lock:
+      self.latencies.append(latency)
+      if status in self.injected:
+        self.injected[status] += 1
+
+  def stats(self) -> Dict[str, Any]:
+    with self.lock:
+      return {
+        "chat_requests": self.chat_requests,
+        "injected_429": self.injected[429],
+        "injected_500": self.injected[500],
+        "latencies": list(self.latencies),
+      }
+
+
+def chat_completion(
+  body: Dict[str, Any],
+  *,
+  prompt_tokens: int | None = None,
+  completion_tokens: int | None = None,
+) -> Dict[str, Any]:
+  schema_name = (
+    ((body.get("response_format") or {}).get("json_schema") or {}).get("name") or "programmatic_flashcard_page"
+  )
+  messages = body.get("messages") or []
+  rows = _rows_from_messages(messages)
+  schema = ((body.get("response_format") or {}).get("json_schema") or {}).get("schema") or {}
+  if "pages" in (schema.get("properties") or {}):
+    pages = [dict(synthetic_page(schema_name, row), slug=row.get("slug")) for row in rows]
+    content = json.dumps({"pages": pages}, ensure_ascii=False)
+  else:
+    page = synthetic_page(schema_name, rows[0])
+    if schema.get("additionalProperties") is False and schema.get("properties"):
+      # Section refreshes ask for a subset of the page's top-level keys.
+      page = {key: value for key, value in page.items() if key in schema["properties"]}
+    content = json.dumps(page, ensure_ascii=False)
+  if prompt_tokens is None:
+    prompt_tokens = sum(len(str(message.get("content") or "")) for message in messages) // 4
+  if completion_tokens is None:
+    completion_tokens = len(content) // 4
+  return {
+    "id": f"chatcmpl-mock-{time.time_ns()}",
+    "object": "chat.completion",
+    "created": int(time.time()),
+    "model": body.get("model") or "mock",
+    "choices": [
+      {"index": 0, "finish_reason": "stop", "message": {"role": "assistant", "content": content}}
+    ],
+    "usage": {
+      "prompt_tokens": prompt_tokens,
+      "completion_tokens": completion_tokens,
+      "total_tokens": prompt_tokens + completion_tokens,
+    },
+  }
+
+
+def _batch_object(batch: Dict[str, Any]) -> Dict[str, Any]:
+  ready = time.time() >= batch["ready_at"]
+  total = len(batch["results"])
+  return {
+    "id": batch["id"],
+    "object": "batch",
+    "endpoint": batch["endpoint"],
+    "input_file_id": batch["input_file_id"],
+    "completion_window": "24h",
+    "status": "completed" if ready else "in_progress",
+    "output_file_id": batch["output_file_id"] if ready else None,
+    "error_file_id": None,
+    "created_at": int(batch["created_at"]),
+    "request_counts": {"total": total, "completed": total if ready else 0, "failed": 0},
+  }
+
+
+def _parse_multipart(content_type: str, body: bytes) -> Tuple[bytes, Dict[str, str]]:
+  message = BytesParser(policy=HTTP).parsebytes(
+    f"Content-Type: {content_type}\r\n\r\n".encode("utf-8") + body
+  )
+  file_bytes = b""
+  fields: Dict[str, str] = {}
+  for part in message.iter_parts():
+    name = part.get_param("name", header="content-disposition")
+    payload = part.get_payload(decode=True) or b""
+    if part.get_filename():
+      file_bytes = payload
+    elif name:
+      fields[name] = payload.decode("utf-8")
+  return file_bytes, fields
+
+
+def make_handler(state: MockState) -> type:
+  class MockHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format: str, *args: Any) -> None:  # noqa: A002
+      return
+
+    def _send_json(self, status: int, payload: Dict[str, Any]) -> None:
+      encoded = json.dumps(payload).encode("utf-8")
+      self._send_bytes(status, encoded, "application/json")
+
+    def _send_bytes(self, status: int, data: bytes, content_type: str) -> None:
+      self.send_response(status)
+      self.send_header("Content-Type", content_type)
+      self.send_header("Content-Length", str(len(data)))
+      self.end_headers()
+      self.wfile.write(data)
+
+    def _send_stream(self, completion: Dict[str, Any], include_usage: bool) -> None:
+      """Replay ``completion`` as server-sent ``chat.completion.chunk`` events."""
+
+      self.send_response(200)
+      self.send_header("Content-Type", "text/event-stream")
+      self.send_header("Connection", "close")
+      self.end_headers()
+      self.close_connection = True
+      content = completion["choices"][0]["message"]["content"]
+      base = {"id": completion["id"], "object": "chat.completion.chunk", "created": completion["created"], "model": completion["model"]}
+      events = [
+        dict(base, choices=[{"index": 0, "delta": {"role": "assistant", "content": content[start : start + STREAM_CHUNK_CHARS]}, "finish_reason": None}])
+        for start in range(0, len(content), STREAM_CHUNK_CHARS)
+      ]
+      events.append(dict(base, choices=[{"index": 0, "delta": {}, "finish_reason": "stop"}]))
+      if include_usage:
+        events.append(dict(base, choices=[], usage=completion["usage"]))
+      try:
+        for event in events:
+          self.wfile.write(f"data: {json.dumps(event)}\n\n".encode("utf-8"))
+          self.wfile.flush()
+        self.wfile.write(b"data: [DONE]\n\n")
+      except (BrokenPipeError, ConnectionResetError):
+        pass
+
+    def _read_body(self) -> bytes:
+      length = int(self.headers.get("Content-Length") or 0)
+      return self.rfile.read(length) if length else b""
+
+    def do_POST(self) -> None:  # noqa: N802
+      path = self.path.split("?", 1)[0].rstrip("/")
+      body = self._read_body()
+      if path.endswith("/chat/completions"):
+        started = time.monotonic()
+        latency, fault = state.draw_request()
+        time.sleep(latency)
+        if fault is not None:
+          message = "Resource has been exhausted (e.g. check quota)." if fault == 429 else "Internal error encountered."
+          self._send_json(fault, {"error": {"message": message, "code": fault}})
+          state.record(time.monotonic() - started, fault)
+          return
+        request = json.loads(body or b"{}")
+        completion = chat_completion(
+          request,
+          prompt_tokens=state.config.prompt_tokens,
+          completion_tokens=state.config.completion_tokens,
+        )
+        if request.get("stream"):
+          self._send_stream(completion, bool((request.get("stream_options") or {}).get("include_usage")))
+        else:
+          self._send_json(200, completion)
+        state.record(time.monotonic() - started, None)
+      elif path.endswith("/files"):
+        file_bytes, fields = _parse_multipart(self.headers.get("Content-Type", ""), body)
+        with state.lock:
+          file_id = state.next_id("file")
+          state.files[file_id] = file_bytes
+        self._send_json(
+          200,
+          {
+            "id": file_id,
+            "object": "file",
+            "bytes": len(file_bytes),
+            "created_at": int(time.time()),
+            "filename": "input.jsonl",
+            "purpose": fields.get("purpose", "batch"),
+            "status": "processed",
+          },
+        )
+      elif path.endswith("/batches"):
+        self._create_batch(json.loads(body or b"{}"))
+      else:
+        self._send_json(404, {"error": {"message": f"Unknown endpoint {self.path}"}})
+
+    def _create_batch(self, request: Dict[str, Any]) -> None:
+      with state.lock:
+        input_bytes = state.files.get(request.get("input_file_id") or "")
+      if input_bytes is None:
+        self._send_json(404, {"error": {"message": "input file not found"}})
+        return
+
+      results: List[str] = []
+      for line in input_bytes.decode("utf-8").splitlines():
+        if not line.strip():
+          continue
+        item = json.loads(line)
+        completion = chat_completion(
+          item["body"],
+          prompt_tokens=state.config.prompt_tokens,
+          completion_tokens=state.config.completion_tokens,
+        )
+        response = {"status_code": 200, "request_id": item["custom_id"], "body": completion}
+        results.append(json.dumps({"id": f"req-{item['custom_id']}", "custom_id": item["custom_id"], "response": response, "error": None}))
+
+      with state.lock:
+        batch_id = state.next_id("batch")
+        output_file_id = state.next_id("file")
+        state.files[output_file_id] = ("\n".join(results) + "\n").encode("utf-8")
+        batch = {
+          "id": batch_id,
+          "endpoint": request.get("endpoint"),
+          "input_file_id": request.get("input_file_id"),
+          "output_file_id": output_file_id,
+          "created_at": time.time(),
+          "ready_at": time.time() + state.batch_delay,
+          "results": results,
+        }
+        state.batches[batch_id] = batch
+      self._send_json(200, _batch_object(batch))
+
+    def do_GET(self) -> None:  # noqa: N802
+      parts = [part for part in self.path.split("?", 1)[0].split("/") if part]
+      if len(parts) >= 2 and parts[-2] == "batches":
+        with state.lock:
+          batch = state.batches.get(parts[-1])
+        if batch is None:
+          self._send_json(404, {"error": {"message": "batch not found"}})
+        else:
+          self._send_json(200, _batch_object(batch))
+      elif len(parts) >= 3 and parts[-3] == "files" and parts[-1] == "content":
+        with state.lock:
+          data = state.files.get(parts[-2])
+        if data is None:
+          self._send_json(404, {"error": {"message": "file not found"}})
+        else:
+          self._send_bytes(200, data, "application/jsonl")
+      else:
+        self._send_json(404, {"error": {"message": f"Unknown endpoint {self.path}"}})
+
+  return MockHandler
+
+
+def create_server(
+  host: str = DEFAULT_HOST,
+  port: int = DEFAULT_PORT,
+  config: MockConfig | None = None,
+) -> ThreadingHTTPServer:
+  """Build (but do not start) a server; its ``MockState`` is available as ``server.state``."""
+
+  state = MockState(config or MockConfig())
+  server = ThreadingHTTPServer((host, port), make_handler(state))
+  server.daemon_threads = True
+  server.state = state  # type: ignore[attr-defined]
+  return server
+
+
+def parse_args(argv: Iterable[str] | None = None) -> argparse.Namespace:
+  parser = argparse.ArgumentParser(description="Run a local OpenAI-compatible stand-in for the page generators")
+  parser.add_argument("--host", default=DEFAULT_HOST, help="Interface to bind")
+  parser.add_argument("--port", type=int, default=DEFAULT_PORT, help="Port to listen on")
+  parser.add_argument(
+    "--batch-delay",
+    type=float,
+    default=1.0,
+    help="Seconds a submitted batch stays in_progress before reporting completed",
+  )
+  parser.add_argument("--latency-ms", type=float, default=0.0, help="Typical chat-completion latency in milliseconds")
+  parser.add_argument(
+    "--latency-distribution",
+    choices=LATENCY_DISTRIBUTIONS,
+    default="lognormal",
+    help="fixed, uniform on [0, 2x], exponential with mean x, or lognormal with median x",
+  )
+  parser.add_argument("--latency-sigma", type=float, default=0.5, help="Shape of the lognormal latency distribution")
+  parser.add_argument("--rate-429", type=float, default=0.0, help="Share of chat requests answered with 429")
+  parser.add_argument("--rate-500", type=float, default=0.0, help="Share of chat requests answered with 500")
+  parser.add_argument("--prompt-tokens", type=int, help="Report this prompt token count instead of a chars/4 estimate")
+  parser.add_argument("--completion-tokens", type=int, help="Report this completion token count instead of a chars/4 estimate")
+  parser.add_argument("--seed", type=int, help="Seed for latency and fault sampling")
+  return parser.parse_args(argv)
+
+
+def main(argv: Iterable[str] | None = None) -> int:
+  args = parse_args(argv)
+  config = MockConfig(
+    latency_ms=args.latency_ms,
+    latency_distribution=args.latency_distribution,
+    latency_sigma=args.latency_sigma,
+    rate_429=args.rate_429,
+    rate_500=args.rate_500,
+    prompt_tokens=args.prompt_tokens,
+    completion_tokens=args.completion_tokens,
+    batch_delay=args.batch_delay,
+    seed=args.seed,
+  )
+  server = create_server(args.host, args.port, config)
+  print(f"Mock OpenAI-compatible server listening on http://{args.host}:{server.server_address[1]}/v1/")
+  try:
+    server.serve_forever()
+  except KeyboardInterrupt:
+    pass
+  finally:
+    server.server_close()
+    stats = server.state.stats()
+    print(
+      f"Served {stats['chat_requests']} chat requests "
+      f"({stats['injected_429']} injected 429s, {stats['injected_500']} injected 500s)"
+    )
+  return 0
+
+
+if __name__ == "__main__":
+  raise SystemExit(main())
@@ -0,0 +1,8 @@
+"""Shared runtime helpers for the programmatic landing page generators.
+
+``generate_programmatic_flashcards.py`` and ``generate_programmatic_mindmaps.py``
+register a content type from ``content`` and hand it to ``runner``, the command line
+and generation loop they share with ``generate_programmatic_pages.py``. The scripts
+are executed directly (``python scripts/...``), which puts ``scripts/`` on
+``sys.path`` so the package resolves without installation.
+"""
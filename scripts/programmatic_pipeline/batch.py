@@ -0,0 +1,230 @@
+"""Offline batch-job mode for page generation.
+
+Instead of one synchronous chat completion per row, every pending request body is
+written to JSONL batch input files, uploaded, and submitted as batch jobs against
+``/v1/chat/completions``. The jobs are polled until they finish, and each result line
+is handed to the same ``on_result``/``on_error`` callbacks the synchronous engines use,
+so normalisation and checkpointing are unchanged.
+
+Submitted jobs are recorded in ``state.json`` inside the work directory. An
+interrupted run picks those jobs back up instead of paying for them twice.
+"""
+
+from __future__ import annotations
+
+import json
+import sys
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Sequence, Tuple, TypeVar
+
+from programmatic_pipeline.response_cache import ResponseCache, request_cache_key
+
+BATCH_ENDPOINT = "/v1/chat/completions"
+BATCH_COMPLETION_WINDOW = "24h"
+TERMINAL_STATUSES = {"completed", "failed", "expired", "cancelled"}
+DEFAULT_REQUESTS_PER_FILE = 2000
+DEFAULT_POLL_INTERVAL = 30.0
+STATE_FILENAME = "state.json"
+
+RowT = TypeVar("RowT")
+Payload = Dict[str, Any]
+
+
+def batch_dir_for(output_path: Path) -> Path:
+  return output_path.with_name(output_path.name + ".batches")
+
+
+def _load_state(work_dir: Path) -> Dict[str, Any]:
+  path = work_dir / STATE_FILENAME
+  if not path.exists():
+    return {"batches": []}
+  try:
+    state = json.loads(path.read_text(encoding="utf-8"))
+  except json.JSONDecodeError:
+    print(f"Warning: Ignoring unreadable batch state in {path}.", file=sys.stderr)
+    return {"batches": []}
+  if not isinstance(state, dict) or not isinstance(state.get("batches"), list):
+    return {"batches": []}
+  return state
+
+
+def _save_state(work_dir: Path, state: Dict[str, Any]) -> None:
+  path = work_dir / STATE_FILENAME
+  temp_path = path.with_suffix(".tmp")
+  temp_path.write_text(json.dumps(state, indent=2), encoding="utf-8")
+  temp_path.replace(path)
+
+
+def write_batch_inputs(
+  requests: Sequence[Tuple[str, Dict[str, Any]]],
+  work_dir: Path,
+  *,
+  requests_per_file: int = DEFAULT_REQUESTS_PER_FILE,
+) -> List[Tuple[Path, List[str]]]:
+  """Write ``(custom_id, request_body)`` pairs into numbered JSONL batch input files."""
+
+  work_dir.mkdir(parents=True, exist_ok=True)
+  existing = sorted(work_dir.glob("input-*.jsonl"))
+  next_index = len(existing)
+  chunk_size = max(1, requests_per_file)
+  written: List[Tuple[Path, List[str]]] = []
+  for start in range(0, len(requests), chunk_size):
+    chunk = requests[start : start + chunk_size]
+    path = work_dir / f"input-{next_index:04d}.jsonl"
+    next_index += 1
+    with path.open("w", encoding="utf-8") as handle:
+      for custom_id, body in chunk:
+        line = {"custom_id": custom_id, "method": "POST", "url": BATCH_ENDPOINT, "body": body}
+        handle.write(json.dumps(line, ensure_ascii=False) + "\n")
+    written.append((path, [custom_id for custom_id, _ in chunk]))
+  return written
+
+
+def submit_batch(client: Any, input_path: Path) -> str:
+  with input_path.open("rb") as handle:
+    uploaded = client.files.create(file=handle, purpose="batch")
+  batch = client.batches.create(
+    input_file_id=uploaded.id,
+    endpoint=BATCH_ENDPOINT,
+    completion_window=BATCH_COMPLETION_WINDOW,
+  )
+  return batch.id
+
+
+def wait_for_batch(client: Any, batch_id: str, *, poll_interval: float = DEFAULT_POLL_INTERVAL) -> Any:
+  last_report = None
+  while True:
+    batch = client.batches.retrieve(batch_id)
+    counts = getattr(batch, "request_counts", None)
+    report = (
+      batch.status,
+      getattr(counts, "completed", None),
+      getattr(counts, "failed", None),
+      getattr(counts, "total", None),
+    )
+    if report != last_report:
+      print(
+        f"Batch {batch_id}: {batch.status}"
+        + (f" ({report[1]}/{report[3]} completed, {report[2]} failed)" if counts else "")
+      )
+      last_report = report
+    if batch.status in TERMINAL_STATUSES:
+      return batch
+    time.sleep(poll_interval)
+
+
+def _read_file_lines(client: Any, file_id: str | None) -> Iterator[Dict[str, Any]]:
+  if not file_id:
+    return
+  content = client.files.content(file_id)
+  text = content.text if hasattr(content, "text") else content.read().decode("utf-8")
+  for line in text.splitlines():
+    if line.strip():
+      yield json.loads(line)
+
+
+def parse_completion_body(body: Dict[str, Any]) -> Payload:
+  choices = body.get("choices") or []
+  content = choices[0].get("message", {}).get("content") if choices else None
+  if not content:
+    raise RuntimeError("Model returned an empty response")
+  return json.loads(content)
+
+
+def iter_batch_results(client: Any, batch: Any) -> Iterator[Tuple[str, Payload | None, str | None, Any]]:
+  """Yield ``(custom_id, payload, error, usage)`` for every line of a finished batch."""
+
+  for record in _read_file_lines(client, getattr(batch, "output_file_id", None)):
+    custom_id = record.get("custom_id")
+    response = record.get("response") or {}
+    body = response.get("body") or {}
+    usage = body.get("usage") if isinstance(body, dict) else None
+    error = record.get("error")
+    if error or response.get("status_code", 200) >= 400:
+      yield custom_id, None, json.dumps(error or response.get("body"), ensure_ascii=False), usage
+      continue
+    try:
+      yield custom_id, parse_completion_body(body), None, usage
+    except (RuntimeError, json.JSONDecodeError) as exc:
+      yield custom_id, None, str(exc), usage
+
+  for record in _read_file_lines(client, getattr(batch, "error_file_id", None)):
+    yield record.get("custom_id"), None, json.dumps(record.get("error") or record, ensure_ascii=False), None
+
+
+def run_batch(
+  client: Any,
+  rows: Sequence[RowT],
+  row_key: Callable[[RowT], str],
+  build_request: Callable[[RowT], Dict[str, Any]],
+  on_result: Callable[[RowT, Payload], None],
+  on_error: Callable[[RowT, Exception], None],
+  *,
+  work_dir: Path,
+  requests_per_file: int = DEFAULT_REQUESTS_PER_FILE,
+  poll_interval: float = DEFAULT_POLL_INTERVAL,
+  cache: ResponseCache | None = None,
+  on_usage: Callable[[Any], None] | None = None,
+) -> None:
+  rows_by_key: Dict[str, RowT] = {row_key(row): row for row in rows}
+  requests_by_key: Dict[str, Dict[str, Any]] = {}
+  handled = set()
+  for key, row in rows_by_key.items():
+    request_params = build_request(row)
+    if cache is not None:
+      cached = cache.get(request_cache_key(request_params))
+      if cached is not None:
+        handled.add(key)
+        on_result(row, cached)
+        continue
+    requests_by_key[key] = request_params
+
+  work_dir.mkdir(parents=True, exist_ok=True)
+  state = _load_state(work_dir)
+  resumed = [entry for entry in state["batches"] if not entry.get("consumed")]
+  covered = {custom_id for entry in resumed for custom_id in entry["custom_ids"]}
+  if resumed:
+    print(f"Resuming {len(resumed)} previously submitted batch jobs from {work_dir}")
+
+  new_requests = [(key, body) for key, body in requests_by_key.items() if key not in covered]
+  for input_path, custom_ids in write_batch_inputs(new_requests, work_dir, requests_per_file=requests_per_file):
+    batch_id = submit_batch(client, input_path)
+    print(f"Submitted batch {batch_id} with {len(custom_ids)} requests from {input_path}")
+    state["batches"].append(
+      {"batch_id": batch_id, "input_file": input_path.name, "custom_ids": custom_ids, "consumed": False}
+    )
+    _save_state(work_dir, state)
+
+  for entry in state["batches"]:
+    if entry.get("consumed"):
+      continue
+    batch = wait_for_batch(client, entry["batch_id"], poll_interval=poll_interval)
+    for custom_id, payload, error, usage in iter_batch_results(client, batch):
+      row = rows_by_key.get(custom_id or "")
+      if row is None or custom_id in handled:
+        continue
+      handled.add(custom_id)
+      if on_usage is not None and usage is not None:
+        on_usage(usage)
+      if payload is None:
+        on_error(row, RuntimeError(f"Batch request failed: {error}"))
+        continue
+      if cache is not None and custom_id in requests_by_key:
+        cache.put(request_cache_key(requests_by_key[custom_id]), payload)
+      on_result(row, payload)
+
+    for custom_id in entry["custom_ids"]:
+      row = rows_by_key.get(custom_id)
+      if row is not None and custom_id not in handled:
+        handled.add(custom_id)
+        on_error(row, RuntimeError(f"Batch {entry['batch_id']} ended with status '{batch.status}' without a result"))
+    entry["consumed"] = True
+    _save_state(work_dir, state)
+
+  if all(entry.get("consumed") for entry in state["batches"]):
+    for path in work_dir.glob("input-*.jsonl"):
+      path.unlink()
+    (work_dir / STATE_FILENAME).unlink(missing_ok=True)
+    if not any(work_dir.iterdir()):
+      work_dir.rmdir()
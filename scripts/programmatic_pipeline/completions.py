@@ -0,0 +1,550 @@
+"""Chat completion helpers shared by the page generators.
+
+Both generators send the same request shape (system prompt + CSV row + JSON schema)
+and need identical handling for SDK quirks and rate limits, in sync and async form.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import copy
+import json
+import random
+import sys
+import time
+from contextvars import ContextVar
+from dataclasses import dataclass, replace
+from typing import Any, Awaitable, Callable, Dict, List, Tuple, TypeVar
+
+from openai import APIError, APIStatusError, RateLimitError
+
+from programmatic_pipeline.concurrency import AdaptiveConcurrencyLimiter
+from programmatic_pipeline.hedging import Hedger
+from programmatic_pipeline.prompt_cache import PromptPrefixCache
+from programmatic_pipeline.rate_limit import TokenBucketRateLimiter
+from programmatic_pipeline.response_cache import ResponseCache, request_cache_key
+from programmatic_pipeline.scheduling import RunBudget
+from programmatic_pipeline.streaming import StreamCollector, StreamStats, StreamValidationError, stream_params
+from programmatic_pipeline.telemetry import (
+  ATTEMPT_ADMITTED,
+  ATTEMPT_USAGE,
+  REQUEST_ATTEMPT,
+  AttemptRecord,
+  Telemetry,
+  outcome_for,
+)
+from programmatic_pipeline.usage import UsageTotals
+
+DEFAULT_BASE_URL = "https://generativelanguage.googleapis.com/v1beta/openai/"
+
+REASONING_EFFORT_BUDGETS = {
+  "low": 512,
+  "medium": 1024,
+  "high": 8192,
+}
+
+T = TypeVar("T")
+
+# Model that produced the response last returned in this context: the request's own
+# model, or --hedge-model when a hedged duplicate won.
+RESPONSE_MODEL: ContextVar[str | None] = ContextVar("response_model", default=None)
+
+
+def _inject_thinking_budget(
+  request_params: Dict[str, Any],
+  reasoning_effort: str,
+) -> Dict[str, Any]:
+  """Fallback for SDKs that do not expose reasoning_effort."""
+
+  budget = REASONING_EFFORT_BUDGETS.get(reasoning_effort)
+  if not budget:
+    return request_params
+
+  extra_body = copy.deepcopy(request_params.get("extra_body") or {})
+  nested_extra = extra_body.setdefault("extra_body", {})
+  google_section = nested_extra.setdefault("google", {})
+  thinking_config = google_section.setdefault("thinking_config", {})
+  thinking_config.setdefault("thinking_budget", budget)
+  google_section["thinking_config"] = thinking_config
+  request_params["extra_body"] = extra_body
+  return request_params
+
+
+def build_request_params(
+  model: str,
+  temperature: float,
+  system_prompt: str,
+  user_content: str,
+  schema_name: str,
+  schema: Dict[str, Any],
+  reasoning_effort: str | None = None,
+) -> Dict[str, Any]:
+  request_params: Dict[str, Any] = {
+    "model": model,
+    "temperature": temperature,
+    "messages": [
+      {
+        "role": "system",
+        "content": system_prompt,
+      },
+      {
+        "role": "user",
+        "content": user_content,
+      },
+    ],
+    "response_format": {
+      "type": "json_schema",
+      "json_schema": {
+        "name": schema_name,
+        "schema": schema,
+      },
+    },
+  }
+
+  # Add reasoning_effort if provided and not "none"
+  if reasoning_effort and reasoning_effort != "none":
+    request_params["reasoning_effort"] = reasoning_effort
+  return request_params
+
+
+def _thinking_budget_fallback(request_params: Dict[str, Any], exc: TypeError) -> Dict[str, Any]:
+  reasoning_effort = request_params.get("reasoning_effort")
+  if not reasoning_effort or "reasoning_effort" not in str(exc):
+    raise exc
+
+  # Some older OpenAI SDK builds reject reasoning_effort; fall back to thinking budget.
+  fallback_params = copy.deepcopy(request_params)
+  fallback_params.pop("reasoning_effort", None)
+  return _inject_thinking_budget(fallback_params, reasoning_effort)
+
+
+def create_completion(client: Any, request_params: Dict[str, Any]) -> Any:
+  try:
+    return client.chat.completions.create(**request_params)
+  except TypeError as exc:
+    return client.chat.completions.create(**_thinking_budget_fallback(request_params, exc))
+
+
+async def create_completion_async(client: Any, request_params: Dict[str, Any]) -> Any:
+  try:
+    return await client.chat.completions.create(**request_params)
+  except TypeError as exc:
+    return await client.chat.completions.create(**_thinking_budget_fallback(request_params, exc))
+
+
+def stream_completion(client: Any, request_params: Dict[str, Any], stats: StreamStats | None = None) -> Any:
+  """Stream one completion, aborting as soon as the text can no longer match the schema."""
+
+  collector = StreamCollector(request_params, stats)
+  stream = create_completion(client, stream_params(request_params))
+  try:
+    for chunk in stream:
+      collector.add(chunk)
+  finally:
+    stream.close()
+  return collector.response()
+
+
+async def stream_completion_async(
+  client: Any,
+  request_params: Dict[str, Any],
+  stats: StreamStats | None = None,
+) -> Any:
+  collector = StreamCollector(request_params, stats)
+  stream = await create_completion_async(client, stream_params(request_params))
+  try:
+    async for chunk in stream:
+      collector.add(chunk)
+  finally:
+    await stream.close()
+  return collector.response()
+
+
+def parse_json_response(response: Any) -> Dict[str, Any]:
+  if not response.choices or not response.choices[0].message.content:
+    raise RuntimeError("Model returned an empty response")
+
+  return json.loads(response.choices[0].message.content)
+
+
+@dataclass
+class RequestControls:
+  """Run-wide limiters, prompt cache and accounting applied around every request attempt."""
+
+  rate_limiter: TokenBucketRateLimiter | None = None
+  concurrency_limiter: AdaptiveConcurrencyLimiter | None = None
+  prompt_cache: PromptPrefixCache | None = None
+  usage_totals: UsageTotals | None = None
+  stream: bool = False
+  stream_stats: StreamStats | None = None
+  telemetry: Telemetry | None = None
+  budget: RunBudget | None = None
+  hedger: Hedger | None = None
+
+
+def _is_stale_prompt_cache_error(exc: APIStatusError) -> bool:
+  return exc.status_code in {400, 403, 404} and "cache" in str(exc).lower()
+
+
+def _create(client: Any, request_params: Dict[str, Any], controls: RequestControls) -> Any:
+  if controls.stream:
+    return stream_completion(client, request_params, controls.stream_stats)
+  return create_completion(client, request_params)
+
+
+async def _create_async(client: Any, request_params: Dict[str, Any], controls: RequestControls) -> Any:
+  if controls.stream:
+    return await stream_completion_async(client, request_params, controls.stream_stats)
+  return await create_completion_async(client, request_params)
+
+
+def _admitted() -> None:
+  """Tell the hedging layer the attempt got past the rate and concurrency limits."""
+
+  on_admitted = ATTEMPT_ADMITTED.get()
+  if on_admitted is not None:
+    on_admitted()
+
+
+def _create_limited(
+  client: Any,
+  request_params: Dict[str, Any],
+  controls: RequestControls,
+  attempt: AttemptRecord,
+) -> Any:
+  if controls.concurrency_limiter is None:
+    _admitted()
+    return _create(client, request_params, controls)
+  queued = time.monotonic()
+  with controls.concurrency_limiter.slot():
+    attempt.queue_wait += time.monotonic() - queued
+    _admitted()
+    return _create(client, request_params, controls)
+
+
+async def _create_limited_async(
+  client: Any,
+  request_params: Dict[str, Any],
+  controls: RequestControls,
+  attempt: AttemptRecord,
+) -> Any:
+  if controls.concurrency_limiter is None:
+    _admitted()
+    return await _create_async(client, request_params, controls)
+  queued = time.monotonic()
+  async with controls.concurrency_limiter.slot_async():
+    attempt.queue_wait += time.monotonic() - queued
+    _admitted()
+    return await _create_async(client, request_params, controls)
+
+
+def _create_with_prompt_cache(
+  client: Any,
+  request_params: Dict[str, Any],
+  controls: RequestControls,
+  attempt: AttemptRecord,
+) -> Any:
+  prompt_cache = controls.prompt_cache
+  name = prompt_cache.handle() if prompt_cache is not None else None
+  if name is None:
+    return _create_limited(client, request_params, controls, attempt)
+  try:
+    return _create_limited(client, prompt_cache.apply(request_params, name), controls, attempt)
+  except APIStatusError as exc:
+    if not _is_stale_prompt_cache_error(exc):
+      raise
+    # The handle expired or was deleted server-side; send this attempt inline and
+    # let the next request create a fresh cache entry.
+    prompt_cache.invalidate(name)
+  return _create_limited(client, request_params, controls, attempt)
+
+
+async def _create_with_prompt_cache_async(
+  client: Any,
+  request_params: Dict[str, Any],
+  controls: RequestControls,
+  attempt: AttemptRecord,
+) -> Any:
+  prompt_cache = controls.prompt_cache
+  name = await prompt_cache.handle_async() if prompt_cache is not None else None
+  if name is None:
+    return await _create_limited_async(client, request_params, controls, attempt)
+  try:
+    return await _create_limited_async(client, prompt_cache.apply(request_params, name), controls, attempt)
+  except APIStatusError as exc:
+    if not _is_stale_prompt_cache_error(exc):
+      raise
+    prompt_cache.invalidate(name)
+  return await _create_limited_async(client, request_params, controls, attempt)
+
+
+def _finish_attempt(
+  controls: RequestControls,
+  attempt: AttemptRecord,
+  started: float,
+  usage: Any,
+  exc: BaseException | None,
+) -> None:
+  attempt.latency = max(0.0, time.monotonic() - started - attempt.queue_wait)
+  attempt.outcome = outcome_for(exc)
+  if controls.hedger is not None and exc is None:
+    # Service time only: waits on the rate limiter and concurrency slots are excluded.
+    controls.hedger.observe(attempt.latency)
+  if controls.usage_totals is not None:
+    controls.usage_totals.record(usage)
+  if controls.budget is not None:
+    controls.budget.record(usage)
+  if controls.telemetry is not None:
+    controls.telemetry.record(attempt, usage)
+  sink = ATTEMPT_USAGE.get()
+  if sink is not None and usage is not None:
+    sink.append(usage)
+
+
+def _hedge_leg(request_params: Dict[str, Any], controls: RequestControls) -> Tuple[Dict[str, Any], RequestControls]:
+  """Request and controls for the duplicate leg of a hedged attempt."""
+
+  model = controls.hedger.model if controls.hedger is not None else None
+  if not model or model == request_params.get("model"):
+    return request_params, controls
+  # A cached prompt prefix belongs to the primary model, so the fallback sends it inline.
+  return {**request_params, "model": model}, replace(controls, prompt_cache=None)
+
+
+def complete_json(
+  client: Any,
+  request_params: Dict[str, Any],
+  controls: RequestControls | None = None,
+) -> Dict[str, Any]:
+  """Run one request attempt under the run's limiters and return the parsed JSON."""
+
+  controls = controls or RequestControls()
+  RESPONSE_MODEL.set(request_params.get("model"))
+  if controls.hedger is None:
+    return _complete_json_once(client, request_params, controls)
+  backup_params, backup_controls = _hedge_leg(request_params, controls)
+  backup_results: List[Dict[str, Any]] = []
+
+  def backup() -> Dict[str, Any]:
+    result = _complete_json_once(client, backup_params, backup_controls)
+    backup_results.append(result)
+    return result
+
+  result = controls.hedger.run(lambda: _complete_json_once(client, request_params, controls), backup)
+  _note_response_model(result, backup_results, backup_params)
+  return result
+
+
+def _note_response_model(
+  result: Dict[str, Any],
+  backup_results: List[Dict[str, Any]],
+  backup_params: Dict[str, Any],
+) -> None:
+  if any(backup is result for backup in backup_results):
+    RESPONSE_MODEL.set(backup_params.get("model"))
+
+
+def response_model(request_params: Dict[str, Any]) -> str | None:
+  """The model that answered the last ``complete_json`` or cache lookup for ``request_params`` here."""
+
+  return RESPONSE_MODEL.get() or request_params.get("model")
+
+
+def _complete_json_once(client: Any, request_params: Dict[str, Any], controls: RequestControls) -> Dict[str, Any]:
+  attempt = AttemptRecord()
+  rate_limiter = controls.rate_limiter if controls.rate_limiter and controls.rate_limiter.enabled else None
+  waited = time.monotonic()
+  reservation = rate_limiter.acquire(request_params) if rate_limiter else None
+  attempt.rate_limit_wait = time.monotonic() - waited
+  started = time.monotonic()
+  usage = None
+  error: BaseException | None = None
+  try:
+    try:
+      response = _create_with_prompt_cache(client, request_params, controls, attempt)
+      usage = getattr(response, "usage", None)
+    finally:
+      if rate_limiter and reservation:
+        rate_limiter.settle(reservation, request_params, usage)
+    return parse_json_response(response)
+  except BaseException as exc:
+    error = exc
+    raise
+  finally:
+    _finish_attempt(controls, attempt, started, usage, error)
+
+
+async def complete_json_async(
+  client: Any,
+  request_params: Dict[str, Any],
+  controls: RequestControls | None = None,
+) -> Dict[str, Any]:
+  controls = controls or RequestControls()
+  RESPONSE_MODEL.set(request_params.get("model"))
+  if controls.hedger is None:
+    return await _complete_json_once_async(client, request_params, controls)
+  backup_params, backup_controls = _hedge_leg(request_params, controls)
+  backup_results: List[Dict[str, Any]] = []
+
+  async def backup() -> Dict[str, Any]:
+    result = await _complete_json_once_async(client, backup_params, backup_controls)
+    backup_results.append(result)
+    return result
+
+  result = await controls.hedger.run_async(
+    lambda: _complete_json_once_async(client, request_params, controls),
+    backup,
+  )
+  _note_response_model(result, backup_results, backup_params)
+  return result
+
+
+async def _complete_json_once_async(
+  client: Any,
+  request_params: Dict[str, Any],
+  controls: RequestControls,
+) -> Dict[str, Any]:
+  attempt = AttemptRecord()
+  rate_limiter = controls.rate_limiter if controls.rate_limiter and controls.rate_limiter.enabled else None
+  waited = time.monotonic()
+  reservation = await rate_limiter.acquire_async(request_params) if rate_limiter else None
+  attempt.rate_limit_wait = time.monotonic() - waited
+  started = time.monotonic()
+  usage = None
+  error: BaseException | None = None
+  try:
+    try:
+      response = await _create_with_prompt_cache_async(client, request_params, controls, attempt)
+      usage = getattr(response, "usage", None)
+    finally:
+      if rate_limiter and reservation:
+        rate_limiter.settle(reservation, request_params, usage)
+    return parse_json_response(response)
+  except BaseException as exc:
+    error = exc
+    raise
+  finally:
+    _finish_attempt(controls, attempt, started, usage, error)
+
+
+def _retry_delay(exc: Exception, attempt: int, max_attempts: int, delay: float) -> float | None:
+  """Return how long to sleep before retrying ``exc``, or ``None`` to re-raise it."""
+
+  if attempt == max_attempts:
+    return None
+  if isinstance(exc, StreamValidationError):
+    print(
+      f"Streamed response violated the schema (attempt {attempt}/{max_attempts}): {exc}. "
+      "Retrying immediately...",
+      file=sys.stderr,
+    )
+    return 0.0
+  if isinstance(exc, RateLimitError):
+    sleep_for = delay * (1 + random.random())
+    print(
+      f"Rate limit encountered (attempt {attempt}/{max_attempts}). "
+      f"Retrying in {sleep_for:.2f} seconds...",
+      file=sys.stderr,
+    )
+    return sleep_for
+  if isinstance(exc, APIError) and getattr(exc, "status", None) == 429:
+    sleep_for = delay * (1 + random.random())
+    print(
+      f"Gemini API returned status 429 (attempt {attempt}/{max_attempts}). "
+      f"Retrying in {sleep_for:.2f} seconds...",
+      file=sys.stderr,
+    )
+    return sleep_for
+  return None
+
+
+def call_with_retries(
+  call: Callable[[], T],
+  *,
+  max_attempts: int = 6,
+  initial_delay: float = 4.0,
+) -> T:
+  delay = initial_delay
+  for attempt in range(1, max_attempts + 1):
+    REQUEST_ATTEMPT.set(attempt)
+    try:
+      return call()
+    except (APIError, StreamValidationError) as exc:
+      sleep_for = _retry_delay(exc, attempt, max_attempts, delay)
+      if sleep_for is None:
+        raise
+      time.sleep(sleep_for)
+      delay *= 2
+  raise RuntimeError("call_with_retries exhausted without a result")
+
+
+async def call_with_retries_async(
+  call: Callable[[], Awaitable[T]],
+  *,
+  max_attempts: int = 6,
+  initial_delay: float = 4.0,
+) -> T:
+  delay = initial_delay
+  for attempt in range(1, max_attempts + 1):
+    REQUEST_ATTEMPT.set(attempt)
+    try:
+      return await call()
+    except (APIError, StreamValidationError) as exc:
+      sleep_for = _retry_delay(exc, attempt, max_attempts, delay)
+      if sleep_for is None:
+        raise
+      await asyncio.sleep(sleep_for)
+      delay *= 2
+  raise RuntimeError("call_with_retries_async exhausted without a result")
+
+
+def call_with_cache(
+  cache: ResponseCache | None,
+  request_params: Dict[str, Any],
+  call: Callable[[], Dict[str, Any]],
+  *,
+  refresh: bool = False,
+) -> Dict[str, Any]:
+  """Serve ``request_params`` from ``cache`` when possible, otherwise run ``call``.
+
+  ``refresh`` skips the lookup (the cached response is known to be unusable) but still
+  stores the fresh result. A response from a winning ``--hedge-model`` duplicate is
+  stored under that model's key, so it is never served as the requested model's.
+  """
+
+  if cache is None:
+    return call()
+  key = request_cache_key(request_params)
+  cached = None if refresh else cache.get(key)
+  if cached is not None:
+    RESPONSE_MODEL.set(request_params.get("model"))
+    return cached
+  result = call()
+  cache.put(_answered_key(request_params, key), result)
+  return result
+
+
+async def call_with_cache_async(
+  cache: ResponseCache | None,
+  request_params: Dict[str, Any],
+  call: Callable[[], Awaitable[Dict[str, Any]]],
+  *,
+  refresh: bool = False,
+) -> Dict[str, Any]:
+  if cache is None:
+    return await call()
+  key = request_cache_key(request_params)
+  cached = None if refresh else cache.get(key)
+  if cached is not None:
+    RESPONSE_MODEL.set(request_params.get("model"))
+    return cached
+  result = await call()
+  cache.put(_answered_key(request_params, key), result)
+  return result
+
+
+def _answered_key(request_params: Dict[str, Any], key: str) -> str:
+  model = response_model(request_params)
+  if model == request_params.get("model"):
+    return key
+  return request_cache_key({**request_params, "model": model})
@@ -0,0 +1,160 @@
+"""Adaptive (AIMD) limit on in-flight model requests shared by every worker.
+
+Backing off per worker after a 429 still lets every other worker keep hitting an
+endpoint that is already over quota. This controller holds one effective in-flight
+limit for the whole run: overload responses (429, 5xx, timeouts) cut it
+multiplicatively, successes grow it additively by roughly one slot per window of
+completed requests, and ``--concurrency`` is the ceiling it never exceeds.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import sys
+import threading
+import time
+from collections import deque
+from contextlib import asynccontextmanager, contextmanager
+from typing import AsyncIterator, Deque, Iterator
+
+from openai import APIStatusError, APITimeoutError, RateLimitError
+
+
+def is_overload_error(exc: BaseException) -> bool:
+  if isinstance(exc, (RateLimitError, APITimeoutError)):
+    return True
+  if isinstance(exc, APIStatusError) and exc.status_code >= 500:
+    return True
+  return getattr(exc, "status", None) == 429
+
+
+class AdaptiveConcurrencyLimiter:
+  """Thread- and asyncio-safe AIMD gate around individual request attempts."""
+
+  def __init__(
+    self,
+    max_limit: int,
+    *,
+    min_limit: int = 1,
+    decrease_factor: float = 0.5,
+    increase_step: float = 1.0,
+    decrease_cooldown: float = 5.0,
+    log_interval: float = 30.0,
+  ):
+    self.max_limit = max(1, max_limit)
+    self.min_limit = max(1, min(min_limit, self.max_limit))
+    self.decrease_factor = decrease_factor
+    self.increase_step = increase_step
+    self.decrease_cooldown = decrease_cooldown
+    self.log_interval = log_interval
+    self.limit = float(self.max_limit)
+    self.lowest_limit = self.limit
+    self.in_flight = 0
+    self.decreases = 0
+    # Attempts let through; zero when nothing went through the gate (e.g. --mode batch).
+    self.admitted = 0
+    self._cond = threading.Condition()
+    self._async_waiters: Deque[asyncio.Future[None]] = deque()
+    self._last_decrease = float("-inf")
+    self._last_log = time.monotonic()
+
+  @property
+  def current_limit(self) -> int:
+    return max(self.min_limit, int(self.limit))
+
+  def _try_enter_locked(self) -> bool:
+    if self.in_flight < self.current_limit:
+      self.in_flight += 1
+      self.admitted += 1
+      return True
+    return False
+
+  def _wake_locked(self) -> None:
+    self._cond.notify_all()
+    while self._async_waiters:
+      waiter = self._async_waiters.popleft()
+      if not waiter.done():
+        waiter.get_loop().call_soon_threadsafe(_resolve_waiter, waiter)
+
+  def acquire(self) -> None:
+    with self._cond:
+      while not self._try_enter_locked():
+        self._cond.wait()
+
+  async def acquire_async(self) -> None:
+    loop = asyncio.get_running_loop()
+    while True:
+      with self._cond:
+        if self._try_enter_locked():
+          return
+        waiter: asyncio.Future[None] = loop.create_future()
+        self._async_waiters.append(waiter)
+      await waiter
+
+  def release(self, exc: BaseException | None = None) -> None:
+    with self._cond:
+      self.in_flight -= 1
+      if exc is None:
+        self._on_success_locked()
+      elif is_overload_error(exc):
+        self._on_overload_locked()
+      self._wake_locked()
+
+  def _on_success_locked(self) -> None:
+    previous = self.current_limit
+    self.limit = min(float(self.max_limit), self.limit + self.increase_step / max(self.limit, 1.0))
+    if self.current_limit != previous:
+      now = time.monotonic()
+      if now - self._last_log >= self.log_interval:
+        self._log_locked("raised", now)
+
+  def _on_overload_locked(self) -> None:
+    now = time.monotonic()
+    # Requests already in flight were admitted under the old limit, so one burst of
+    # 429s should only count as a single congestion signal.
+    if now - self._last_decrease < self.decrease_cooldown:
+      return
+    self._last_decrease = now
+    self.limit = max(float(self.min_limit), self.limit * self.decrease_factor)
+    self.lowest_limit = min(self.lowest_limit, self.limit)
+    self.decreases += 1
+    self._log_locked("cut", now)
+
+  def _log_locked(self, action: str, now: float) -> None:
+    self._last_log = now
+    print(
+      f"Adaptive concurrency {action} to {self.current_limit}/{self.max_limit} "
+      f"({self.in_flight} requests in flight)",
+      file=sys.stderr,
+    )
+
+  @contextmanager
+  def slot(self) -> Iterator[None]:
+    self.acquire()
+    try:
+      yield
+    except BaseException as exc:
+      self.release(exc)
+      raise
+    self.release()
+
+  @asynccontextmanager
+  async def slot_async(self) -> AsyncIterator[None]:
+    await self.acquire_async()
+    try:
+      yield
+    except BaseException as exc:
+      self.release(exc)
+      raise
+    self.release()
+
+  def summary_line(self) -> str:
+    return (
+      f"Adaptive concurrency finished at {self.current_limit}/{self.max_limit} "
+      f"(lowest {max(self.min_limit, int(self.lowest_limit))}, {self.decreases} cuts)"
+    )
+
+
+def _resolve_waiter(waiter: asyncio.Future[None]) -> None:
+  if not waiter.done():
+    waiter.set_result(None)
@@ -0,0 +1,321 @@
+"""Content-type plugins: what differs between the programmatic page corpora.
+
+A ``ContentType`` bundles what the shared generation loop in ``runner`` needs to
+know about one corpus: its prompt, response schema, section guidance, CSV row type,
+``normalise_page`` and ``PageOutput``. ``generate_programmatic_flashcards.py`` and
+``generate_programmatic_mindmaps.py`` each define and ``register`` one.
+``generate_programmatic_pages.py`` runs every registered type from one keyword queue.
+
+``ContentOutput`` holds the output side of one corpus in a run: its pages,
+checkpoint journal, fingerprint manifest and dead-letter queue. With ``--shard``
+these follow the shard output, seeded from the combined output on first use.
+"""
+
+from __future__ import annotations
+
+import copy
+import sys
+import time
+from dataclasses import dataclass, field
+from functools import cached_property
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Mapping
+
+from programmatic_pipeline.completions import build_request_params
+from programmatic_pipeline.dead_letter import DeadLetterQueue, dead_letter_path_for
+from programmatic_pipeline.journal import PageJournal, journal_path_for
+from programmatic_pipeline.manifest import FingerprintManifest, input_fingerprint, manifest_path_for, prompt_version
+from programmatic_pipeline.output import PageOutput
+from programmatic_pipeline.packing import packed_schema, packed_user_content
+from programmatic_pipeline.rows import CsvRow, iter_csv_rows
+from programmatic_pipeline.sections import build_section_prompt, section_schema
+from programmatic_pipeline.sharding import Shard, shard_output_path
+
+# relatedTopicsSection is filled by update_related_topics.py, not by the model.
+UNREGENERABLE_SECTIONS = frozenset({"relatedTopicsSection"})
+
+_STAGE_VERBS = {"request": "generating", "normalise": "normalising", "store": "storing"}
+
+
+@dataclass(frozen=True)
+class ContentType:
+  """The prompt, schema, normalisation and output of one page corpus."""
+
+  name: str
+  # Human-readable page kind for messages ("flashcard", "mind map").
+  noun: str
+  prompt_template: str
+  schema_name: str
+  schema: Dict[str, Any]
+  # Prompt headings/bullets (substring markers) that matter when refreshing each section.
+  section_guidance: Dict[str, List[str]]
+  default_output: str
+  row_type: type[CsvRow]
+  normalise_page: Callable[[Any, Dict[str, Any]], Dict[str, Any]]
+  output: PageOutput
+  section_preamble_blocks: int = 3
+  # Overrides of the shared command-line defaults, e.g. a stricter rate limit.
+  defaults: Mapping[str, Any] = field(default_factory=dict)
+
+  def make_row(self, slug: str, data: Mapping[str, str]) -> CsvRow:
+    return self.row_type(slug=slug, data=data)
+
+  def iter_rows(self, path: Path) -> Iterator[CsvRow]:
+    return iter_csv_rows(path, self.row_type)
+
+  @cached_property
+  def regenerable_sections(self) -> List[str]:
+    return [name for name in self.schema["properties"] if name not in UNREGENERABLE_SECTIONS]
+
+  @cached_property
+  def packed_schema(self) -> Dict[str, Any]:
+    return packed_schema(self.schema)
+
+  def build_request(
+    self,
+    model: str,
+    temperature: float,
+    payload: str,
+    reasoning_effort: str | None = None,
+  ) -> Dict[str, Any]:
+    return build_request_params(
+      model,
+      temperature,
+      self.prompt_template,
+      f"CSV row JSON:\n{payload}",
+      self.schema_name,
+      self.schema,
+      reasoning_effort,
+    )
+
+  def build_packed_request(
+    self,
+    model: str,
+    temperature: float,
+    payloads: List[str],
+    reasoning_effort: str | None = None,
+  ) -> Dict[str, Any]:
+    return build_request_params(
+      model,
+      temperature,
+      self.prompt_template,
+      packed_user_content(payloads),
+      f"{self.schema_name}s",
+      self.packed_schema,
+      reasoning_effort,
+    )
+
+  def build_section_request(
+    self,
+    model: str,
+    temperature: float,
+    payload: str,
+    sections: List[str],
+    reasoning_effort: str | None = None,
+  ) -> Dict[str, Any]:
+    return build_request_params(
+      model,
+      temperature,
+      build_section_prompt(
+        self.prompt_template,
+        sections,
+        self.section_guidance,
+        preamble_blocks=self.section_preamble_blocks,
+      ),
+      f"CSV row JSON:\n{payload}",
+      f"{self.schema_name}_sections",
+      section_schema(self.schema, sections),
+      reasoning_effort,
+    )
+
+  def merge_regenerated_sections(
+    self,
+    row: CsvRow,
+    page: Dict[str, Any],
+    payload: Dict[str, Any],
+    sections: List[str],
+  ) -> Dict[str, Any]:
+    """Merge freshly generated ``sections`` into an existing ``page`` and recompute derived fields."""
+
+    merged = copy.deepcopy(page)
+    for name in sections:
+      if name not in payload:
+        raise ValueError(f"Model response for slug '{row.slug}' is missing section '{name}'")
+      merged[name] = payload[name]
+
+    # normalise_page resets relatedTopicsSection to placeholders; keep links that
+    # update_related_topics.py already filled in.
+    related_topics = merged.get("relatedTopicsSection")
+    merged = self.normalise_page(row, merged)
+    if isinstance(related_topics, dict) and related_topics.get("links"):
+      merged["relatedTopicsSection"] = related_topics
+    return merged
+
+
+CONTENT_TYPES: Dict[str, ContentType] = {}
+
+
+def register(content: ContentType) -> ContentType:
+  """Add ``content`` to ``CONTENT_TYPES`` (the types a combined run can generate)."""
+
+  CONTENT_TYPES[content.name] = content
+  return content
+
+
+class ContentOutput:
+  """Generated pages of one content type plus their journal, manifest and dead letters."""
+
+  def __init__(
+    self,
+    content: ContentType,
+    output_path: Path,
+    *,
+    model: str,
+    checkpoint_every: int,
+    checkpoint_interval: float,
+    shard: Shard | None = None,
+    qualified: bool = False,
+  ):
+    self.content = content
+    self.model = model
+    self.qualified = qualified
+    seed_manifest = None
+    if shard is not None:
+      combined_path = output_path
+      output_path = shard_output_path(combined_path, shard)
+    if shard is not None and not output_path.exists() and not journal_path_for(output_path).exists():
+      # A fresh shard starts from its slice of the combined output so skip-existing,
+      # --regenerate-stale and --sections behave as they would in a single process.
+      self.pages = [page for page in content.output.load_existing(combined_path) if shard.owns(page.get("slug"))]
+      seed_manifest = FingerprintManifest(manifest_path_for(combined_path))
+    else:
+      self.pages = content.output.load_existing(output_path)
+    self.path = output_path
+    self.slug_to_index: Dict[str, int] = {}
+    for idx, page in enumerate(self.pages):
+      slug = page.get("slug") if isinstance(page, dict) else None
+      if isinstance(slug, str):
+        self.slug_to_index[slug] = idx
+    self.journal = PageJournal(
+      journal_path_for(output_path),
+      compact_every_rows=checkpoint_every,
+      compact_every_seconds=checkpoint_interval,
+    )
+    self.manifest = FingerprintManifest(manifest_path_for(output_path))
+    if seed_manifest is not None:
+      self.manifest.adopt(seed_manifest, self.slug_to_index)
+    self.dead_letters = DeadLetterQueue(dead_letter_path_for(output_path))
+    self.prompt_version = prompt_version(content.prompt_template)
+    # Set by the runner for a --sections run: the requested sections this corpus has.
+    self.sections: List[str] = []
+    self.failed: Dict[str, Any] = {}
+    self.generated = 0
+    self.writes_performed = 0
+
+  @property
+  def name(self) -> str:
+    return self.content.name
+
+  @property
+  def prefix(self) -> str:
+    """``"<name> "`` in combined runs, so messages say which corpus a slug belongs to."""
+
+    return f"{self.name} " if self.qualified else ""
+
+  def label(self, slug: str) -> str:
+    """Telemetry and batch key of ``slug``; combined runs qualify it with the content type."""
+
+    return f"{self.name}:{slug}" if self.qualified else slug
+
+  def fingerprint(self, row: Any, model: str | None = None) -> str:
+    return input_fingerprint(
+      row.data,
+      prompt_template=self.content.prompt_template,
+      model=model or self.model,
+      schema=self.content.schema,
+    )
+
+  def wants(self, row: Any, *, rerun_existing: bool, regenerate_stale: bool, announce: bool = False) -> bool:
+    """Whether ``row`` should be (re)generated for this corpus."""
+
+    if self.sections:
+      if row.slug not in self.slug_to_index:
+        if announce:
+          print(f"Skipping {self.prefix}slug '{row.slug}' (--sections only refreshes pages already in {self.path})")
+        return False
+      return True
+    if row.slug not in self.slug_to_index or rerun_existing:
+      return True
+    if not regenerate_stale:
+      if announce:
+        print(f"Skipping {self.prefix}slug '{row.slug}' (already present in {self.path})")
+      return False
+    return self.manifest.is_stale(row.slug, self.fingerprint(row))
+
+  def record_fingerprint(self, row: Any) -> None:
+    self.manifest.record(row.slug, self.fingerprint(row), model=self.model, prompt=self.prompt_version)
+
+  def store(
+    self,
+    row: Any,
+    page: Dict[str, Any],
+    *,
+    record_fingerprint: bool = True,
+    model: str | None = None,
+  ) -> None:
+    """Record a generated page and checkpoint it through the journal.
+
+    ``record_fingerprint`` is off for --sections refreshes, which leave the rest of
+    the page, and so its fingerprint, as it was. ``model`` is the model that
+    answered when it was not the run's (a winning --hedge-model duplicate); the page
+    is fingerprinted for that model, so --regenerate-stale later replaces it. The fingerprint and the journal
+    line are written before the page is taken in, so a row that fails either one
+    leaves the pages and manifest as they were; the row only counts as generated
+    once a due checkpoint write has succeeded too.
+    """
+
+    fingerprint = self.fingerprint(row, model) if record_fingerprint else None
+    self.journal.append(page)
+    if fingerprint is not None:
+      self.manifest.record(row.slug, fingerprint, model=model or self.model, prompt=self.prompt_version)
+    if row.slug in self.slug_to_index:
+      self.pages[self.slug_to_index[row.slug]] = page
+    else:
+      self.slug_to_index[row.slug] = len(self.pages)
+      self.pages.append(page)
+    if self.journal.should_compact():
+      self.content.output.write(self.path, self.pages)
+      self.manifest.save()
+      self.journal.mark_compacted()
+      self.writes_performed += 1
+    self.generated += 1
+    self.failed.pop(row.slug, None)
+    self.dead_letters.resolve(row.slug)
+
+  def fail(self, row: Any, exc: BaseException, *, stage: str, raw_response: Any, attempt_pass: int) -> None:
+    self.failed[row.slug] = row
+    self.dead_letters.add(row.slug, exc, stage=stage, raw_response=raw_response, attempt_pass=attempt_pass)
+    print(f"Error {_STAGE_VERBS.get(stage, stage)} {self.prefix}slug '{row.slug}': {exc}", file=sys.stderr)
+
+  def finish(self) -> float:
+    """Write the output file, manifest and dead letters; return the seconds spent."""
+
+    started = time.monotonic()
+    if self.journal.has_entries or not self.path.exists() or not self.writes_performed:
+      self.content.output.write(self.path, self.pages)
+    self.manifest.save()
+    self.journal.mark_compacted()
+    self.dead_letters.rewrite()
+    return time.monotonic() - started
+
+
+@dataclass(frozen=True)
+class WorkItem:
+  """One unit of work in the shared queue: a CSV row for one content type."""
+
+  output: ContentOutput
+  row: Any
+
+  @property
+  def label(self) -> str:
+    return self.output.label(self.row.slug)
@@ -0,0 +1,105 @@
+"""Dead-letter queue for rows that could not be turned into a page.
+
+A row fails at the request stage (the API call still errors after its retries, or
+the response is not valid JSON), at the normalise stage (the model answered, but
+``normalise_page`` rejected the payload, e.g. a missing
+``linkingRecommendations``) or at the store stage (fingerprinting the row,
+appending it to the journal or a checkpoint write raised). Every kind is appended to
+``<output>.deadletter.jsonl`` with the error and the raw response, so a long run
+keeps going and the evidence survives it. Rows that later succeed, in the
+generators' automatic retry pass or in a future run, are dropped from the file when
+it is rewritten at the end of the run.
+"""
+
+from __future__ import annotations
+
+import json
+import sys
+import time
+from pathlib import Path
+from typing import IO, Any, Dict
+
+from openai import APIStatusError
+
+DEAD_LETTER_SUFFIX = ".deadletter.jsonl"
+
+
+def dead_letter_path_for(output_path: Path) -> Path:
+  """Return the dead-letter file used for ``output_path``."""
+
+  return output_path.with_name(output_path.name + DEAD_LETTER_SUFFIX)
+
+
+def raw_response_for(exc: BaseException) -> Any:
+  """Best-effort raw model or API response carried by ``exc``."""
+
+  if isinstance(exc, json.JSONDecodeError):
+    return exc.doc
+  if isinstance(exc, APIStatusError):
+    return exc.body if exc.body is not None else exc.response.text
+  return None
+
+
+class DeadLetterQueue:
+  """Failed rows keyed by slug, mirrored to an append-only JSONL file."""
+
+  def __init__(self, path: Path):
+    self.path = path
+    self.entries: Dict[str, Dict[str, Any]] = {}
+    self._handle: IO[str] | None = None
+    if path.exists():
+      with path.open("r", encoding="utf-8") as handle:
+        for line_number, line in enumerate(handle, start=1):
+          if not line.strip():
+            continue
+          try:
+            record = json.loads(line)
+          except json.JSONDecodeError:
+            print(
+              f"Warning: Ignoring unreadable dead-letter entry on line {line_number} of {path}.",
+              file=sys.stderr,
+            )
+            continue
+          if isinstance(record, dict) and isinstance(record.get("slug"), str):
+            self.entries[record["slug"]] = record
+
+  def __len__(self) -> int:
+    return len(self.entries)
+
+  def add(self, slug: str, exc: BaseException, *, stage: str, raw_response: Any = None, attempt_pass: int = 1) -> None:
+    record = {
+      "slug": slug,
+      "stage": stage,
+      "pass": attempt_pass,
+      "errorType": type(exc).__name__,
+      "error": str(exc),
+      "rawResponse": raw_response,
+      "ts": round(time.time(), 3),
+    }
+    self.entries[slug] = record
+    if self._handle is None:
+      self.path.parent.mkdir(parents=True, exist_ok=True)
+      self._handle = self.path.open("a", encoding="utf-8")
+    self._handle.write(json.dumps(record, ensure_ascii=False, default=str) + "\n")
+    self._handle.flush()
+
+  def resolve(self, slug: str) -> None:
+    self.entries.pop(slug, None)
+
+  def rewrite(self) -> None:
+    """Compact the file to the rows that are still failing (removing it when none are)."""
+
+    self.close()
+    if not self.entries:
+      self.path.unlink(missing_ok=True)
+      return
+    temp_path = self.path.with_suffix(self.path.suffix + ".tmp")
+    with temp_path.open("w", encoding="utf-8") as handle:
+      for record in self.entries.values():
+        handle.write(json.dumps(record, ensure_ascii=False, default=str) + "\n")
+    temp_path.replace(self.path)
+
+  def close(self) -> None:
+    if self._handle is not None:
+      self._handle.close()
+      self._handle = None
@@ -0,0 +1,189 @@
+"""Fan-out engines that drive model calls for a stream of CSV rows.
+
+``run_threaded`` runs requests on a ``ThreadPoolExecutor``. ``run_async`` runs every
+request on a single event loop, bounded by an ``asyncio.Semaphore``, so hundreds of
+requests can be in flight without a thread (and stack) per request. In both engines
+``on_result``/``on_error`` run on the coordinating thread, so page normalisation and
+checkpointing never race with each other.
+
+Rows are pulled from an iterable only as capacity frees up: at most
+``IN_FLIGHT_PER_WORKER`` times ``concurrency`` items are submitted at once. Memory
+therefore stays flat however long the CSV is. It also means a ``stop`` event can end
+the run cleanly: once it is set no new rows are pulled, queued rows that have not
+started are dropped, and requests already on the wire are allowed to finish. The
+iterable is polled again whenever capacity frees up, so an iterator that stops early
+and later resumes (the budget gate defers rows this way) is supported.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import signal
+import sys
+import threading
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any, Awaitable, Callable, Dict, Iterable, Iterator, TypeVar
+
+ENGINES = ("threads", "async")
+IN_FLIGHT_PER_WORKER = 2
+
+RowT = TypeVar("RowT")
+Payload = Dict[str, Any]
+
+# Returned in place of a payload for rows dropped by ``stop`` before they started.
+_SKIPPED: Any = object()
+_END: Any = object()
+
+
+def in_flight_limit(concurrency: int) -> int:
+  return IN_FLIGHT_PER_WORKER * max(1, concurrency)
+
+
+def _take(rows: Iterator[RowT], count: int, stop: threading.Event | None) -> Iterator[RowT]:
+  for _ in range(count):
+    if stop is not None and stop.is_set():
+      return
+    row = next(rows, _END)
+    if row is _END:
+      return
+    yield row
+
+
+class GracefulInterrupt:
+  """Turn the first SIGINT into a drain request; a second one aborts as usual.
+
+  Use as a context manager around a run and pass ``event`` as the engines' ``stop``.
+  The handler is only installed on the main thread, where Python delivers signals.
+  """
+
+  def __init__(self) -> None:
+    self.event = threading.Event()
+    self._previous: Any = None
+    self._installed = False
+
+  @property
+  def requested(self) -> bool:
+    return self.event.is_set()
+
+  def _handle(self, signum: int, frame: Any) -> None:
+    if self.event.is_set():
+      raise KeyboardInterrupt
+    self.event.set()
+    print(
+      "\nInterrupt received: finishing in-flight requests and checkpointing. Press Ctrl+C again to abort.",
+      file=sys.stderr,
+      flush=True,
+    )
+
+  def __enter__(self) -> "GracefulInterrupt":
+    if threading.current_thread() is threading.main_thread():
+      self._previous = signal.signal(signal.SIGINT, self._handle)
+      self._installed = True
+    return self
+
+  def __exit__(self, *exc_info: Any) -> None:
+    if self._installed:
+      signal.signal(signal.SIGINT, self._previous)
+      self._installed = False
+
+
+def run_threaded(
+  rows: Iterable[RowT],
+  generate: Callable[[RowT], Payload],
+  on_result: Callable[[RowT, Payload], None],
+  on_error: Callable[[RowT, Exception], None],
+  *,
+  concurrency: int,
+  stop: threading.Event | None = None,
+) -> None:
+  limit = in_flight_limit(concurrency)
+  row_iter = iter(rows)
+
+  def guarded(row: RowT) -> Payload:
+    if stop is not None and stop.is_set():
+      return _SKIPPED
+    return generate(row)
+
+  with ThreadPoolExecutor(max_workers=max(1, concurrency)) as executor:
+    future_to_row: Dict[Future, RowT] = {}
+
+    def fill() -> None:
+      for row in _take(row_iter, limit - len(future_to_row), stop):
+        future_to_row[executor.submit(guarded, row)] = row
+
+    fill()
+    while future_to_row:
+      done, _ = wait(future_to_row, return_when=FIRST_COMPLETED)
+      for future in done:
+        row = future_to_row.pop(future)
+        try:
+          payload = future.result()
+        except Exception as exc:  # noqa: BLE001
+          on_error(row, exc)
+          continue
+        if payload is not _SKIPPED:
+          on_result(row, payload)
+      fill()
+
+
+def run_async(
+  rows: Iterable[RowT],
+  generate: Callable[[RowT], Awaitable[Payload]],
+  on_result: Callable[[RowT, Payload], None],
+  on_error: Callable[[RowT, Exception], None],
+  *,
+  concurrency: int,
+  cleanup: Callable[[], Awaitable[None]] | None = None,
+  stop: threading.Event | None = None,
+) -> None:
+  asyncio.run(_run_async(rows, generate, on_result, on_error, concurrency, cleanup, stop))
+
+
+async def _run_async(
+  rows: Iterable[RowT],
+  generate: Callable[[RowT], Awaitable[Payload]],
+  on_result: Callable[[RowT, Payload], None],
+  on_error: Callable[[RowT, Exception], None],
+  concurrency: int,
+  cleanup: Callable[[], Awaitable[None]] | None,
+  stop: threading.Event | None,
+) -> None:
+  semaphore = asyncio.Semaphore(max(1, concurrency))
+  limit = in_flight_limit(concurrency)
+  row_iter = iter(rows)
+
+  async def guarded(row: RowT) -> Payload:
+    async with semaphore:
+      if stop is not None and stop.is_set():
+        return _SKIPPED
+      return await generate(row)
+
+  task_to_row: Dict[asyncio.Task[Payload], RowT] = {}
+
+  def fill() -> None:
+    for row in _take(row_iter, limit - len(task_to_row), stop):
+      task_to_row[asyncio.create_task(guarded(row))] = row
+
+  try:
+    fill()
+    while task_to_row:
+      done, _ = await asyncio.wait(task_to_row, return_when=asyncio.FIRST_COMPLETED)
+      for task in done:
+        row = task_to_row.pop(task)
+        exc = task.exception()
+        if exc is not None:
+          if not isinstance(exc, Exception):
+            raise exc
+          on_error(row, exc)
+          continue
+        payload = task.result()
+        if payload is not _SKIPPED:
+          on_result(row, payload)
+      fill()
+  finally:
+    for task in task_to_row:
+      task.cancel()
+    if task_to_row:
+      await asyncio.gather(*task_to_row, return_exceptions=True)
+    if cleanup is not None:
+      await cleanup()
@@ -0,0 +1,269 @@
+"""Hedged requests: race a duplicate against a slow request to cut tail latency.
+
+A handful of slow responses can hold up the end of a run long after the median
+request has returned. With ``--hedge``, an attempt that is still running after the
+observed p95 latency gets a duplicate, sent to ``--hedge-model`` when given (a
+cheaper or faster fallback) and to the same model otherwise. The first leg that
+returns valid JSON wins, and the other leg is cancelled.
+
+Both the p95 and the hedge timer count service time only. Samples are the
+successful attempts' latencies as recorded by ``complete_json``, and the timer starts
+once the primary leg has been admitted past the rate limiter and the concurrency
+limit. A request queued behind those limits is not slow, and a duplicate would
+spend the very quota it is waiting for.
+
+Hedging only starts once ``MIN_SAMPLES`` attempts have completed, so p95 comes from
+this run's own latencies rather than a guess. ``--max-hedges`` caps the number of
+duplicates per run, so a uniformly slow provider cannot double the spend.
+
+The async engine cancels the losing leg outright. A thread cannot interrupt a
+blocking HTTP call, so in the threaded engine the loser runs to completion in the
+background and its response is discarded. Tokens billed for losing legs are reported
+as wasted. A leg cancelled mid-flight reports no usage, so those legs are counted
+separately.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextvars
+import threading
+from bisect import insort
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any, Awaitable, Callable, Dict, List, TypeVar
+
+from programmatic_pipeline.rate_limit import usage_tokens
+from programmatic_pipeline.telemetry import ATTEMPT_ADMITTED, ATTEMPT_USAGE, REQUEST_HEDGE
+from programmatic_pipeline.usage import usage_breakdown
+
+HEDGE_PERCENTILE = 0.95
+MIN_SAMPLES = 20
+DEFAULT_MAX_HEDGES = 100
+
+T = TypeVar("T")
+
+
+def _total_tokens(usages: List[Any]) -> int:
+  total = 0
+  for usage in usages:
+    tokens = usage_tokens(usage, "total_tokens")
+    if tokens is None:
+      breakdown = usage_breakdown(usage)
+      tokens = breakdown["prompt_tokens"] + breakdown["completion_tokens"] + breakdown["thinking_tokens"]
+    total += tokens
+  return total
+
+
+class Hedger:
+  """Run-wide hedging policy: p95 trigger, duplicate cap and wasted-token accounting."""
+
+  def __init__(
+    self,
+    *,
+    max_hedges: int = DEFAULT_MAX_HEDGES,
+    model: str | None = None,
+    percentile: float = HEDGE_PERCENTILE,
+    min_samples: int = MIN_SAMPLES,
+    workers: int = 1,
+  ):
+    self.max_hedges = max(0, max_hedges)
+    self.model = model or None
+    self.percentile = percentile
+    self.min_samples = max(1, min_samples)
+    self.workers = max(1, workers)
+    self.sent = 0
+    self.hedge_wins = 0
+    self.primary_wins = 0
+    self.cancelled = 0
+    self.wasted_tokens = 0
+    self._latencies: List[float] = []
+    self._executor: ThreadPoolExecutor | None = None
+    self._lock = threading.Lock()
+
+  def observe(self, seconds: float) -> None:
+    """Add the service time of one successful attempt to the p95 samples."""
+
+    with self._lock:
+      insort(self._latencies, seconds)
+
+  def delay(self) -> float | None:
+    """Seconds to wait before hedging, or ``None`` while hedging is off or capped."""
+
+    with self._lock:
+      if self.sent >= self.max_hedges or len(self._latencies) < self.min_samples:
+        return None
+      index = min(len(self._latencies) - 1, int(self.percentile * len(self._latencies)))
+      return self._latencies[index]
+
+  def _claim(self) -> bool:
+    with self._lock:
+      if self.sent >= self.max_hedges:
+        return False
+      self.sent += 1
+      return True
+
+  def _settle(self, hedge_won: bool, losing_usage: List[List[Any]], cancelled: int = 0) -> None:
+    with self._lock:
+      if hedge_won:
+        self.hedge_wins += 1
+      else:
+        self.primary_wins += 1
+      self.cancelled += cancelled
+      self.wasted_tokens += sum(_total_tokens(usages) for usages in losing_usage)
+
+  def _waste_later(self, future: Future, usages: List[Any]) -> None:
+    def charge(_: Future) -> None:
+      with self._lock:
+        self.wasted_tokens += _total_tokens(usages)
+
+    future.add_done_callback(charge)
+
+  @staticmethod
+  def _leg(call: Callable[[], T], usages: List[Any], hedge: bool, admitted: threading.Event | None = None) -> T:
+    ATTEMPT_USAGE.set(usages)
+    REQUEST_HEDGE.set(hedge)
+    ATTEMPT_ADMITTED.set(admitted.set if admitted is not None else None)
+    try:
+      return call()
+    finally:
+      # A leg that fails before it is admitted must not leave the caller waiting.
+      if admitted is not None:
+        admitted.set()
+
+  def run(self, primary: Callable[[], T], backup: Callable[[], T]) -> T:
+    """Run ``primary``, racing ``backup`` against it once it outlives the p95 latency."""
+
+    delay = self.delay()
+    if delay is None:
+      return primary()
+
+    with self._lock:
+      if self._executor is None:
+        # Both legs need a thread of their own so the caller can wait on either.
+        self._executor = ThreadPoolExecutor(max_workers=2 * self.workers, thread_name_prefix="hedge")
+      executor = self._executor
+    return self._race(executor, primary, backup, delay)
+
+  def _race(
+    self,
+    executor: ThreadPoolExecutor,
+    primary: Callable[[], T],
+    backup: Callable[[], T],
+    delay: float,
+  ) -> T:
+    usages: Dict[Future, List[Any]] = {}
+
+    def submit(call: Callable[[], T], hedge: bool, admitted: threading.Event | None = None) -> Future:
+      sink: List[Any] = []
+      future = executor.submit(contextvars.copy_context().run, self._leg, call, sink, hedge, admitted)
+      usages[future] = sink
+      return future
+
+    admitted = threading.Event()
+    first = submit(primary, False, admitted)
+    # Time spent waiting on the rate limiter or a concurrency slot is not slowness.
+    admitted.wait()
+    done, _ = wait([first], timeout=delay)
+    if not done and self._claim():
+      submit(backup, True)
+    pending = set(usages)
+    errors: Dict[Future, BaseException] = {}
+    while pending:
+      done, pending = wait(pending, return_when=FIRST_COMPLETED)
+      for future in done:
+        exc = future.exception()
+        if exc is not None:
+          errors[future] = exc
+          continue
+        if len(usages) > 1:
+          losers = [other for other in usages if other is not future]
+          self._settle(future is not first, [usages[other] for other in losers if other.done()])
+          for other in losers:
+            if not other.done():
+              self._waste_later(other, usages[other])
+        return future.result()
+    if len(usages) > 1:
+      self._settle(False, [usages[future] for future in usages])
+    raise errors[first]
+
+  async def run_async(self, primary: Callable[[], Awaitable[T]], backup: Callable[[], Awaitable[T]]) -> T:
+    """Async ``run``: the losing leg is cancelled instead of left to finish."""
+
+    delay = self.delay()
+    if delay is None:
+      return await primary()
+
+    usages: Dict[asyncio.Task, List[Any]] = {}
+
+    async def leg(
+      call: Callable[[], Awaitable[T]],
+      sink: List[Any],
+      hedge: bool,
+      admitted: asyncio.Event | None,
+    ) -> T:
+      # Tasks run in a copy of the caller's context, so these stay local to the leg.
+      ATTEMPT_USAGE.set(sink)
+      REQUEST_HEDGE.set(hedge)
+      ATTEMPT_ADMITTED.set(admitted.set if admitted is not None else None)
+      try:
+        return await call()
+      finally:
+        if admitted is not None:
+          admitted.set()
+
+    def submit(call: Callable[[], Awaitable[T]], hedge: bool, admitted: asyncio.Event | None = None) -> asyncio.Task:
+      sink: List[Any] = []
+      task = asyncio.create_task(leg(call, sink, hedge, admitted))
+      usages[task] = sink
+      return task
+
+    admitted = asyncio.Event()
+    first = submit(primary, False, admitted)
+    try:
+      await admitted.wait()
+      done, _ = await asyncio.wait({first}, timeout=delay)
+      if not done and self._claim():
+        submit(backup, True)
+      pending = set(usages)
+      while pending:
+        done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+        for task in done:
+          if task.exception() is not None:
+            continue
+          if len(usages) > 1:
+            for other in pending:
+              other.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+            losers = [other for other in usages if other is not task]
+            cancelled = sum(1 for other in losers if other.cancelled())
+            self._settle(task is not first, [usages[other] for other in losers], cancelled)
+          return task.result()
+      if len(usages) > 1:
+        self._settle(False, list(usages.values()))
+      raise first.exception()
+    finally:
+      leftover = [task for task in usages if not task.done()]
+      for task in leftover:
+        task.cancel()
+      if leftover:
+        await asyncio.gather(*leftover, return_exceptions=True)
+
+  def close(self) -> None:
+    """Release the leg threads without waiting for discarded losers."""
+
+    with self._lock:
+      executor, self._executor = self._executor, None
+    if executor is not None:
+      executor.shutdown(wait=False)
+
+  def summary_line(self) -> str:
+    with self._lock:
+      line = (
+        f"Hedging: {self.sent} of max {self.max_hedges} duplicate requests sent"
+        + (f" to {self.model}" if self.model else "")
+        + f", {self.hedge_wins} won by the duplicate, {self.primary_wins} by the original; "
+        f"{self.wasted_tokens} tokens wasted on losing requests"
+      )
+      if self.cancelled:
+        line += f" ({self.cancelled} cancelled in flight, usage unknown)"
+    return line
@@ -0,0 +1,133 @@
+"""Append-only JSONL checkpoint journal for generated pages.
+
+Rewriting the whole TypeScript output after every completed row makes long runs
+quadratic in disk I/O and JSON encoding. Instead, each finished page is appended as
+one JSON line to a journal that lives next to the output file, and the journal is
+periodically compacted into the TypeScript file. On resume the journal is replayed on
+top of whatever the TypeScript file already contains.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, IO, List, Sequence
+
+JOURNAL_SUFFIX = ".journal.jsonl"
+
+
+def journal_path_for(output_path: Path) -> Path:
+  """Return the journal location used for ``output_path``."""
+
+  return output_path.with_name(output_path.name + JOURNAL_SUFFIX)
+
+
+def replay_journal(path: Path) -> List[Dict[str, Any]]:
+  """Read every complete page record from the journal at ``path``.
+
+  A crash can leave a truncated final line behind; it is skipped with a warning
+  because the page it described will simply be regenerated.
+  """
+
+  if not path.exists():
+    return []
+
+  pages: List[Dict[str, Any]] = []
+  with path.open("r", encoding="utf-8") as handle:
+    for line_number, line in enumerate(handle, start=1):
+      if not line.strip():
+        continue
+      try:
+        record = json.loads(line)
+      except json.JSONDecodeError:
+        print(
+          f"Warning: Ignoring unreadable journal entry on line {line_number} of {path}.",
+          file=sys.stderr,
+        )
+        continue
+      if isinstance(record, dict) and isinstance(record.get("slug"), str):
+        pages.append(record)
+  return pages
+
+
+def merge_pages(pages: List[Dict[str, Any]], updates: Sequence[Dict[str, Any]]) -> List[Dict[str, Any]]:
+  """Apply ``updates`` to ``pages`` in place, replacing entries with matching slugs."""
+
+  slug_to_index: Dict[str, int] = {}
+  for idx, page in enumerate(pages):
+    slug = page.get("slug")
+    if isinstance(slug, str):
+      slug_to_index[slug] = idx
+
+  for page in updates:
+    slug = page["slug"]
+    if slug in slug_to_index:
+      pages[slug_to_index[slug]] = page
+    else:
+      slug_to_index[slug] = len(pages)
+      pages.append(page)
+  return pages
+
+
+class PageJournal:
+  """Crash-safe append log that tells the caller when to compact into the output."""
+
+  def __init__(
+    self,
+    path: Path,
+    *,
+    compact_every_rows: int = 100,
+    compact_every_seconds: float = 60.0,
+  ):
+    self.path = path
+    self.compact_every_rows = max(0, compact_every_rows)
+    self.compact_every_seconds = max(0.0, compact_every_seconds)
+    self.pending_rows = 0
+    self._handle: IO[str] | None = None
+    self._last_compaction = time.monotonic()
+
+  @property
+  def has_entries(self) -> bool:
+    """True when the journal holds pages that are not yet in the output file."""
+
+    if self.pending_rows:
+      return True
+    return self.path.exists() and self.path.stat().st_size > 0
+
+  def append(self, page: Dict[str, Any]) -> None:
+    if self._handle is None:
+      self.path.parent.mkdir(parents=True, exist_ok=True)
+      self._handle = self.path.open("a", encoding="utf-8")
+    self._handle.write(json.dumps(page, ensure_ascii=False) + "\n")
+    self._handle.flush()
+    os.fsync(self._handle.fileno())
+    self.pending_rows += 1
+
+  def should_compact(self) -> bool:
+    if not self.pending_rows:
+      return False
+    if self.compact_every_rows and self.pending_rows >= self.compact_every_rows:
+      return True
+    elapsed = time.monotonic() - self._last_compaction
+    return bool(self.compact_every_seconds) and elapsed >= self.compact_every_seconds
+
+  def mark_compacted(self) -> None:
+    """Drop journal entries once the output file has been atomically rewritten.
+
+    Entries are only discarded after the output write succeeds, so a crash in between
+    merely replays pages that are already present, which is idempotent.
+    """
+
+    self.close()
+    if self.path.exists():
+      self.path.unlink()
+    self.pending_rows = 0
+    self._last_compaction = time.monotonic()
+
+  def close(self) -> None:
+    if self._handle is not None:
+      self._handle.close()
+      self._handle = None
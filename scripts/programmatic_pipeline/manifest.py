@@ -0,0 +1,114 @@
+"""Sidecar manifest of input fingerprints for generated pages.
+
+Skipping a slug only because it already exists in the output means a changed CSV
+context column, prompt, model or schema goes unnoticed. Each generated page therefore
+gets a fingerprint of everything that shaped its request. The fingerprints are stored
+in a JSON manifest next to the output file, and ``--regenerate-stale`` resends only
+the rows whose fingerprint no longer matches.
+
+The manifest is rewritten whenever the output file is, so a crash between the two
+can only leave a page looking stale. That page is regenerated on the next run.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import sys
+from pathlib import Path
+from typing import Any, Dict, Iterable, Mapping
+
+MANIFEST_SUFFIX = ".manifest.json"
+MANIFEST_VERSION = 1
+
+
+def manifest_path_for(output_path: Path) -> Path:
+  """Return the fingerprint manifest location used for ``output_path``."""
+
+  return output_path.with_name(output_path.name + MANIFEST_SUFFIX)
+
+
+def _digest(value: Any) -> str:
+  encoded = json.dumps(value, sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+  return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+
+def prompt_version(template: str) -> str:
+  """Short content hash that changes whenever the prompt template is edited."""
+
+  return hashlib.sha256(template.encode("utf-8")).hexdigest()[:12]
+
+
+def input_fingerprint(
+  data: Mapping[str, str],
+  *,
+  prompt_template: str,
+  model: str,
+  schema: Dict[str, Any],
+) -> str:
+  """Fingerprint a row's CSV data together with the prompt, model and schema."""
+
+  return _digest(
+    {
+      "data": dict(data),
+      "prompt": prompt_version(prompt_template),
+      "model": model,
+      "schema": _digest(schema),
+    }
+  )
+
+
+class FingerprintManifest:
+  """Slug to fingerprint mapping persisted as ``<output>.manifest.json``."""
+
+  def __init__(self, path: Path):
+    self.path = path
+    self.entries: Dict[str, Dict[str, str]] = {}
+    self._dirty = False
+    if path.exists():
+      try:
+        loaded = json.loads(path.read_text(encoding="utf-8"))
+      except (OSError, json.JSONDecodeError) as exc:
+        print(
+          f"Warning: Could not read fingerprint manifest {path}: {exc}. Treating every page as stale.",
+          file=sys.stderr,
+        )
+        loaded = {}
+      entries = loaded.get("pages") if isinstance(loaded, dict) else None
+      if isinstance(entries, dict):
+        self.entries = {
+          slug: entry
+          for slug, entry in entries.items()
+          if isinstance(entry, dict) and isinstance(entry.get("fingerprint"), str)
+        }
+
+  def fingerprint(self, slug: str) -> str | None:
+    entry = self.entries.get(slug)
+    return entry["fingerprint"] if entry else None
+
+  def is_stale(self, slug: str, fingerprint: str) -> bool:
+    return self.fingerprint(slug) != fingerprint
+
+  def record(self, slug: str, fingerprint: str, *, model: str, prompt: str) -> None:
+    self.entries[slug] = {"fingerprint": fingerprint, "model": model, "promptVersion": prompt}
+    self._dirty = True
+
+  def adopt(self, other: "FingerprintManifest", slugs: Iterable[str] | None = None) -> None:
+    """Copy entries from ``other`` (only ``slugs`` when given), e.g. when seeding or merging shards."""
+
+    wanted = other.entries.keys() if slugs is None else [slug for slug in slugs if slug in other.entries]
+    for slug in wanted:
+      self.entries[slug] = dict(other.entries[slug])
+      self._dirty = True
+
+  def save(self) -> None:
+    """Atomically rewrite the manifest if any fingerprint changed."""
+
+    if not self._dirty:
+      return
+    self.path.parent.mkdir(parents=True, exist_ok=True)
+    temp_path = self.path.with_suffix(self.path.suffix + ".tmp")
+    payload = {"version": MANIFEST_VERSION, "pages": dict(sorted(self.entries.items()))}
+    temp_path.write_text(json.dumps(payload, indent=2, ensure_ascii=False) + "\n", encoding="utf-8")
+    temp_path.replace(self.path)
+    self._dirty = False
@@ -0,0 +1,195 @@
+"""Read and write the TypeScript module that holds one generated page array.
+
+Each generator writes its pages to one module: ``OUTPUT_HEADER``, the exported
+array, ``OUTPUT_FOOTER``. ``PageOutput`` owns that file for one content type:
+
+- the serializer, kept for the whole process so page fragments stay cached across
+  checkpoint writes;
+- the page index that mirrors the output and is rewritten with it
+  (``configure``);
+- reading an existing output in either format and replaying the checkpoint
+  journal a previous run left next to it (``load_existing``).
+"""
+
+from __future__ import annotations
+
+import json
+import re
+import sys
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Mapping
+
+from programmatic_pipeline.journal import journal_path_for, merge_pages, replay_journal
+from programmatic_pipeline.page_index import PageIndexWriter, Placement
+from programmatic_pipeline.serializer import (
+  PageSerializer,
+  find_json_payload,
+  resolve_output_format,
+  with_native_newlines,
+)
+
+_EXPORT_RE = re.compile(r"^export const (\w+)", re.MULTILINE)
+
+
+class PageOutput:
+  """The generated page module of one content type and the files that mirror it."""
+
+  def __init__(
+    self,
+    *,
+    header: str,
+    footer: str,
+    path_base: str,
+    placements: Callable[[], Mapping[str, Placement]],
+    refresh_structured_data: Callable[[List[Dict[str, Any]]], int],
+  ):
+    match = _EXPORT_RE.search(header)
+    if not match:
+      raise ValueError("Output header does not declare an exported page array")
+    self.header = header
+    self.footer = footer
+    self.export_name = match.group(1)
+    self.path_base = path_base
+    self.placements = placements
+    self.refresh_structured_data = refresh_structured_data
+    self.serializer = PageSerializer(header, footer)
+    # Set by configure; write keeps the page index in step.
+    self.index: PageIndexWriter | None = None
+
+  def index_writer(self, output_path: Path, *, output_format: str = "auto") -> PageIndexWriter:
+    return PageIndexWriter(
+      output_path,
+      header=self.header,
+      path_base=self.path_base,
+      output_format=resolve_output_format(output_format, output_path),
+    )
+
+  def configure(
+    self,
+    output_path: Path,
+    *,
+    output_format: str = "auto",
+    page_index: bool = True,
+  ) -> List[PageIndexWriter]:
+    """Apply ``--output-format`` and ``--no-page-index`` to every later write of ``output_path``.
+
+    Returns the writers that mirror the output, for their summary lines.
+    """
+
+    output_format = resolve_output_format(output_format, output_path)
+    if output_format != self.serializer.output_format:
+      self.serializer = PageSerializer(self.header, self.footer, output_format=output_format)
+    self.index = self.index_writer(output_path, output_format=output_format) if page_index else None
+    return [self.index] if self.index is not None else []
+
+  def write(self, path: Path, pages: List[Dict[str, Any]]) -> None:
+    """Atomically write the generated pages to ``path``."""
+
+    serialized = with_native_newlines(self.serializer.serialize(pages))
+    if self.index is not None and self.index.covers(path):
+      self.index.write(pages, self.placements())
+    path.parent.mkdir(parents=True, exist_ok=True)
+
+    temp_path = path.with_suffix(path.suffix + ".tmp")
+
+    max_retries = 3
+    for attempt in range(max_retries):
+      try:
+        temp_path.write_bytes(serialized)
+        temp_path.replace(path)
+        return
+      except PermissionError as e:
+        if attempt == max_retries - 1:
+          # Last attempt failed, try alternative approach
+          print(f"Permission denied writing to {path}. Trying alternative method...", file=sys.stderr)
+          try:
+            # Try writing directly to the file (may leave partial content if interrupted)
+            path.write_bytes(serialized)
+            return
+          except PermissionError:
+            raise PermissionError(
+              f"Cannot write to {path}. The file may be open in another application (like your editor). "
+              f"Please close the file and try again. Original error: {e}"
+            )
+        else:
+          print(f"Permission denied (attempt {attempt + 1}/{max_retries}). Retrying...", file=sys.stderr)
+          time.sleep(0.5)
+
+  def load_existing(self, path: Path) -> List[Dict[str, Any]]:
+    """Load pages from ``path`` and replay any checkpoint journal left by a previous run."""
+
+    pages = self.read(path)
+    journaled = replay_journal(journal_path_for(path))
+    if journaled:
+      print(f"Replaying {len(journaled)} checkpointed pages from {journal_path_for(path)}")
+      merge_pages(pages, journaled)
+    refreshed = self.refresh_structured_data(pages)
+    if refreshed:
+      print(f"Recomputed structured data for {refreshed} existing pages from {path} (taxonomy or JSON-LD changed)")
+    return pages
+
+  def read(self, path: Path) -> List[Dict[str, Any]]:
+    if not path.exists():
+      return []
+
+    text = path.read_text(encoding="utf-8")
+    export = re.escape(self.export_name)
+    json_start = re.search(rf"{export}[^=]*=\s*JSON\.parse\(", text)
+    if json_start:
+      payload = find_json_payload(text, json_start.start())
+      if payload is None:
+        print(
+          f"Warning: Could not locate the end of the JSON.parse payload in {path}. Ignoring its contents.",
+          file=sys.stderr,
+        )
+        return []
+      return _pages_from_array_text(path, payload[2])
+
+    # Find the opening "[" that starts the array literal assigned to the export.
+    # The first "[" in the file belongs to the page type annotation, so we
+    # explicitly search for the "[" that follows the equals sign in the export.
+    array_start_match = re.search(rf"{export}[^=]*=\s*\[", text, flags=re.MULTILINE)
+    if not array_start_match:
+      print(
+        f"Warning: Could not locate {self.export_name} array in {path}. Ignoring its contents.",
+        file=sys.stderr,
+      )
+      return []
+
+    start = array_start_match.end() - 1
+
+    # The array literal is terminated by the final "]" in the "\n];" footer.
+    end_index = text.rfind("];")
+    if end_index == -1 or end_index < start:
+      print(
+        f"Warning: Could not locate JSON array terminator in existing file {path}. Ignoring its contents.",
+        file=sys.stderr,
+      )
+      return []
+
+    return _pages_from_array_text(path, text[start : end_index + 1])
+
+
+def _pages_from_array_text(path: Path, array_text: str) -> List[Dict[str, Any]]:
+  try:
+    parsed = json.loads(array_text)
+  except json.JSONDecodeError as exc:
+    print(
+      f"Warning: Failed to parse existing pages from {path}: {exc}. Ignoring its contents.",
+      file=sys.stderr,
+    )
+    return []
+
+  if not isinstance(parsed, list):
+    print(
+      f"Warning: Expected a list of pages in {path}, found {type(parsed).__name__}. Ignoring its contents.",
+      file=sys.stderr,
+    )
+    return []
+
+  pages: List[Dict[str, Any]] = []
+  for item in parsed:
+    if isinstance(item, dict):
+      pages.append(item)
+  return pages
@@ -0,0 +1,156 @@
+"""Pack several CSV rows into one model request.
+
+Every single-row request resends the same multi-kilobyte system prompt for a
+few hundred bytes of row JSON. Packing K rows into one request that returns
+``{"pages": [...]}`` keyed by slug cuts input tokens and request counts by close
+to K. Each element is validated against the per-page schema. Rows whose page is
+missing or invalid are handed back so the caller can retry them one at a time.
+"""
+
+from __future__ import annotations
+
+import copy
+import json
+from dataclasses import dataclass, field
+from itertools import islice
+from typing import Any, Callable, Dict, Hashable, Iterable, Iterator, List, Sequence, TypeVar
+
+PACKED_PAGES_KEY = "pages"
+
+RowT = TypeVar("RowT")
+
+_JSON_TYPES = {
+  "object": dict,
+  "array": list,
+  "string": str,
+  "boolean": bool,
+  "null": type(None),
+}
+
+
+def packed_schema(page_schema: Dict[str, Any]) -> Dict[str, Any]:
+  """Wrap ``page_schema`` in an array of pages that each echo their row's slug."""
+
+  item_schema = copy.deepcopy(page_schema)
+  item_schema.setdefault("properties", {})["slug"] = {"type": "string"}
+  required = list(item_schema.get("required") or [])
+  if "slug" not in required:
+    item_schema["required"] = ["slug", *required]
+  return {
+    "type": "object",
+    "properties": {PACKED_PAGES_KEY: {"type": "array", "items": item_schema}},
+    "required": [PACKED_PAGES_KEY],
+    "additionalProperties": False,
+  }
+
+
+def packed_user_content(payloads: Sequence[str]) -> str:
+  rows = [json.loads(payload) for payload in payloads]
+  return (
+    f"Generate one complete page for EACH of the {len(rows)} CSV rows below. "
+    f'Return them in the "{PACKED_PAGES_KEY}" array in the same order, and copy each row\'s '
+    '"slug" verbatim into its page\'s "slug" field.\n'
+    f"CSV rows JSON:\n{json.dumps(rows, ensure_ascii=False, indent=2)}"
+  )
+
+
+def schema_errors(schema: Dict[str, Any], value: Any, path: str = "$") -> List[str]:
+  """Check ``value`` against the JSON Schema subset the generator schemas use."""
+
+  expected = schema.get("type")
+  if expected == "number":
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+      return [f"{path} should be a number"]
+  elif expected == "integer":
+    if isinstance(value, bool) or not isinstance(value, int):
+      return [f"{path} should be an integer"]
+  elif expected in _JSON_TYPES and not isinstance(value, _JSON_TYPES[expected]):
+    return [f"{path} should be of type {expected}"]
+
+  errors: List[str] = []
+  if isinstance(value, dict):
+    properties = schema.get("properties") or {}
+    for key in schema.get("required") or []:
+      if key not in value:
+        errors.append(f"{path}.{key} is required")
+    for key, item in value.items():
+      if key in properties:
+        errors.extend(schema_errors(properties[key], item, f"{path}.{key}"))
+      elif schema.get("additionalProperties") is False:
+        errors.append(f"{path}.{key} is not allowed")
+  elif isinstance(value, list):
+    if "minItems" in schema and len(value) < schema["minItems"]:
+      errors.append(f"{path} should have at least {schema['minItems']} items")
+    if "maxItems" in schema and len(value) > schema["maxItems"]:
+      errors.append(f"{path} should have at most {schema['maxItems']} items")
+    item_schema = schema.get("items")
+    if isinstance(item_schema, dict):
+      for idx, item in enumerate(value):
+        errors.extend(schema_errors(item_schema, item, f"{path}[{idx}]"))
+  return errors
+
+
+@dataclass
+class PackedResult:
+  """Valid pages by slug, plus the reason each remaining slug has to be retried."""
+
+  pages: Dict[str, Dict[str, Any]] = field(default_factory=dict)
+  rejected: Dict[str, str] = field(default_factory=dict)
+
+
+def split_packed_response(
+  response: Dict[str, Any],
+  slugs: Sequence[str],
+  page_schema: Dict[str, Any],
+) -> PackedResult:
+  result = PackedResult()
+  wanted = set(slugs)
+  elements = response.get(PACKED_PAGES_KEY) if isinstance(response, dict) else None
+  if not isinstance(elements, list):
+    elements = []
+
+  for element in elements:
+    slug = element.get("slug") if isinstance(element, dict) else None
+    if slug not in wanted or slug in result.pages:
+      continue
+    errors = schema_errors(page_schema, element)
+    if errors:
+      result.rejected[slug] = "; ".join(errors[:3])
+      continue
+    result.rejected.pop(slug, None)
+    result.pages[slug] = element
+
+  for slug in slugs:
+    if slug not in result.pages and slug not in result.rejected:
+      result.rejected[slug] = "missing from the packed response"
+  return result
+
+
+def pack_rows(
+  rows: Iterable[RowT],
+  pack_size: int,
+  key: Callable[[RowT], Hashable] | None = None,
+) -> Iterator[List[RowT]]:
+  """Group ``rows`` into lists of ``pack_size``, lazily so rows can stream from the CSV.
+
+  With ``key``, only rows with the same key share a group (one prompt and schema per
+  request); each key fills its own group and partial groups follow at the end.
+  """
+
+  size = max(1, pack_size)
+  row_iter = iter(rows)
+  if key is None:
+    while True:
+      group = list(islice(row_iter, size))
+      if not group:
+        return
+      yield group
+
+  pending: Dict[Hashable, List[RowT]] = {}
+  for row in row_iter:
+    row_key = key(row)
+    group = pending.setdefault(row_key, [])
+    group.append(row)
+    if len(group) == size:
+      yield pending.pop(row_key)
+  yield from pending.values()
@@ -0,0 +1,219 @@
+"""Write a slim, typed index module next to a generated page array.
+
+Sitemaps and hub listings only need a page's slug, path, title, anchor text and
+taxonomy placement. Before the index existed they imported the full page array,
+body copy included. Every write of the combined output (for example
+``generated/flashcardPages.ts``) now also writes ``<output stem>Index.ts``
+(``generated/flashcardPagesIndex.ts``) with one row per page:
+
+- ``slug``, plus ``path``, ``canonical``, ``title``, ``heading``, ``subheading``,
+  ``description``, ``anchorText`` and ``descriptionVariants`` when the page has them.
+  Absent fields are left out, so ``??`` fallbacks in consumers behave as they did
+  on the full page.
+- ``hub`` and ``subhub`` (name, slug, path) from the taxonomy JSON, for pages the
+  taxonomy places. A slug listed under several subhubs takes the first one, like
+  the breadcrumbs.
+
+The module declares its row type and follows the output format of the page array
+(object literal or ``JSON.parse`` payload). Rows are cached per page and taxonomy
+placement, so their fragments are re-encoded only when one of the two changes. The
+file is rewritten only when its bytes change. The generators' ``index`` subcommand
+and ``assign_subhubs.py`` rebuild the index after a taxonomy edit.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import re
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Mapping, Tuple
+
+from programmatic_pipeline.serializer import PageSerializer, with_native_newlines
+
+Placement = Mapping[str, str]
+
+_EXPORT_RE = re.compile(r"^export const (\w+): (\w+)\[\] = \[\n", re.MULTILINE)
+_TYPE_IMPORT_RE = re.compile(r"^import type .*\n\n?", re.MULTILINE)
+
+
+def page_index_path_for(output_path: Path) -> Path:
+  return output_path.with_name(f"{output_path.stem}Index{output_path.suffix}")
+
+
+def _write_atomic(path: Path, data: bytes) -> None:
+  temp_path = path.with_suffix(path.suffix + ".tmp")
+  max_retries = 3
+  for attempt in range(max_retries):
+    try:
+      temp_path.write_bytes(data)
+      temp_path.replace(path)
+      return
+    except PermissionError:
+      if attempt == max_retries - 1:
+        raise
+      print(f"Permission denied writing {path} (attempt {attempt + 1}/{max_retries}). Retrying...", file=sys.stderr)
+      time.sleep(0.5)
+
+
+def _slugify(value: str) -> str:
+  normalized = value.lower().replace("&", "and")
+  normalized = re.sub(r"[^a-z0-9]+", "-", normalized)
+  return normalized.strip("-")
+
+
+def taxonomy_placements(taxonomy: Any) -> Dict[str, Dict[str, str]]:
+  """Map each slug of a ``{hub: {subhub: [slugs]}}`` taxonomy to its first placement.
+
+  The entries have the shape the generators' ``load_taxonomy_map`` returns.
+  """
+
+  placements: Dict[str, Dict[str, str]] = {}
+  if not isinstance(taxonomy, Mapping):
+    return placements
+  for hub_name, subhub_map in taxonomy.items():
+    if not isinstance(subhub_map, Mapping):
+      continue
+    hub_slug = _slugify(str(hub_name))
+    for subhub_name, slugs in subhub_map.items():
+      if not isinstance(slugs, list):
+        continue
+      subhub_slug = _slugify(str(subhub_name))
+      for slug in slugs:
+        if isinstance(slug, str):
+          placements.setdefault(
+            slug,
+            {
+              "hub_name": str(hub_name),
+              "hub_slug": hub_slug,
+              "subhub_name": str(subhub_name),
+              "subhub_slug": subhub_slug,
+            },
+          )
+  return placements
+
+
+def _section(page: Mapping[str, Any], key: str) -> Mapping[str, Any]:
+  value = page.get(key)
+  return value if isinstance(value, Mapping) else {}
+
+
+def index_row(page: Mapping[str, Any], placement: Placement | None, path_base: str) -> Dict[str, Any]:
+  """The index row of one page; ``path_base`` prefixes hub paths (``/flashcards``)."""
+
+  metadata = _section(page, "metadata")
+  hero = _section(page, "hero")
+  linking = _section(page, "linkingRecommendations")
+  fields = (
+    ("path", page.get("path")),
+    ("canonical", metadata.get("canonical")),
+    ("title", metadata.get("title")),
+    ("heading", hero.get("heading")),
+    ("subheading", hero.get("subheading")),
+    ("description", metadata.get("description")),
+    ("anchorText", linking.get("anchorText")),
+    ("descriptionVariants", linking.get("descriptionVariants")),
+  )
+  row: Dict[str, Any] = {"slug": page["slug"]}
+  for key, value in fields:
+    if value is not None:
+      row[key] = value
+  if placement:
+    hub_path = f"{path_base}/{placement['hub_slug']}"
+    row["hub"] = {"name": placement["hub_name"], "slug": placement["hub_slug"], "path": hub_path}
+    row["subhub"] = {
+      "name": placement["subhub_name"],
+      "slug": placement["subhub_slug"],
+      "path": f"{hub_path}/{placement['subhub_slug']}",
+    }
+  return row
+
+
+class PageIndexWriter:
+  """Writes the index module that mirrors one output file."""
+
+  def __init__(self, output_path: Path, *, header: str, path_base: str, output_format: str = "literal"):
+    match = _EXPORT_RE.search(header)
+    if not match:
+      raise ValueError("Output header does not declare an exported page array")
+    export_name = match.group(1)
+    # generatedFlashcardPages -> generatedFlashcardPageIndex, GeneratedFlashcardPageIndexEntry
+    singular = export_name[:-1] if export_name.endswith("s") else export_name
+    self.export_name = f"{singular}Index"
+    self.entry_type = f"{singular[:1].upper()}{singular[1:]}IndexEntry"
+    self.output_path = output_path.resolve()
+    self.path = page_index_path_for(output_path)
+    self.path_base = path_base.rstrip("/")
+    # The rows do not reference the page schema, so the index needs no imports.
+    prelude = _TYPE_IMPORT_RE.sub("", header[: match.start()])
+    index_header = (
+      f"{prelude}"
+      f"export type {self.entry_type} = {{\n"
+      f"  slug: string;\n"
+      f"  path?: string;\n"
+      f"  canonical?: string;\n"
+      f"  title?: string;\n"
+      f"  heading?: string;\n"
+      f"  subheading?: string;\n"
+      f"  description?: string;\n"
+      f"  anchorText?: string;\n"
+      f"  descriptionVariants?: [string, string];\n"
+      f"  hub?: {{ name: string; slug: string; path: string }};\n"
+      f"  subhub?: {{ name: string; slug: string; path: string }};\n"
+      f"}};\n\n"
+      f"export const {self.export_name}: {self.entry_type}[] = [\n"
+    )
+    self.serializer = PageSerializer(index_header, "];\n", output_format=output_format)
+    # id(page) -> (page, placement, row). Reusing the row lets the serializer reuse its fragment.
+    self._rows: Dict[int, Tuple[Any, Placement | None, Dict[str, Any]]] = {}
+    self._digest: bytes | None = None
+    self.writes = 0
+    self.rewritten = 0
+    self.unchanged = 0
+
+  @property
+  def output_format(self) -> str:
+    return self.serializer.output_format
+
+  def covers(self, path: Path) -> bool:
+    """Whether ``path`` is the output this index mirrors (``--shard`` outputs are not)."""
+
+    return path.resolve() == self.output_path
+
+  def rows(self, pages: List[Dict[str, Any]], placements: Mapping[str, Placement]) -> List[Dict[str, Any]]:
+    cache: Dict[int, Tuple[Any, Placement | None, Dict[str, Any]]] = {}
+    rows: List[Dict[str, Any]] = []
+    for page in pages:
+      if not isinstance(page, dict) or not isinstance(page.get("slug"), str):
+        continue
+      placement = placements.get(page["slug"])
+      cached = self._rows.get(id(page))
+      if cached is None or cached[0] is not page or cached[1] != placement:
+        cached = (page, placement, index_row(page, placement, self.path_base))
+      cache[id(page)] = cached
+      rows.append(cached[2])
+    # Drop pages that left the list so the cache never outgrows the output.
+    self._rows = cache
+    return rows
+
+  def write(self, pages: List[Dict[str, Any]], placements: Mapping[str, Placement]) -> None:
+    data = with_native_newlines(self.serializer.serialize(self.rows(pages, placements)))
+    digest = hashlib.sha256(data).digest()
+    if self._digest is None and self.path.exists():
+      # First write in this process: compare against what a previous run left.
+      self._digest = hashlib.sha256(self.path.read_bytes()).digest()
+    self.writes += 1
+    if digest == self._digest:
+      self.unchanged += 1
+      return
+    self.path.parent.mkdir(parents=True, exist_ok=True)
+    _write_atomic(self.path, data)
+    self._digest = digest
+    self.rewritten += 1
+
+  def summary_line(self) -> str:
+    return (
+      f"Page index {self.path}: {len(self._rows)} rows, {self.rewritten} writes, "
+      f"{self.unchanged} unchanged writes skipped"
+    )
@@ -0,0 +1,160 @@
+"""Explicit Gemini context caching for the static system prompt.
+
+The system message is byte-identical for every row of a run, yet without a cache
+it is billed and processed from scratch on every request. ``PromptPrefixCache``
+creates one ``cachedContents`` entry holding the system instruction through the
+native Gemini REST API, extends its TTL before it runs out, and rewrites each
+request to reference the handle instead of resending the prompt.
+
+Structured-output settings cannot be stored in a cached content entry, so the
+JSON schema still travels in ``response_format``.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import copy
+import json
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+from typing import Any, Dict
+from urllib.parse import urlsplit
+
+GEMINI_API_ROOT = "https://generativelanguage.googleapis.com/v1beta"
+DEFAULT_PROMPT_CACHE_TTL = 3600
+# Refresh the TTL once less than this fraction of it remains.
+REFRESH_FRACTION = 0.2
+REQUEST_TIMEOUT = 30.0
+
+
+def gemini_api_root(base_url: str) -> str | None:
+  """Return the native REST root for a Gemini OpenAI-compatible ``base_url``."""
+
+  parts = urlsplit(base_url)
+  if parts.hostname != "generativelanguage.googleapis.com":
+    return None
+  version = next((segment for segment in parts.path.split("/") if segment.startswith("v1")), "v1beta")
+  return f"{parts.scheme}://{parts.netloc}/{version}"
+
+
+class PromptPrefixCache:
+  """Thread-safe owner of the run's cached system-prompt handle."""
+
+  def __init__(
+    self,
+    api_key: str,
+    model: str,
+    system_prompt: str,
+    *,
+    ttl_seconds: int = DEFAULT_PROMPT_CACHE_TTL,
+    api_root: str = GEMINI_API_ROOT,
+  ):
+    self.api_key = api_key
+    self.model = model if model.startswith("models/") else f"models/{model}"
+    self.system_prompt = system_prompt
+    self.ttl_seconds = max(60, ttl_seconds)
+    self.api_root = api_root.rstrip("/")
+    self.name: str | None = None
+    self.disabled = False
+    self.refreshes = 0
+    self._expires_at = 0.0
+    self._lock = threading.Lock()
+
+  def _request(self, method: str, path: str, body: Dict[str, Any] | None = None) -> Dict[str, Any]:
+    data = json.dumps(body).encode("utf-8") if body is not None else None
+    request = urllib.request.Request(
+      f"{self.api_root}/{path}",
+      data=data,
+      method=method,
+      headers={"Content-Type": "application/json", "x-goog-api-key": self.api_key},
+    )
+    with urllib.request.urlopen(request, timeout=REQUEST_TIMEOUT) as response:
+      raw = response.read()
+    return json.loads(raw) if raw else {}
+
+  def _create_locked(self) -> None:
+    created = self._request(
+      "POST",
+      "cachedContents",
+      {
+        "model": self.model,
+        "systemInstruction": {"parts": [{"text": self.system_prompt}]},
+        "ttl": f"{self.ttl_seconds}s",
+      },
+    )
+    self.name = created["name"]
+    self._expires_at = time.monotonic() + self.ttl_seconds
+    print(f"Created prompt cache {self.name} (TTL {self.ttl_seconds}s)")
+
+  def _refresh_locked(self) -> None:
+    self._request("PATCH", f"{self.name}?updateMask=ttl", {"ttl": f"{self.ttl_seconds}s"})
+    self._expires_at = time.monotonic() + self.ttl_seconds
+    self.refreshes += 1
+
+  def handle(self) -> str | None:
+    """Return a live cache name, creating or extending it when needed."""
+
+    with self._lock:
+      if self.disabled:
+        return None
+      remaining = self._expires_at - time.monotonic()
+      if self.name is not None and remaining > self.ttl_seconds * REFRESH_FRACTION:
+        return self.name
+      try:
+        if self.name is None or remaining <= 0:
+          self._create_locked()
+        else:
+          self._refresh_locked()
+      except (urllib.error.URLError, KeyError, ValueError, OSError) as exc:
+        detail = exc.read().decode("utf-8", "replace")[:200] if isinstance(exc, urllib.error.HTTPError) else exc
+        print(
+          f"Warning: Prompt caching unavailable ({detail}); sending the system prompt inline.",
+          file=sys.stderr,
+        )
+        self.disabled = True
+        self.name = None
+      return self.name
+
+  async def handle_async(self) -> str | None:
+    if self.disabled or (
+      self.name is not None
+      and self._expires_at - time.monotonic() > self.ttl_seconds * REFRESH_FRACTION
+    ):
+      return self.name
+    return await asyncio.to_thread(self.handle)
+
+  def invalidate(self, name: str) -> None:
+    """Forget ``name`` after the API rejected it so the next request recreates it."""
+
+    with self._lock:
+      if self.name == name:
+        self.name = None
+        self._expires_at = 0.0
+
+  def apply(self, request_params: Dict[str, Any], name: str | None) -> Dict[str, Any]:
+    """Return ``request_params`` with the system message replaced by the cache handle."""
+
+    if name is None:
+      return request_params
+    messages = request_params.get("messages") or []
+    if not messages or messages[0].get("role") != "system" or messages[0].get("content") != self.system_prompt:
+      return request_params
+    cached_params = copy.deepcopy(request_params)
+    cached_params["messages"] = cached_params["messages"][1:]
+    extra_body = cached_params.setdefault("extra_body", {})
+    google_section = extra_body.setdefault("extra_body", {}).setdefault("google", {})
+    google_section["cached_content"] = name
+    return cached_params
+
+  def close(self) -> None:
+    with self._lock:
+      if self.name is None:
+        return
+      try:
+        self._request("DELETE", self.name)
+      except (urllib.error.URLError, OSError) as exc:
+        print(f"Warning: Could not delete prompt cache {self.name}: {exc}", file=sys.stderr)
+      self.name = None
@@ -0,0 +1,147 @@
+"""Token-bucket limiter that enforces requests-per-minute and tokens-per-minute.
+
+Gemini quotas are enforced on both request count and token volume, and with a
+multi-kilobyte system prompt TPM is usually the binding limit. Each admission check is
+O(1): a request is admitted while both buckets are non-negative and its estimated
+cost is debited straight away (the token bucket may dip below zero). Callers that
+find a bucket empty sleep for exactly the time it needs to refill, then re-check.
+Once the response arrives, the estimate is corrected with the real ``usage`` numbers,
+so waiting callers benefit immediately when the estimate was too high.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Dict
+
+# Rough chars-per-token ratio for English prose/JSON; only used for pre-admission estimates.
+CHARS_PER_TOKEN = 4
+DEFAULT_COMPLETION_ESTIMATE = 3000
+USAGE_EMA_WEIGHT = 0.2
+MIN_WAIT_SECONDS = 0.05
+
+
+@dataclass
+class Reservation:
+  estimated_tokens: int
+
+
+def estimate_prompt_tokens(request_params: Dict[str, Any]) -> int:
+  messages = request_params.get("messages") or []
+  chars = sum(len(str(message.get("content") or "")) for message in messages)
+  response_format = request_params.get("response_format")
+  if response_format:
+    chars += len(json.dumps(response_format))
+  return max(1, chars // CHARS_PER_TOKEN)
+
+
+def usage_tokens(usage: Any, field: str) -> int | None:
+  if usage is None:
+    return None
+  value = usage.get(field) if isinstance(usage, dict) else getattr(usage, field, None)
+  return int(value) if value is not None else None
+
+
+class TokenBucketRateLimiter:
+  """Thread- and asyncio-safe RPM + TPM limiter shared by every worker."""
+
+  def __init__(self, requests_per_minute: int | None, tokens_per_minute: int | None):
+    self.requests_per_minute = max(0, requests_per_minute or 0)
+    self.tokens_per_minute = max(0, tokens_per_minute or 0)
+    self._request_balance = float(self.requests_per_minute)
+    self._token_balance = float(self.tokens_per_minute)
+    self._updated = time.monotonic()
+    self._completion_estimate = float(DEFAULT_COMPLETION_ESTIMATE)
+    # Corrects the chars/token heuristic using the prompt_tokens the API reports.
+    self._prompt_scale = 1.0
+    self._lock = threading.Lock()
+    self.waited_seconds = 0.0
+
+  @property
+  def enabled(self) -> bool:
+    return bool(self.requests_per_minute or self.tokens_per_minute)
+
+  def _refill_locked(self, now: float) -> None:
+    elapsed = now - self._updated
+    self._updated = now
+    if self.requests_per_minute:
+      self._request_balance = min(
+        float(self.requests_per_minute),
+        self._request_balance + elapsed * self.requests_per_minute / 60.0,
+      )
+    if self.tokens_per_minute:
+      self._token_balance = min(
+        float(self.tokens_per_minute),
+        self._token_balance + elapsed * self.tokens_per_minute / 60.0,
+      )
+
+  def _try_admit(self, request_params: Dict[str, Any]) -> tuple[Reservation | None, float]:
+    """Admit the request if both buckets are non-negative, else return (and count) how long to wait."""
+
+    with self._lock:
+      self._refill_locked(time.monotonic())
+      waits = []
+      if self.requests_per_minute and self._request_balance < 1:
+        waits.append((1 - self._request_balance) * 60.0 / self.requests_per_minute)
+      if self.tokens_per_minute and self._token_balance < 0:
+        waits.append(-self._token_balance * 60.0 / self.tokens_per_minute)
+      if waits:
+        wait = max(MIN_WAIT_SECONDS, max(waits))
+        self.waited_seconds += wait
+        return None, wait
+
+      estimated = int(estimate_prompt_tokens(request_params) * self._prompt_scale + self._completion_estimate)
+      if self.requests_per_minute:
+        self._request_balance -= 1
+      if self.tokens_per_minute:
+        # The balance may go negative; later callers wait until it has refilled.
+        self._token_balance -= estimated
+      return Reservation(estimated_tokens=estimated), 0.0
+
+  def acquire(self, request_params: Dict[str, Any]) -> Reservation:
+    while True:
+      reservation, wait = self._try_admit(request_params)
+      if reservation is not None:
+        return reservation
+      time.sleep(wait)
+
+  async def acquire_async(self, request_params: Dict[str, Any]) -> Reservation:
+    while True:
+      reservation, wait = self._try_admit(request_params)
+      if reservation is not None:
+        return reservation
+      await asyncio.sleep(wait)
+
+  def settle(self, reservation: Reservation, request_params: Dict[str, Any], usage: Any) -> None:
+    """Replace the estimated token charge with the actual ``usage`` reported by the API.
+
+    Failed attempts (``usage`` of ``None``) are refunded their token estimate but keep
+    the request charge, since rejected requests still count against RPM quotas.
+    """
+
+    actual = usage_tokens(usage, "total_tokens")
+    prompt_tokens = usage_tokens(usage, "prompt_tokens")
+    with self._lock:
+      if actual is None:
+        delta = -reservation.estimated_tokens
+      else:
+        delta = actual - reservation.estimated_tokens
+        if prompt_tokens is not None:
+          observed_scale = prompt_tokens / estimate_prompt_tokens(request_params)
+          self._prompt_scale += USAGE_EMA_WEIGHT * (observed_scale - self._prompt_scale)
+          completion_tokens = max(0, actual - prompt_tokens)
+          self._completion_estimate += USAGE_EMA_WEIGHT * (completion_tokens - self._completion_estimate)
+      if self.tokens_per_minute:
+        self._refill_locked(time.monotonic())
+        self._token_balance = min(float(self.tokens_per_minute), self._token_balance - delta)
+
+  def summary_line(self) -> str:
+    return (
+      f"Rate limiter ({self.requests_per_minute or 'unlimited'} RPM, "
+      f"{self.tokens_per_minute or 'unlimited'} TPM): callers waited {self.waited_seconds:.1f}s in total; "
+      f"completion estimate settled at {int(self._completion_estimate)} tokens"
+    )
@@ -0,0 +1,131 @@
+"""Content-addressed SQLite cache for model responses.
+
+Entries are keyed by a SHA-256 of the full request body (model, temperature,
+reasoning effort, system prompt, CSV row payload and response schema), so a cached
+response is only reused when every input that shaped it is unchanged. Values are the
+parsed JSON returned by the model *before* normalisation, which lets a normaliser
+change be re-applied to a whole corpus without any API calls.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict
+
+CACHE_MODES = ("read-write", "read-only", "off")
+DEFAULT_CACHE_MAX_MB = 2048
+EVICTION_BATCH = 256
+
+
+def request_cache_key(request_params: Dict[str, Any]) -> str:
+  canonical = json.dumps(request_params, sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+  return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+  """Size-bounded LRU cache of model responses backed by a single SQLite file."""
+
+  def __init__(self, path: Path, *, mode: str = "read-write", max_bytes: int = DEFAULT_CACHE_MAX_MB * 1024 * 1024):
+    if mode not in CACHE_MODES or mode == "off":
+      raise ValueError(f"Unsupported cache mode for ResponseCache: {mode}")
+
+    self.path = path
+    self.read_only = mode == "read-only"
+    self.max_bytes = max(0, max_bytes)
+    self.hits = 0
+    self.misses = 0
+    self.writes = 0
+    self.evictions = 0
+    self._lock = threading.Lock()
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    # Shard processes (--shard i/N) share this file, so wait on their write locks.
+    self._conn = sqlite3.connect(str(path), check_same_thread=False, isolation_level=None, timeout=30.0)
+    self._conn.execute("PRAGMA journal_mode=WAL")
+    self._conn.execute("PRAGMA synchronous=NORMAL")
+    self._conn.execute(
+      """
+      CREATE TABLE IF NOT EXISTS responses (
+        key TEXT PRIMARY KEY,
+        value TEXT NOT NULL,
+        size INTEGER NOT NULL,
+        created_at REAL NOT NULL,
+        last_used REAL NOT NULL
+      )
+      """
+    )
+    self._conn.execute("CREATE INDEX IF NOT EXISTS responses_last_used ON responses (last_used)")
+    (total,) = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()
+    self._total_bytes = int(total)
+
+  def get(self, key: str) -> Dict[str, Any] | None:
+    with self._lock:
+      row = self._conn.execute("SELECT value FROM responses WHERE key = ?", (key,)).fetchone()
+      if row is None:
+        self.misses += 1
+        return None
+      self.hits += 1
+      if not self.read_only:
+        self._conn.execute("UPDATE responses SET last_used = ? WHERE key = ?", (time.time(), key))
+    return json.loads(row[0])
+
+  def put(self, key: str, value: Dict[str, Any]) -> None:
+    if self.read_only:
+      return
+
+    encoded = json.dumps(value, ensure_ascii=False)
+    size = len(encoded.encode("utf-8"))
+    now = time.time()
+    with self._lock:
+      previous = self._conn.execute("SELECT size FROM responses WHERE key = ?", (key,)).fetchone()
+      self._conn.execute(
+        "INSERT OR REPLACE INTO responses (key, value, size, created_at, last_used) VALUES (?, ?, ?, ?, ?)",
+        (key, encoded, size, now, now),
+      )
+      self._total_bytes += size - (previous[0] if previous else 0)
+      self.writes += 1
+      self._evict_locked()
+
+  def _evict_locked(self) -> None:
+    if not self.max_bytes:
+      return
+    while self._total_bytes > self.max_bytes:
+      victims = self._conn.execute(
+        "SELECT key, size FROM responses ORDER BY last_used ASC LIMIT ?",
+        (EVICTION_BATCH,),
+      ).fetchall()
+      if not victims:
+        self._total_bytes = 0
+        return
+      for key, size in victims:
+        if self._total_bytes <= self.max_bytes:
+          break
+        self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+        self._total_bytes -= size
+        self.evictions += 1
+
+  def stats_line(self) -> str:
+    lookups = self.hits + self.misses
+    hit_rate = (self.hits / lookups * 100) if lookups else 0.0
+    return (
+      f"Response cache ({self.path}): {self.hits} hits, {self.misses} misses "
+      f"({hit_rate:.1f}% hit rate), {self.writes} writes, {self.evictions} evictions, "
+      f"{self._total_bytes / (1024 * 1024):.1f} MB stored"
+    )
+
+  def close(self) -> None:
+    with self._lock:
+      self._conn.close()
+
+
+def open_response_cache(path: Path, mode: str, max_mb: int) -> ResponseCache | None:
+  if mode == "off":
+    return None
+  if mode == "read-only" and not path.exists():
+    return None
+  return ResponseCache(path, mode=mode, max_bytes=max_mb * 1024 * 1024)
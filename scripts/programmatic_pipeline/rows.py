@@ -0,0 +1,68 @@
+"""Stream page definitions from the input CSV.
+
+Every row needs a ``slug`` and a ``target_keyword``; every other column becomes
+prompt context. Each content type subclasses ``CsvRow`` to set the section its
+pages live under (``/flashcards``, ``/mind-maps``), which gives a row its default
+path.
+"""
+
+from __future__ import annotations
+
+import csv
+import json
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, ClassVar, Iterator, Mapping, TypeVar
+
+DEFAULT_BASE_URL = "https://www.cogniguide.app"
+
+RowT = TypeVar("RowT", bound="CsvRow")
+
+
+@dataclass
+class CsvRow:
+  slug: str
+  data: Mapping[str, str]
+
+  section_path: ClassVar[str] = ""
+
+  @property
+  def path(self) -> str:
+    return self.data.get("path") or f"{self.section_path}/{self.slug}"
+
+  @property
+  def base_url(self) -> str:
+    return self.data.get("base_url") or DEFAULT_BASE_URL
+
+  def prompt_payload(self) -> str:
+    payload = {
+      "slug": self.slug,
+      "base_url": self.base_url,
+      "context": {k: v for k, v in self.data.items() if k not in {"slug", "path", "base_url"}},
+    }
+    return json.dumps(payload, ensure_ascii=False, indent=2)
+
+
+def iter_csv_rows(path: Path, row_type: Callable[..., RowT] = CsvRow) -> Iterator[RowT]:
+  """Yield rows one at a time so long CSVs never have to be held in memory."""
+
+  with path.open(newline="", encoding="utf-8") as handle:
+    reader = csv.DictReader(handle)
+    if "slug" not in reader.fieldnames:
+      raise ValueError("Input CSV must include a 'slug' column")
+    if "target_keyword" not in reader.fieldnames:
+      raise ValueError("Input CSV must include a 'target_keyword' column")
+
+    for idx, raw in enumerate(reader):
+      slug = (raw.get("slug") or "").strip()
+      if not slug:
+        raise ValueError(f"Row {idx + 2} is missing a slug")
+      if not (raw.get("target_keyword") or "").strip():
+        raise ValueError(f"Row {idx + 2} is missing a target_keyword")
+      overflow = raw.pop(None, None)
+      if overflow:
+        # A row with more fields than the header (an unquoted comma in the last
+        # column) lands under the key None; join the spill-over back into that column.
+        last_column = reader.fieldnames[-1]
+        raw[last_column] = ",".join([raw.get(last_column) or "", *overflow])
+      yield row_type(slug=slug, data={k: str(v or '').strip() for k, v in raw.items()})
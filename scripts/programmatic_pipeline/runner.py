@@ -0,0 +1,1188 @@
+"""Command line and main loop shared by every programmatic page generator.
+
+``generate_programmatic_flashcards.py`` and ``generate_programmatic_mindmaps.py``
+each register one ``ContentType`` and call ``main`` with it.
+``generate_programmatic_pages.py`` calls it with every registered type
+(``combined=True``): each CSV row then becomes one work item per content type in a
+single queue, drained by one engine that shares the rate limiter, adaptive
+concurrency limit, HTTP pool, response cache, budget and hedging. Packed requests
+never mix content types, since each type has its own prompt and schema.
+
+Every run goes through the same loop whatever the number of content types, so
+sharding, ``--sections``, packing, batch mode, ``--regenerate-stale``, the budget,
+hedging and the dead-letter retry pass work the same way in the single-content
+scripts and in the combined one. Combined runs prefix slugs with the content type
+in messages, telemetry and batch keys (``flashcards:<slug>``).
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+import time
+from dataclasses import replace
+from itertools import islice
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Sequence, Tuple
+
+from openai import DEFAULT_MAX_RETRIES, AsyncOpenAI, OpenAI
+
+from programmatic_pipeline.batch import (
+  DEFAULT_POLL_INTERVAL,
+  DEFAULT_REQUESTS_PER_FILE,
+  batch_dir_for,
+  run_batch,
+)
+from programmatic_pipeline.completions import (
+  DEFAULT_BASE_URL,
+  RequestControls,
+  call_with_cache,
+  call_with_cache_async,
+  call_with_retries,
+  call_with_retries_async,
+  complete_json,
+  complete_json_async,
+  response_model,
+)
+from programmatic_pipeline.concurrency import AdaptiveConcurrencyLimiter
+from programmatic_pipeline.content import ContentOutput, ContentType, WorkItem
+from programmatic_pipeline.dead_letter import raw_response_for
+from programmatic_pipeline.engine import ENGINES, GracefulInterrupt, run_async, run_threaded
+from programmatic_pipeline.hedging import DEFAULT_MAX_HEDGES, Hedger
+from programmatic_pipeline.packing import pack_rows, split_packed_response
+from programmatic_pipeline.page_index import PageIndexWriter
+from programmatic_pipeline.prompt_cache import DEFAULT_PROMPT_CACHE_TTL, PromptPrefixCache, gemini_api_root
+from programmatic_pipeline.rate_limit import TokenBucketRateLimiter, estimate_prompt_tokens
+from programmatic_pipeline.response_cache import CACHE_MODES, DEFAULT_CACHE_MAX_MB, open_response_cache
+from programmatic_pipeline.rows import CsvRow, iter_csv_rows
+from programmatic_pipeline.scheduling import (
+  DEFAULT_CACHED_INPUT_PRICE,
+  DEFAULT_INPUT_PRICE,
+  DEFAULT_OUTPUT_PRICE,
+  RunBudget,
+  TokenPrices,
+  order_by_priority,
+  row_priority,
+)
+from programmatic_pipeline.sections import parse_sections
+from programmatic_pipeline.serializer import OUTPUT_FORMATS
+from programmatic_pipeline.sharding import (
+  ShardConflictError,
+  merge_shard_outputs,
+  parse_shard,
+  remove_shard_outputs,
+)
+from programmatic_pipeline.streaming import StreamStats
+from programmatic_pipeline.telemetry import ProgressReporter, Telemetry, label_request
+from programmatic_pipeline.transport import (
+  DEFAULT_CONNECT_TIMEOUT,
+  DEFAULT_KEEPALIVE_EXPIRY,
+  DEFAULT_READ_TIMEOUT,
+  HttpTransport,
+)
+from programmatic_pipeline.usage import UsageTotals
+
+DEFAULT_MODEL = "gemini-flash-lite-latest"
+DEFAULT_TEMPERATURE = 1.0
+DEFAULT_CONCURRENCY = 15
+DEFAULT_COMBINED_CONCURRENCY = 20
+REPO_ROOT = Path(__file__).resolve().parents[2]
+DEFAULT_CACHE_PATH = REPO_ROOT / ".cache" / "programmatic_responses.sqlite3"
+
+OUTPUT_FORMAT_HELP = (
+  "literal writes the pages as an object literal; json writes JSON.parse('[...]'), which loads faster in JS "
+  "engines and type-checks cheaply. auto keeps the format of the existing output (literal for a new file)."
+)
+
+Target = Tuple[ContentType, Path]
+
+# Options a content type may default differently (mind maps default to a stricter
+# rate limit). A combined run resolves them per content type unless they are given
+# on the command line; other ContentType.defaults must agree across the run.
+PER_CONTENT_OPTIONS = ("max_requests_per_minute", "max_tokens_per_minute")
+
+
+def openai_client(api_key: str, base_url: str, http_client: Any) -> OpenAI:
+  """Client for the request engines, with the SDK's own retries turned off.
+
+  ``call_with_retries`` owns retries and backoff. SDK retries would absorb 429s, 5xx
+  and timeouts before the adaptive concurrency limit and telemetry see them.
+  """
+
+  return OpenAI(api_key=api_key, base_url=base_url, http_client=http_client, max_retries=0)
+
+
+def async_openai_client(api_key: str, base_url: str, http_client: Any) -> AsyncOpenAI:
+  return AsyncOpenAI(api_key=api_key, base_url=base_url, http_client=http_client, max_retries=0)
+
+
+def _nouns(contents: Sequence[ContentType]) -> str:
+  return " and ".join(content.noun for content in contents)
+
+
+def _per_content_help(contents: Sequence[ContentType], key: str, *, combined: bool) -> str:
+  overrides = [f"{content.noun}s {content.defaults[key]}" for content in contents if key in content.defaults]
+  if not combined or not overrides:
+    return ""
+  return f" Unless given, content types with their own default keep it ({', '.join(overrides)})."
+
+
+def add_output_arguments(
+  parser: argparse.ArgumentParser,
+  contents: Sequence[ContentType],
+  *,
+  combined: bool,
+  help: str,
+) -> None:
+  """``--output`` for a single content type; ``--content`` plus ``--<name>-output`` for a combined run."""
+
+  if not combined:
+    parser.add_argument("--output", default=contents[0].default_output, help=help)
+    return
+  parser.add_argument(
+    "--content",
+    default=",".join(content.name for content in contents),
+    help=f"Comma-separated content types to generate for every row ({', '.join(content.name for content in contents)}).",
+  )
+  for content in contents:
+    parser.add_argument(
+      f"--{content.name}-output",
+      default=content.default_output,
+      help=f"{help} for {content.noun} pages",
+    )
+
+
+def parse_content(value: str, contents: Sequence[ContentType]) -> List[ContentType]:
+  by_name = {content.name: content for content in contents}
+  names = [name.strip() for name in value.split(",") if name.strip()]
+  unknown = [name for name in names if name not in by_name]
+  if unknown or not names:
+    raise ValueError(f"--content expects a comma-separated subset of {', '.join(by_name)}, got {value!r}")
+  return [by_name[name] for name in dict.fromkeys(names)]
+
+
+def selected_targets(args: argparse.Namespace, contents: Sequence[ContentType], *, combined: bool) -> List[Target]:
+  """The content types this invocation works on, with their output paths."""
+
+  if not combined:
+    return [(contents[0], Path(args.output))]
+  targets = [
+    (content, Path(getattr(args, f"{content.name}_output"))) for content in parse_content(args.content, contents)
+  ]
+  if len({path.resolve() for _, path in targets}) != len(targets):
+    raise ValueError("Each content type needs its own output file")
+  return targets
+
+
+def parse_args(
+  contents: Sequence[ContentType],
+  argv: Iterable[str] | None = None,
+  *,
+  combined: bool = False,
+) -> argparse.Namespace:
+  parser = argparse.ArgumentParser(
+    description=f"Generate programmatic {_nouns(contents)} pages" + (" in one run" if combined else "")
+  )
+  parser.add_argument("--input", required=True, help="Path to the CSV containing page definitions")
+  add_output_arguments(parser, contents, combined=combined, help="Destination TypeScript file to overwrite")
+  parser.add_argument(
+    "--shard",
+    help="Only generate rows whose slug hashes to shard i of N (for example 2/8) and write them to <output stem>.shard-i-of-N.ts; combine shards with the merge subcommand.",
+  )
+  parser.add_argument(
+    "--output-format",
+    choices=("auto", *OUTPUT_FORMATS),
+    default="auto",
+    help=OUTPUT_FORMAT_HELP,
+  )
+  parser.add_argument(
+    "--no-page-index",
+    dest="page_index",
+    action="store_false",
+    help=(
+      "Do not write <output stem>Index.ts, the slim per-page index (slug, path, titles, anchor text and "
+      "taxonomy hub/subhub) that sitemaps and hub listings import instead of the full pages"
+    ),
+  )
+  parser.add_argument(
+    "--model",
+    default=DEFAULT_MODEL,
+    help="OpenAI model name (Gemini-compatible models supported via the OpenAI SDK)",
+  )
+  parser.add_argument(
+    "--temperature",
+    type=float,
+    default=DEFAULT_TEMPERATURE,
+    help="Sampling temperature for creative variation",
+  )
+  parser.add_argument(
+    "--max-api-calls",
+    type=int,
+    default=500,
+    help="Optional maximum number of Gemini API calls to make, counted over all content types (for testing)",
+  )
+  parser.add_argument(
+    "--concurrency",
+    type=int,
+    default=DEFAULT_COMBINED_CONCURRENCY if combined else DEFAULT_CONCURRENCY,
+    help="Maximum number of concurrent Gemini API requests to make",
+  )
+  parser.add_argument(
+    "--max-requests-per-minute",
+    "--max-api-calls-per-minute",
+    dest="max_requests_per_minute",
+    type=int,
+    default=0,
+    help="Token-bucket limit on Gemini requests per minute (0 to disable)."
+    + _per_content_help(contents, "max_requests_per_minute", combined=combined),
+  )
+  parser.add_argument(
+    "--max-tokens-per-minute",
+    type=int,
+    default=0,
+    help=(
+      "Token-bucket limit on Gemini tokens per minute, pre-estimated per request and corrected from response usage "
+      "(0 to disable)." + _per_content_help(contents, "max_tokens_per_minute", combined=combined)
+    ),
+  )
+  parser.add_argument(
+    "--adaptive-concurrency",
+    action=argparse.BooleanOptionalAction,
+    default=True,
+    help="Share one AIMD in-flight limit across workers: halve it on 429/5xx responses and grow it back on success, never exceeding --concurrency.",
+  )
+  parser.add_argument(
+    "--min-concurrency",
+    type=int,
+    default=1,
+    help="Lower bound for the adaptive in-flight limit.",
+  )
+  parser.add_argument(
+    "--base-url",
+    default=DEFAULT_BASE_URL,
+    help="OpenAI-compatible API base URL (point this at a local stand-in for offline testing).",
+  )
+  parser.add_argument(
+    "--mode",
+    choices=["sync", "batch"],
+    default="sync",
+    help="sync sends one chat completion per row; batch submits all pending rows as offline batch jobs and polls for results.",
+  )
+  parser.add_argument(
+    "--batch-requests-per-file",
+    type=int,
+    default=DEFAULT_REQUESTS_PER_FILE,
+    help="Maximum number of requests per batch input file/job in --mode batch.",
+  )
+  parser.add_argument(
+    "--batch-poll-interval",
+    type=float,
+    default=DEFAULT_POLL_INTERVAL,
+    help="Seconds between batch status checks in --mode batch.",
+  )
+  parser.add_argument(
+    "--prompt-cache",
+    action=argparse.BooleanOptionalAction,
+    default=False,
+    help="Store each content type's static system prompt as a Gemini cachedContents entry once per run and reference it from its requests.",
+  )
+  parser.add_argument(
+    "--prompt-cache-ttl",
+    type=int,
+    default=DEFAULT_PROMPT_CACHE_TTL,
+    help="TTL in seconds for the prompt cache entry; it is extended before it expires.",
+  )
+  parser.add_argument(
+    "--stream",
+    action=argparse.BooleanOptionalAction,
+    default=False,
+    help="Stream responses, validate the JSON against the schema as it arrives, and abort and retry as soon as it drifts.",
+  )
+  parser.add_argument(
+    "--telemetry-path",
+    help="Append one JSONL record per model request attempt (slug, attempt, latency, waits, tokens, outcome) to this file.",
+  )
+  parser.add_argument(
+    "--progress",
+    action=argparse.BooleanOptionalAction,
+    default=True,
+    help="Show a live progress line with throughput and ETA on stderr.",
+  )
+  sections = dict.fromkeys(name for content in contents for name in content.regenerable_sections)
+  parser.add_argument(
+    "--sections",
+    help=(
+      "Comma-separated top-level sections to regenerate for pages already in the output "
+      f"({', '.join(sections)}). Sends a trimmed prompt and schema and merges the result."
+    ),
+  )
+  parser.add_argument(
+    "--pack-size",
+    type=int,
+    default=1,
+    help="Rows packed into one model request (sync mode). Missing or invalid pages are retried one row at a time. Keep K pages within the model's output token limit.",
+  )
+  parser.add_argument(
+    "--engine",
+    choices=ENGINES,
+    default="threads",
+    help="Request fan-out engine: a thread per in-flight request, or a single asyncio event loop (scales to hundreds of concurrent requests).",
+  )
+  parser.add_argument(
+    "--cache-mode",
+    choices=CACHE_MODES,
+    default="read-write",
+    help="Response cache behaviour: reuse and store responses, only reuse them, or bypass the cache entirely.",
+  )
+  parser.add_argument(
+    "--cache-path",
+    default=str(DEFAULT_CACHE_PATH),
+    help="SQLite file that stores cached model responses (shared by every generator).",
+  )
+  parser.add_argument(
+    "--cache-max-mb",
+    type=int,
+    default=DEFAULT_CACHE_MAX_MB,
+    help="Evict least recently used cached responses once the cache exceeds this size (0 for unbounded).",
+  )
+  parser.add_argument(
+    "--checkpoint-every",
+    type=int,
+    default=100,
+    help="Compact the checkpoint journal into the output file after this many new pages (0 to disable).",
+  )
+  parser.add_argument(
+    "--checkpoint-interval",
+    type=float,
+    default=60.0,
+    help="Also compact the checkpoint journal when this many seconds have passed since the last write (0 to disable).",
+  )
+  parser.add_argument(
+    "--rerun-existing",
+    action="store_true",
+    help="Regenerate rows whose slugs already exist in the output file",
+  )
+  parser.add_argument(
+    "--regenerate-stale",
+    action="store_true",
+    help="Regenerate existing pages whose input fingerprint (CSV row, prompt template, model, schema) no longer matches the manifest next to the output file.",
+  )
+  parser.add_argument(
+    "--record-fingerprints",
+    action="store_true",
+    help="Record current input fingerprints for pages already in the output without calling the model (adopts the manifest for pages generated before it existed).",
+  )
+  parser.add_argument(
+    "--api-key",
+    default=None,
+    help="Explicit Gemini API key. Falls back to the GEMINI_API_KEY env var if omitted.",
+  )
+  parser.add_argument(
+    "--reasoning-effort",
+    choices=["low", "medium", "high", "none"],
+    default="low",
+    help="Reasoning effort for Gemini 2.5 models: low (1,024 tokens), medium (8,192 tokens), high (24,576 tokens), or none (disable thinking).",
+  )
+  parser.add_argument(
+    "--priority-column",
+    help="Numeric CSV column (e.g. search_volume) used to send pending rows highest first; --max-api-calls then keeps the top rows instead of the first ones.",
+  )
+  parser.add_argument(
+    "--token-budget",
+    type=int,
+    default=0,
+    help="Stop dispatching new rows once actual plus predicted token usage (prompt, output and thinking, retries included) would exceed this (0 to disable).",
+  )
+  parser.add_argument(
+    "--cost-budget",
+    type=float,
+    default=0.0,
+    help="Stop dispatching new rows once actual plus predicted spend in USD would exceed this (0 to disable).",
+  )
+  parser.add_argument(
+    "--input-price",
+    type=float,
+    default=DEFAULT_INPUT_PRICE,
+    help="USD per million uncached input tokens, for --cost-budget (default: Gemini 2.5 Flash-Lite).",
+  )
+  parser.add_argument(
+    "--cached-input-price",
+    type=float,
+    default=DEFAULT_CACHED_INPUT_PRICE,
+    help="USD per million cached input tokens, for --cost-budget.",
+  )
+  parser.add_argument(
+    "--output-price",
+    type=float,
+    default=DEFAULT_OUTPUT_PRICE,
+    help="USD per million output and thinking tokens, for --cost-budget.",
+  )
+  parser.add_argument(
+    "--retry-concurrency",
+    type=int,
+    default=None,
+    help="Concurrency of the final pass that retries rows from the dead-letter queue (default: a quarter of --concurrency; 0 disables the pass).",
+  )
+  parser.add_argument(
+    "--retry-reasoning-effort",
+    choices=["low", "medium", "high", "none"],
+    default=None,
+    help="Reasoning effort for the final retry pass (default: same as --reasoning-effort).",
+  )
+  parser.add_argument(
+    "--hedge",
+    action=argparse.BooleanOptionalAction,
+    default=False,
+    help="Send a duplicate of any request still running after the observed p95 latency; the first valid response wins.",
+  )
+  parser.add_argument(
+    "--hedge-model",
+    default=None,
+    help="Cheaper or faster fallback model for hedged duplicates (default: the same --model).",
+  )
+  parser.add_argument(
+    "--max-hedges",
+    type=int,
+    default=DEFAULT_MAX_HEDGES,
+    help=f"Maximum number of hedged duplicates per run (default: {DEFAULT_MAX_HEDGES}).",
+  )
+  parser.add_argument(
+    "--http-pool-size",
+    type=int,
+    default=None,
+    help="Maximum open HTTP connections (default: twice --concurrency).",
+  )
+  parser.add_argument(
+    "--http2",
+    action=argparse.BooleanOptionalAction,
+    default=None,
+    help="Multiplex requests over HTTP/2 (default: on when the 'h2' package is installed).",
+  )
+  parser.add_argument(
+    "--keepalive-expiry",
+    type=float,
+    default=DEFAULT_KEEPALIVE_EXPIRY,
+    help=f"Seconds an idle connection is kept open for reuse (default: {DEFAULT_KEEPALIVE_EXPIRY:g}).",
+  )
+  parser.add_argument(
+    "--connect-timeout",
+    type=float,
+    default=DEFAULT_CONNECT_TIMEOUT,
+    help=f"Seconds allowed to open a connection (default: {DEFAULT_CONNECT_TIMEOUT:g}).",
+  )
+  parser.add_argument(
+    "--read-timeout",
+    type=float,
+    default=DEFAULT_READ_TIMEOUT,
+    help=f"Seconds allowed between bytes of a response (default: {DEFAULT_READ_TIMEOUT:g}).",
+  )
+  if not combined:
+    parser.set_defaults(**contents[0].defaults)
+    args = parser.parse_args(argv)
+    args.content_options = {contents[0].name: {key: getattr(args, key) for key in PER_CONTENT_OPTIONS}}
+    return args
+
+  for key in {key for content in contents for key in content.defaults if key not in PER_CONTENT_OPTIONS}:
+    values = {repr(content.defaults.get(key, parser.get_default(key))) for content in contents}
+    if len(values) > 1:
+      raise ValueError(f"Content types disagree on the default of --{key.replace('_', '-')}: {', '.join(sorted(values))}")
+    parser.set_defaults(**{key: contents[0].defaults.get(key, parser.get_default(key))})
+  shared_defaults = {key: parser.get_default(key) for key in PER_CONTENT_OPTIONS}
+  # None marks an option left to each content type's default.
+  parser.set_defaults(**{key: None for key in PER_CONTENT_OPTIONS})
+  args = parser.parse_args(argv)
+  args.content_options = {
+    content.name: {
+      key: getattr(args, key) if getattr(args, key) is not None else content.defaults.get(key, shared_defaults[key])
+      for key in PER_CONTENT_OPTIONS
+    }
+    for content in contents
+  }
+  for key in PER_CONTENT_OPTIONS:
+    if getattr(args, key) is None:
+      setattr(args, key, shared_defaults[key])
+  return args
+
+
+def parse_merge_args(
+  contents: Sequence[ContentType],
+  argv: Iterable[str],
+  *,
+  combined: bool = False,
+) -> argparse.Namespace:
+  parser = argparse.ArgumentParser(
+    prog=f"{Path(sys.argv[0]).name} merge",
+    description=f"Merge --shard outputs into the combined {_nouns(contents)} page file"
+    + ("s" if combined else ""),
+  )
+  if not combined:
+    parser.add_argument(
+      "shards",
+      nargs="*",
+      help="Shard output files to merge (default: every <output stem>.shard-i-of-N.ts next to --output)",
+    )
+  add_output_arguments(parser, contents, combined=combined, help="Combined TypeScript file to update")
+  parser.add_argument(
+    "--remove-shards",
+    action="store_true",
+    help="Delete the shard outputs, journals and manifests after a successful merge",
+  )
+  parser.add_argument(
+    "--output-format",
+    choices=("auto", *OUTPUT_FORMATS),
+    default="auto",
+    help=OUTPUT_FORMAT_HELP,
+  )
+  parser.add_argument(
+    "--no-page-index",
+    dest="page_index",
+    action="store_false",
+    help=(
+      "Do not write <output stem>Index.ts, the slim per-page index (slug, path, titles, anchor text and "
+      "taxonomy hub/subhub) that sitemaps and hub listings import instead of the full pages"
+    ),
+  )
+  return parser.parse_args(argv)
+
+
+def merge_main(contents: Sequence[ContentType], argv: Iterable[str], *, combined: bool = False) -> int:
+  args = parse_merge_args(contents, argv, combined=combined)
+  for content, output_path in selected_targets(args, contents, combined=combined):
+    output_mirrors = content.output.configure(
+      output_path,
+      output_format=args.output_format,
+      page_index=args.page_index,
+    )
+    try:
+      report = merge_shard_outputs(
+        output_path,
+        [Path(path) for path in getattr(args, "shards", [])],
+        load_pages=content.output.load_existing,
+        write_pages=content.output.write,
+      )
+    except ValueError as exc:
+      label = "Conflict" if isinstance(exc, ShardConflictError) else "Error"
+      print(f"{label}: {exc}", file=sys.stderr)
+      return 1
+
+    if report.missing_shards:
+      print(
+        "Warning: No output for shard(s) "
+        + ", ".join(str(index) for index in report.missing_shards)
+        + f"; their pages keep the version already in {output_path}.",
+        file=sys.stderr,
+      )
+    if args.remove_shards:
+      remove_shard_outputs(report.shards)
+    print(
+      f"Merged {len(report.shards)} shard(s) into {output_path}: "
+      f"{report.pages} pages ({report.added} added, {report.updated} updated)"
+    )
+    for mirror in output_mirrors:
+      print(mirror.summary_line())
+  return 0
+
+
+def parse_index_args(
+  contents: Sequence[ContentType],
+  argv: Iterable[str],
+  *,
+  combined: bool = False,
+) -> argparse.Namespace:
+  parser = argparse.ArgumentParser(
+    prog=f"{Path(sys.argv[0]).name} index",
+    description="Rebuild the page index module from the existing output and the current taxonomy",
+  )
+  add_output_arguments(parser, contents, combined=combined, help="Generated TypeScript file to index")
+  parser.add_argument(
+    "--output-format",
+    choices=("auto", *OUTPUT_FORMATS),
+    default="auto",
+    help="Format of the index module; auto follows the output file",
+  )
+  return parser.parse_args(argv)
+
+
+def index_main(contents: Sequence[ContentType], argv: Iterable[str], *, combined: bool = False) -> int:
+  args = parse_index_args(contents, argv, combined=combined)
+  for content, output_path in selected_targets(args, contents, combined=combined):
+    if not output_path.exists():
+      print(f"Error: {output_path} does not exist; run the generator first.", file=sys.stderr)
+      return 1
+    writer = content.output.index_writer(output_path, output_format=args.output_format)
+    writer.write(content.output.read(output_path), content.output.placements())
+    print(writer.summary_line())
+  return 0
+
+
+def parse_structured_data_args(
+  contents: Sequence[ContentType],
+  argv: Iterable[str],
+  *,
+  combined: bool = False,
+) -> argparse.Namespace:
+  parser = argparse.ArgumentParser(
+    prog=f"{Path(sys.argv[0]).name} structured-data",
+    description="Recompute the structuredData JSON-LD of every page in the output against the current taxonomy",
+  )
+  add_output_arguments(parser, contents, combined=combined, help="Generated TypeScript file to update")
+  parser.add_argument(
+    "--output-format",
+    choices=("auto", *OUTPUT_FORMATS),
+    default="auto",
+    help="Format to write the output in; auto keeps the existing file's format",
+  )
+  parser.add_argument(
+    "--no-page-index",
+    dest="page_index",
+    action="store_false",
+    help="Do not rewrite the page index next to the output",
+  )
+  return parser.parse_args(argv)
+
+
+def structured_data_main(contents: Sequence[ContentType], argv: Iterable[str], *, combined: bool = False) -> int:
+  args = parse_structured_data_args(contents, argv, combined=combined)
+  for content, output_path in selected_targets(args, contents, combined=combined):
+    if not output_path.exists():
+      print(f"Error: {output_path} does not exist; run the generator first.", file=sys.stderr)
+      return 1
+    output_mirrors = content.output.configure(output_path, output_format=args.output_format, page_index=args.page_index)
+    pages = content.output.read(output_path)
+    refreshed = content.output.refresh_structured_data(pages)
+    # Also rewrite on a format switch, and so the page index picks up taxonomy edits.
+    content.output.write(output_path, pages)
+    print(f"Recomputed structured data for {len(pages)} pages in {output_path}: {refreshed} changed")
+    for mirror in output_mirrors:
+      print(mirror.summary_line())
+  return 0
+
+
+def main(contents: Sequence[ContentType], argv: Iterable[str] | None = None, *, combined: bool = False) -> int:
+  """Entry point of a generator script over ``contents``; ``combined`` adds ``--content``."""
+
+  argv = list(sys.argv[1:] if argv is None else argv)
+  if argv[:1] == ["merge"]:
+    return merge_main(contents, argv[1:], combined=combined)
+  if argv[:1] == ["index"]:
+    return index_main(contents, argv[1:], combined=combined)
+  if argv[:1] == ["structured-data"]:
+    return structured_data_main(contents, argv[1:], combined=combined)
+
+  args = parse_args(contents, argv, combined=combined)
+  return run(args, selected_targets(args, contents, combined=combined), combined=combined)
+
+
+def run(args: argparse.Namespace, targets: Sequence[Target], *, combined: bool = False) -> int:
+  """Generate the pending pages of every target from one queue of work items."""
+
+  input_path = Path(args.input)
+  contents = [content for content, _ in targets]
+  shard = parse_shard(args.shard)
+  # The page index mirrors the combined output, which the merge subcommand writes.
+  output_mirrors: List[PageIndexWriter] = []
+  for content, output_path in targets:
+    output_mirrors.extend(
+      content.output.configure(
+        output_path,
+        output_format=args.output_format,
+          page_index=args.page_index and shard is None,
+      )
+    )
+
+  sections = parse_sections(
+    args.sections,
+    list(dict.fromkeys(name for content in contents for name in content.regenerable_sections)),
+  )
+  if sections and (args.regenerate_stale or args.rerun_existing):
+    raise ValueError("--sections cannot be combined with --regenerate-stale or --rerun-existing")
+  first_row = next(iter_csv_rows(input_path), None)
+  if first_row is None:
+    print("No rows found in input CSV", file=sys.stderr)
+    return 1
+  if args.priority_column and args.priority_column not in first_row.data:
+    raise ValueError(f"Input CSV has no '{args.priority_column}' column for --priority-column")
+
+  api_key = args.api_key or "GEMINI_API_KEY"  # Use placeholder as per custom instructions
+  http_transport = HttpTransport(
+    concurrency=args.concurrency,
+    pool_size=args.http_pool_size,
+    connect_timeout=args.connect_timeout,
+    read_timeout=args.read_timeout,
+    keepalive_expiry=args.keepalive_expiry,
+    http2=args.http2,
+  )
+  client = openai_client(api_key, args.base_url, http_transport.client())
+
+  def csv_rows() -> Iterator[CsvRow]:
+    for row in iter_csv_rows(input_path):
+      if shard is None or shard.owns(row.slug):
+        yield row
+
+  if shard is not None:
+    shard_rows = sum(1 for _ in csv_rows())
+  outputs: List[ContentOutput] = []
+  for content, output_path in targets:
+    output = ContentOutput(
+      content,
+      output_path,
+      model=args.model,
+      checkpoint_every=args.checkpoint_every,
+      checkpoint_interval=args.checkpoint_interval,
+      shard=shard,
+      qualified=combined,
+    )
+    if shard is not None:
+      print(f"Shard {shard.label}: {shard_rows} rows, writing to {output.path}")
+    outputs.append(output)
+  # A --sections run skips the content types that have none of the requested sections.
+  active_outputs = outputs
+  if sections:
+    for output in outputs:
+      output.sections = [name for name in sections if name in output.content.regenerable_sections]
+      if not output.sections:
+        print(f"Skipping {output.name}: it has none of the sections {', '.join(sections)}")
+    active_outputs = [output for output in outputs if output.sections]
+
+  concurrency_limiter = (
+    AdaptiveConcurrencyLimiter(args.concurrency, min_limit=args.min_concurrency)
+    if args.adaptive_concurrency
+    else None
+  )
+  prompt_caches: Dict[str, PromptPrefixCache] = {}
+  if args.prompt_cache:
+    api_root = gemini_api_root(args.base_url)
+    if api_root is None:
+      print(
+        f"Warning: --prompt-cache needs the Gemini endpoint, not {args.base_url}; sending the system prompt inline.",
+        file=sys.stderr,
+      )
+    else:
+      for content in contents:
+        prompt_caches[content.name] = PromptPrefixCache(
+          api_key,
+          args.model,
+          content.prompt_template,
+          ttl_seconds=args.prompt_cache_ttl,
+          api_root=api_root,
+        )
+  usage_totals = UsageTotals()
+  telemetry = Telemetry(Path(args.telemetry_path) if args.telemetry_path else None)
+  stream_stats = StreamStats() if args.stream else None
+  prompt_estimates = [
+    estimate_prompt_tokens(
+      content.build_request(args.model, args.temperature, first_row.prompt_payload(), args.reasoning_effort)
+    )
+    for content in contents
+  ]
+  budget = RunBudget(
+    max_tokens=args.token_budget,
+    max_cost=args.cost_budget,
+    prices=TokenPrices(args.input_price, args.cached_input_price, args.output_price),
+    prompt_estimate=sum(prompt_estimates) // len(prompt_estimates),
+  )
+  hedger = Hedger(max_hedges=args.max_hedges, model=args.hedge_model, workers=args.concurrency) if args.hedge else None
+  if hedger is not None and args.mode == "batch":
+    print("Warning: --hedge has no effect with --mode batch; batch jobs are not latency bound.", file=sys.stderr)
+  # Content types with the same limits share one rate limiter; in a combined run
+  # mind maps keep their stricter default unless --max-requests-per-minute is given.
+  rate_limiters: Dict[Tuple[int, int], TokenBucketRateLimiter] = {}
+  rate_limiter_for: Dict[str, TokenBucketRateLimiter] = {}
+  for content, _ in targets:
+    options = args.content_options[content.name]
+    limits = (options["max_requests_per_minute"], options["max_tokens_per_minute"])
+    if limits not in rate_limiters:
+      rate_limiters[limits] = TokenBucketRateLimiter(*limits)
+    rate_limiter_for[content.name] = rate_limiters[limits]
+  shared_controls = RequestControls(
+    concurrency_limiter=concurrency_limiter,
+    usage_totals=usage_totals,
+    stream=args.stream,
+    stream_stats=stream_stats,
+    telemetry=telemetry,
+    budget=budget if budget.enabled else None,
+    hedger=hedger,
+  )
+  # The concurrency limit and accounting are shared; the cached system prompt, and
+  # the rate limiter when limits differ, are per content type.
+  controls = {
+    content.name: replace(
+      shared_controls,
+      rate_limiter=rate_limiter_for[content.name],
+      prompt_cache=prompt_caches.get(content.name),
+    )
+    for content, _ in targets
+  }
+  cache = open_response_cache(Path(args.cache_path), args.cache_mode, args.cache_max_mb)
+  # Rebound for the final retry pass; the request closures below read them per call.
+  reasoning_effort = args.reasoning_effort
+  retry_pass = 0
+  unit = "work items" if combined else "rows"
+
+  if args.record_fingerprints:
+    for output in outputs:
+      recorded = 0
+      for row in csv_rows():
+        if row.slug in output.slug_to_index:
+          output.record_fingerprint(output.content.make_row(row.slug, row.data))
+          recorded += 1
+      output.manifest.save()
+      print(f"Recorded input fingerprints for {recorded} existing {output.prefix}pages in {output.manifest.path}")
+    return 0
+
+  def pending_items(announce: bool = False) -> Iterator[WorkItem]:
+    """Stream the work items this run should send, re-reading the CSV on every call."""
+
+    if args.priority_column:
+      yield from order_by_priority(
+        eligible_items(announce),
+        lambda item: row_priority(item.row.data, args.priority_column, label=item.label),
+        args.max_api_calls,
+      )
+    elif args.max_api_calls is not None:
+      yield from islice(eligible_items(announce), max(0, args.max_api_calls))
+    else:
+      yield from eligible_items(announce)
+
+  def eligible_items(announce: bool) -> Iterator[WorkItem]:
+    for row in csv_rows():
+      for output in active_outputs:
+        content_row = output.content.make_row(row.slug, row.data)
+        if output.wants(
+          content_row,
+          rerun_existing=args.rerun_existing,
+          regenerate_stale=args.regenerate_stale,
+          announce=announce,
+        ):
+          yield WorkItem(output, content_row)
+
+  # Counting pass: validates the whole CSV up front and sizes the progress line
+  # without keeping the rows around.
+  pending_counts = {output.name: 0 for output in outputs}
+  stale_counts = {output.name: 0 for output in outputs}
+  for item in pending_items(announce=True):
+    pending_counts[item.output.name] += 1
+    stale_counts[item.output.name] += item.row.slug in item.output.slug_to_index
+  pending_total = sum(pending_counts.values())
+  if combined:
+    for output in outputs:
+      print(
+        f"{output.name}: {pending_counts[output.name]} pending "
+        f"({stale_counts[output.name]} existing pages to regenerate), "
+        f"{len(output.slug_to_index)} pages in {output.path}"
+      )
+  elif args.regenerate_stale:
+    output = outputs[0]
+    print(
+      f"Fingerprint check: {stale_counts[output.name]} stale of {len(output.slug_to_index)} existing pages; "
+      f"{pending_counts[output.name] - stale_counts[output.name]} new rows"
+    )
+
+  progress = ProgressReporter(pending_total, enabled=args.progress)
+  interrupt = GracefulInterrupt()
+
+  def request_for(item: WorkItem) -> Dict[str, Any]:
+    content = item.output.content
+    payload = item.row.prompt_payload()
+    if item.output.sections:
+      return content.build_section_request(args.model, args.temperature, payload, item.output.sections, reasoning_effort)
+    return content.build_request(args.model, args.temperature, payload, reasoning_effort)
+
+  # Labels whose response came from --hedge-model, and that model. Written by the
+  # request callables, read when their result is handled.
+  hedge_answers: Dict[str, str] = {}
+
+  def note_answer(label: str, request_params: Dict[str, Any]) -> None:
+    model = response_model(request_params)
+    if model and model != request_params.get("model"):
+      hedge_answers[label] = model
+
+  def generate(item: WorkItem) -> Dict[str, Any]:
+    label_request(item.label)
+    request_params = request_for(item)
+    payload = call_with_cache(
+      cache,
+      request_params,
+      lambda: call_with_retries(lambda: complete_json(client, request_params, controls[item.output.name])),
+      refresh=bool(retry_pass),
+    )
+    note_answer(item.label, request_params)
+    return payload
+
+  async def generate_async(async_client: AsyncOpenAI, item: WorkItem) -> Dict[str, Any]:
+    label_request(item.label)
+    request_params = request_for(item)
+    payload = await call_with_cache_async(
+      cache,
+      request_params,
+      lambda: call_with_retries_async(
+        lambda: complete_json_async(async_client, request_params, controls[item.output.name])
+      ),
+      refresh=bool(retry_pass),
+    )
+    note_answer(item.label, request_params)
+    return payload
+
+  def handle_result(item: WorkItem, payload: Dict[str, Any]) -> None:
+    output = item.output
+    try:
+      if output.sections:
+        existing = output.pages[output.slug_to_index[item.row.slug]]
+        page = output.content.merge_regenerated_sections(item.row, existing, payload, output.sections)
+      else:
+        page = output.content.normalise_page(item.row, payload)
+    except Exception as exc:  # noqa: BLE001
+      record_failure(item, exc, stage="normalise", raw_response=payload)
+      return
+    store_page(item, page, raw_response=payload, model=hedge_answers.pop(item.label, None))
+
+  def store_page(item: WorkItem, page: Dict[str, Any], *, raw_response: Any, model: str | None = None) -> None:
+    write_started = time.monotonic()
+    try:
+      # A --sections refresh leaves the rest of the page, and so its fingerprint, as it was.
+      item.output.store(item.row, page, record_fingerprint=not item.output.sections, model=model)
+    except Exception as exc:  # noqa: BLE001
+      # Fingerprinting, the journal append or a checkpoint write failed: dead-letter
+      # the row like a bad response instead of ending the run.
+      record_failure(item, exc, stage="store", raw_response=raw_response)
+      return
+    finally:
+      telemetry.add_write_time(time.monotonic() - write_started)
+    progress.advance()
+
+  def record_batch_usage(usage: Any) -> None:
+    usage_totals.record(usage)
+    if budget.enabled:
+      budget.record(usage)
+
+  def handle_error(item: WorkItem, exc: Exception) -> None:
+    hedge_answers.pop(item.label, None)
+    record_failure(item, exc, stage="request", raw_response=raw_response_for(exc))
+
+  def record_failure(item: WorkItem, exc: Exception, *, stage: str, raw_response: Any) -> None:
+    item.output.fail(item.row, exc, stage=stage, raw_response=raw_response, attempt_pass=retry_pass + 1)
+    progress.advance(failed=True)
+
+  fallback_items: List[WorkItem] = []
+
+  def packed_label(group: List[WorkItem]) -> str:
+    return f"{group[0].label} (+{len(group) - 1} packed)"
+
+  def packed_request(group: List[WorkItem]) -> Dict[str, Any]:
+    # pack_rows keys groups by content type, so one prompt and schema serve the whole group.
+    return group[0].output.content.build_packed_request(
+      args.model,
+      args.temperature,
+      [item.row.prompt_payload() for item in group],
+      reasoning_effort,
+    )
+
+  def generate_packed(group: List[WorkItem]) -> Dict[str, Any]:
+    label_request(packed_label(group), [item.label for item in group])
+    request_params = packed_request(group)
+    response = call_with_cache(
+      cache,
+      request_params,
+      lambda: call_with_retries(lambda: complete_json(client, request_params, controls[group[0].output.name])),
+    )
+    note_answer(packed_label(group), request_params)
+    return response
+
+  async def generate_packed_async(async_client: AsyncOpenAI, group: List[WorkItem]) -> Dict[str, Any]:
+    label_request(packed_label(group), [item.label for item in group])
+    request_params = packed_request(group)
+    response = await call_with_cache_async(
+      cache,
+      request_params,
+      lambda: call_with_retries_async(
+        lambda: complete_json_async(async_client, request_params, controls[group[0].output.name])
+      ),
+    )
+    note_answer(packed_label(group), request_params)
+    return response
+
+  def handle_packed_result(group: List[WorkItem], response: Dict[str, Any]) -> None:
+    content = group[0].output.content
+    model = hedge_answers.pop(packed_label(group), None)
+    packed = split_packed_response(response, [item.row.slug for item in group], content.schema)
+    for item in group:
+      page = packed.pages.get(item.row.slug)
+      if page is None:
+        reason = packed.rejected[item.row.slug]
+      else:
+        try:
+          normalised = content.normalise_page(item.row, page)
+        except Exception as exc:  # noqa: BLE001
+          reason = str(exc)
+        else:
+          store_page(item, normalised, raw_response=page, model=model)
+          continue
+      print(f"Retrying {item.output.prefix}slug '{item.row.slug}' individually: {reason}", file=sys.stderr)
+      fallback_items.append(item)
+
+  def handle_packed_error(group: List[WorkItem], exc: Exception) -> None:
+    hedge_answers.pop(packed_label(group), None)
+    print(
+      f"Packed request for {len(group)} rows failed ({exc}); retrying them individually",
+      file=sys.stderr,
+    )
+    fallback_items.extend(group)
+
+  def dispatch(
+    items: Iterable[Any],
+    generate_item: Any,
+    generate_item_async: Any,
+    on_result: Any,
+    on_error: Any,
+    concurrency: int | None = None,
+    rows_in: Any = None,
+  ) -> None:
+    concurrency = concurrency or args.concurrency
+    if budget.enabled:
+      items, on_result, on_error = budget.gate(items, on_result, on_error, rows_in=rows_in or (lambda item: 1))
+    if args.engine == "async":
+      async_client = async_openai_client(api_key, args.base_url, http_transport.async_client())
+      run_async(
+        items,
+        lambda item: generate_item_async(async_client, item),
+        on_result,
+        on_error,
+        concurrency=concurrency,
+        cleanup=async_client.close,
+        stop=interrupt.event,
+      )
+    else:
+      run_threaded(
+        items,
+        generate_item,
+        on_result,
+        on_error,
+        concurrency=concurrency,
+        stop=interrupt.event,
+      )
+
+  run_started = time.monotonic()
+  if pending_total:
+    if args.mode == "batch":
+      batch_items: Iterable[WorkItem] = pending_items()
+      on_batch_result, on_batch_error = handle_result, handle_error
+      if budget.enabled:
+        # Batch jobs are submitted up front, so rows are admitted on predicted spend alone.
+        batch_items, on_batch_result, on_batch_error = budget.gate(
+          batch_items,
+          on_batch_result,
+          on_batch_error,
+          defer=False,
+        )
+      run_batch(
+        # The batch file and job calls have no retry loop of their own.
+        client.with_options(max_retries=DEFAULT_MAX_RETRIES),
+        list(batch_items),
+        lambda item: item.label,
+        request_for,
+        on_batch_result,
+        on_batch_error,
+        work_dir=batch_dir_for(outputs[0].path),
+        requests_per_file=args.batch_requests_per_file,
+        poll_interval=args.batch_poll_interval,
+        cache=cache,
+        on_usage=record_batch_usage,
+      )
+    else:
+      with interrupt:
+        if args.pack_size > 1 and not sections:
+          dispatch(
+            pack_rows(pending_items(), args.pack_size, key=lambda item: item.output.name),
+            generate_packed,
+            generate_packed_async,
+            handle_packed_result,
+            handle_packed_error,
+            rows_in=len,
+          )
+          if fallback_items and not interrupt.requested:
+            print(f"Retrying {len(fallback_items)} {unit} individually after packed generation")
+            dispatch(fallback_items, generate, generate_async, handle_result, handle_error)
+        else:
+          dispatch(pending_items(), generate, generate_async, handle_result, handle_error)
+
+  failed_items = [WorkItem(output, row) for output in outputs for row in output.failed.values()]
+  retry_concurrency = args.retry_concurrency
+  if retry_concurrency is None:
+    retry_concurrency = max(1, args.concurrency // 4)
+  if failed_items and retry_concurrency > 0 and not interrupt.requested and not budget.exhausted:
+    progress.finish()
+    retry_pass = 1
+    reasoning_effort = args.retry_reasoning_effort or args.reasoning_effort
+    print(
+      f"Retrying {len(failed_items)} failed {unit} at concurrency {retry_concurrency} "
+      f"(reasoning effort {reasoning_effort})"
+    )
+    progress = ProgressReporter(len(failed_items), enabled=args.progress)
+    with interrupt:
+      dispatch(failed_items, generate, generate_async, handle_result, handle_error, concurrency=retry_concurrency)
+
+  progress.finish()
+  for output in outputs:
+    telemetry.add_write_time(output.finish())
+
+  generated = sum(output.generated for output in outputs)
+  failed = sum(len(output.failed) for output in outputs)
+  if concurrency_limiter is not None and concurrency_limiter.admitted:
+    print(concurrency_limiter.summary_line())
+  for rate_limiter in rate_limiters.values():
+    if rate_limiter.enabled and pending_total:
+      names = [name for name, limiter in rate_limiter_for.items() if limiter is rate_limiter]
+      print((f"{', '.join(names)}: " if len(rate_limiters) > 1 else "") + rate_limiter.summary_line())
+  if usage_totals.requests:
+    print(usage_totals.summary_line())
+  if http_transport.stats.requests:
+    print(http_transport.summary_line())
+  if stream_stats is not None and pending_total:
+    print(stream_stats.summary_line())
+  if budget.enabled and pending_total:
+    print(budget.summary_line())
+  if hedger is not None:
+    hedger.close()
+    if pending_total and args.mode != "batch":
+      print(hedger.summary_line())
+  for mirror in output_mirrors:
+    print(mirror.summary_line())
+  for line in telemetry.summary_lines(time.monotonic() - run_started, generated + failed):
+    print(line)
+  telemetry.close()
+  for prompt_cache in prompt_caches.values():
+    prompt_cache.close()
+  if cache is not None:
+    print(cache.stats_line())
+    cache.close()
+
+  if interrupt.requested:
+    print(
+      f"Interrupted: {generated} of {pending_total} {unit} finished and checkpointed to "
+      f"{', '.join(str(output.path) for output in outputs)} ({failed} failed). Rerun the same command to continue.",
+      file=sys.stderr,
+    )
+    return 130
+
+  if failed:
+    for output in outputs:
+      if output.failed:
+        print(
+          f"The following {output.prefix}slugs failed to generate: " + ", ".join(sorted(output.failed)),
+          file=sys.stderr,
+        )
+        print(f"Errors and raw responses are in {output.dead_letters.path}", file=sys.stderr)
+    return 1
+
+  if budget.exhausted:
+    print(
+      f"Budget reached after {generated} of {pending_total} {unit}; "
+      "rerun with a larger budget to generate the rest."
+    )
+
+  for output in outputs:
+    print(
+      f"Wrote {len(output.pages)} programmatic {output.content.noun} pages to {output.path}"
+      + (f" (regenerated {output.generated} rows)" if output.generated else "")
+    )
+  return 0
@@ -0,0 +1,209 @@
+"""Priority ordering of pending rows and a hard token/cost budget for a run.
+
+With ``--priority-column`` the pending rows are sent highest priority first (ties keep
+CSV order), and ``--max-api-calls N`` keeps the N most valuable rows instead of the
+first N. Only the N best rows are held while selecting (``heapq.nlargest``). Without a
+limit, the pending rows are sorted in memory.
+
+``RunBudget`` enforces ``--token-budget``/``--cost-budget``. Actual spend comes from
+the ``usage`` block of every request attempt, retries included. Before an item is
+dispatched, its spend is predicted per row: actual spend divided by the rows it
+covers (settled rows, or responses received when those run ahead), or a prompt-size
+heuristic before the first response. The item is only admitted if actual spend plus
+that prediction for every row still in flight and for the item itself fits the
+budget. In-flight rows are re-priced on every check, so a pessimistic first guess
+does not keep blocking the run. An item that only fits once in-flight rows settle is
+deferred: the admission iterator stops for now and the engines pull from it again as
+requests complete. An item that does not fit with nothing in flight ends dispatch
+cleanly, and requests already in flight finish and are checkpointed as usual.
+"""
+
+from __future__ import annotations
+
+import heapq
+import threading
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Mapping, Tuple, TypeVar
+
+from programmatic_pipeline.rate_limit import DEFAULT_COMPLETION_ESTIMATE, usage_tokens
+from programmatic_pipeline.usage import usage_breakdown
+
+ItemT = TypeVar("ItemT")
+
+# USD per million tokens for gemini-flash-lite-latest (Gemini 2.5 Flash-Lite list prices);
+# override with --input-price/--cached-input-price/--output-price for other models.
+DEFAULT_INPUT_PRICE = 0.10
+DEFAULT_CACHED_INPUT_PRICE = 0.025
+DEFAULT_OUTPUT_PRICE = 0.40
+
+
+def row_priority(data: Mapping[str, str], column: str, *, label: str) -> float:
+  """Parse the priority cell of one row; blank cells rank last."""
+
+  raw = (data.get(column) or "").replace(",", "").replace("_", "").strip()
+  if not raw:
+    return 0.0
+  try:
+    return float(raw)
+  except ValueError as exc:
+    raise ValueError(f"Row '{label}' has a non-numeric {column!r} priority: {raw!r}") from exc
+
+
+def order_by_priority(rows: Iterable[ItemT], priority: Callable[[ItemT], float], limit: int | None) -> List[ItemT]:
+  """Return ``rows`` highest priority first, keeping only the top ``limit`` when given."""
+
+  if limit is not None:
+    return heapq.nlargest(max(0, limit), rows, key=priority)
+  return sorted(rows, key=priority, reverse=True)
+
+
+@dataclass(frozen=True)
+class TokenPrices:
+  """USD per million tokens; thinking tokens are billed as output."""
+
+  input: float = DEFAULT_INPUT_PRICE
+  cached_input: float = DEFAULT_CACHED_INPUT_PRICE
+  output: float = DEFAULT_OUTPUT_PRICE
+
+  def cost(self, prompt_tokens: int, cached_tokens: int, output_tokens: int) -> float:
+    uncached = max(0, prompt_tokens - cached_tokens)
+    return (uncached * self.input + cached_tokens * self.cached_input + output_tokens * self.output) / 1_000_000
+
+
+class RunBudget:
+  """Thread-safe hard ceiling on the tokens and/or dollars a run may spend."""
+
+  def __init__(
+    self,
+    *,
+    max_tokens: int | None = None,
+    max_cost: float | None = None,
+    prices: TokenPrices | None = None,
+    prompt_estimate: int = 0,
+  ):
+    self.max_tokens = max_tokens if max_tokens and max_tokens > 0 else None
+    self.max_cost = max_cost if max_cost and max_cost > 0 else None
+    self.prices = prices or TokenPrices()
+    # Fallback per-row prediction until the first row settles.
+    self._initial_tokens = float(prompt_estimate + DEFAULT_COMPLETION_ESTIMATE)
+    self._initial_cost = self.prices.cost(prompt_estimate, 0, DEFAULT_COMPLETION_ESTIMATE)
+    self.spent_tokens = 0
+    self.spent_cost = 0.0
+    self.exhausted = False
+    self._in_flight_rows = 0
+    self._settled_rows = 0
+    self._responses = 0
+    self._lock = threading.Lock()
+
+  @property
+  def enabled(self) -> bool:
+    return self.max_tokens is not None or self.max_cost is not None
+
+  def record(self, usage: Any) -> None:
+    """Charge the actual usage of one request attempt."""
+
+    if usage is None:
+      return
+    breakdown = usage_breakdown(usage)
+    total = usage_tokens(usage, "total_tokens")
+    if total is None:
+      total = breakdown["prompt_tokens"] + breakdown["completion_tokens"] + breakdown["thinking_tokens"]
+    # total - prompt covers completion and thinking whether or not the provider nests
+    # reasoning tokens inside completion_tokens.
+    output_tokens = max(0, total - breakdown["prompt_tokens"])
+    cost = self.prices.cost(breakdown["prompt_tokens"], breakdown["cached_tokens"], output_tokens)
+    with self._lock:
+      self.spent_tokens += total
+      self.spent_cost += cost
+      self._responses += 1
+
+  def _per_row_locked(self) -> Tuple[float, float]:
+    # Responses can arrive before their rows settle (spend without rows), while a
+    # packed response settles several rows at once; the larger count covers both.
+    rows = max(self._settled_rows, self._responses)
+    if rows:
+      return self.spent_tokens / rows, self.spent_cost / rows
+    return self._initial_tokens, self._initial_cost
+
+  def _fits_locked(self, rows: int) -> bool:
+    tokens, cost = self._per_row_locked()
+    committed = self._in_flight_rows + rows
+    if self.max_tokens is not None and self.spent_tokens + tokens * committed > self.max_tokens:
+      return False
+    if self.max_cost is not None and self.spent_cost + cost * committed > self.max_cost:
+      return False
+    return True
+
+  def gate(
+    self,
+    items: Iterable[ItemT],
+    on_result: Callable[[ItemT, Any], None],
+    on_error: Callable[[ItemT, Exception], None],
+    *,
+    rows_in: Callable[[ItemT], int] = lambda item: 1,
+    defer: bool = True,
+  ) -> Tuple[Iterator[ItemT], Callable[[ItemT, Any], None], Callable[[ItemT, Exception], None]]:
+    """Wrap one dispatch: admit ``items`` while they fit and settle them as they finish.
+
+    With ``defer`` the returned iterator may stop and later resume, which the engines'
+    pull loop supports; pass ``defer=False`` when the items are collected in one go.
+    """
+
+    admission = _Admission(self, items, rows_in, defer)
+
+    def result(item: ItemT, payload: Any) -> None:
+      admission.settle(item)
+      on_result(item, payload)
+
+    def error(item: ItemT, exc: Exception) -> None:
+      admission.settle(item)
+      on_error(item, exc)
+
+    return admission, result, error
+
+  def summary_line(self) -> str:
+    limits = []
+    if self.max_tokens is not None:
+      limits.append(f"{self.spent_tokens} of {self.max_tokens} tokens")
+    if self.max_cost is not None:
+      limits.append(f"${self.spent_cost:.4f} of ${self.max_cost:.2f}")
+    state = "exhausted, remaining rows were not sent" if self.exhausted else "not exhausted"
+    return f"Budget: spent {', '.join(limits)} ({state})"
+
+
+class _Admission(Iterator[ItemT]):
+  """Resumable iterator that hands out items only while ``budget`` can afford them."""
+
+  def __init__(self, budget: RunBudget, items: Iterable[ItemT], rows_in: Callable[[ItemT], int], defer: bool):
+    self.budget = budget
+    self.source = iter(items)
+    self.rows_in = rows_in
+    self.defer = defer
+    self.reservations: Dict[int, int] = {}
+    self._waiting: List[ItemT] = []
+
+  def __next__(self) -> ItemT:
+    if not self._waiting:
+      self._waiting.append(next(self.source))
+    item = self._waiting[0]
+    rows = self.rows_in(item)
+    budget = self.budget
+    with budget._lock:
+      if budget.exhausted:
+        raise StopIteration
+      if not budget._fits_locked(rows):
+        # Wait for in-flight rows to settle unless nothing is left to settle.
+        if not self.defer or not budget._in_flight_rows:
+          budget.exhausted = True
+        raise StopIteration
+      budget._in_flight_rows += rows
+      self.reservations[id(item)] = rows
+    self._waiting.clear()
+    return item
+
+  def settle(self, item: ItemT) -> None:
+    budget = self.budget
+    with budget._lock:
+      rows = self.reservations.pop(id(item), 0)
+      budget._in_flight_rows -= rows
+      budget._settled_rows += rows
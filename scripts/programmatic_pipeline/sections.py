@@ -0,0 +1,124 @@
+"""Section-level regeneration: trimmed prompts and schemas for named page sections.
+
+``--sections metadata,faqSection`` asks the model only for those top-level keys of
+an existing page. The trimmed system prompt keeps the generator's preamble (app
+description and writing rules) and every rule block or bullet whose text matches
+one of the section's guidance markers. It then asks for just the selected slices
+of the prompt's JSON shape example. ``PROMPT_TEMPLATE`` stays the single source of
+truth, so prompt edits flow into section refreshes automatically.
+"""
+
+from __future__ import annotations
+
+import re
+from typing import Any, Dict, List, Mapping, Sequence
+
+# Guidance markers under this key apply to every section selection.
+ALWAYS_KEY = "*"
+
+_BULLET_RE = re.compile(r"^(?:[-*]|\d+\))\s")
+_SHAPE_ENTRY_RE = re.compile(r'^  "(\w+)":')
+
+
+def parse_sections(value: str | None, available: Sequence[str]) -> List[str]:
+  """Split a comma-separated ``--sections`` value, keeping schema order."""
+
+  if not value:
+    return []
+  requested = [part.strip() for part in value.split(",") if part.strip()]
+  unknown = sorted(set(requested) - set(available))
+  if unknown:
+    raise ValueError(
+      f"Unknown section(s) {', '.join(unknown)}; choose from {', '.join(available)}"
+    )
+  return [name for name in available if name in requested]
+
+
+def prompt_blocks(template: str) -> List[str]:
+  return [block.strip("\n") for block in re.split(r"\n\s*\n", template.strip()) if block.strip()]
+
+
+def shape_entries(template: str) -> Dict[str, str]:
+  """Return the JSON shape example's top-level entries keyed by section name."""
+
+  lines = template.splitlines()
+  try:
+    start = lines.index("{")
+    end = lines.index("}", start)
+  except ValueError:
+    return {}
+  entries: Dict[str, List[str]] = {}
+  current: List[str] | None = None
+  for line in lines[start + 1 : end]:
+    match = _SHAPE_ENTRY_RE.match(line)
+    if match:
+      current = entries.setdefault(match.group(1), [])
+    if current is not None:
+      current.append(line)
+  return {key: "\n".join(body).rstrip().rstrip(",") for key, body in entries.items()}
+
+
+def _bullet_groups(lines: Sequence[str]) -> List[List[str]]:
+  groups: List[List[str]] = []
+  for line in lines:
+    if _BULLET_RE.match(line) or not groups:
+      groups.append([line])
+    elif line[:1].isspace():
+      groups[-1].append(line)
+    else:
+      groups.append([line])
+  return groups
+
+
+def _select_guidance(block: str, markers: Sequence[str]) -> str | None:
+  lines = block.splitlines()
+  if any(marker in lines[0] for marker in markers):
+    return block
+  if lines[0] == "{" or lines[0].startswith("```"):
+    return None
+  kept = [
+    "\n".join(group)
+    for group in _bullet_groups(lines[1:])
+    if any(marker in group[0] for marker in markers)
+  ]
+  if not kept:
+    return None
+  return "\n".join([lines[0], *kept])
+
+
+def build_section_prompt(
+  template: str,
+  sections: Sequence[str],
+  guidance: Mapping[str, Sequence[str]],
+  *,
+  preamble_blocks: int,
+) -> str:
+  blocks = prompt_blocks(template)
+  markers = [marker for name in [ALWAYS_KEY, *sections] for marker in guidance.get(name, ())]
+  selected = list(blocks[:preamble_blocks])
+  for block in blocks[preamble_blocks:]:
+    kept = _select_guidance(block, markers)
+    if kept:
+      selected.append(kept)
+
+  shapes = shape_entries(template)
+  shape = ",\n".join(shapes[name] for name in sections if name in shapes)
+  selected.append(
+    "SECTION REFRESH:\n"
+    f"You are regenerating ONLY these sections of an existing landing page: {', '.join(sections)}. "
+    "Every other section stays as it is, so do not return it.\n"
+    "Return ONLY a single valid JSON object with exactly these top-level keys and this shape "
+    "(no markdown, no commentary):\n\n"
+    f"{{\n{shape}\n}}"
+  )
+  return "\n\n".join(selected) + "\n"
+
+
+def section_schema(page_schema: Dict[str, Any], sections: Sequence[str]) -> Dict[str, Any]:
+  properties = page_schema.get("properties") or {}
+  return {
+    "type": "object",
+    "properties": {name: properties.get(name, {"type": "object"}) for name in sections},
+    "required": list(sections),
+    "additionalProperties": False,
+  }
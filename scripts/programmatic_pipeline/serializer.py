@@ -0,0 +1,233 @@
+"""Incremental serializer for the generated TypeScript page arrays.
+
+Every checkpoint rewrites the whole output file, and ``json.dumps(..., indent=2)``
+falls back to the pure-Python encoder, so re-encoding thousands of unchanged pages
+dominated write time once a corpus grew. ``PageSerializer`` caches each page's
+encoded fragment (UTF-8 bytes, already indented and post-processed) keyed by the
+page object's identity. Only pages it has not seen are encoded, and the file is
+assembled with one ``b"".join`` and written in a single call. The generators replace
+page dicts rather than editing them in place. Code that does edit a page in place
+must call ``invalidate`` on it.
+
+When ``orjson`` is installed it encodes the pages; the output stays byte-identical
+to the stdlib encoder. orjson spells some floats differently (``1e16`` vs
+``1e+16``), so a page whose encoding contains a float value is re-encoded with
+``json``. Pages orjson rejects, such as those with non-string keys or integers
+beyond 64 bits, are handled the same way.
+
+Two output formats are supported. ``literal`` writes the array as an indented
+object literal. ``json`` writes ``JSON.parse('[...]')`` instead: JS engines parse a
+JSON string much faster than the equivalent object literal, and the TypeScript
+compiler no longer has to infer types for the whole corpus (the schema annotation
+types the result, so the file can drop ``// @ts-nocheck``). Each page sits on its
+own line of the string literal, joined by line continuations, so diffs stay
+readable. ``find_json_payload`` reads the string back for the scripts that parse
+generated modules.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import re
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Tuple
+
+try:
+  import orjson
+except ImportError:  # optional fast backend
+  orjson = None  # type: ignore[assignment]
+
+BACKENDS = ("auto", "json", "orjson")
+OUTPUT_FORMATS = ("literal", "json")
+TS_NOCHECK = "// @ts-nocheck\n"
+JSON_PAYLOAD_OPEN = "JSON.parse(\n  '[\\\n"
+JSON_PAYLOAD_CLOSE = "\\\n]'\n)"
+
+# With two-space indentation every scalar ends its line, so a number value is a
+# line that ends in a digit (plus an optional comma); strings always end in a quote.
+_FLOAT_VALUE_RE = re.compile(rb"(?:^ *|: )-?\d+[.eE][\d.eE+-]*,?$", re.MULTILINE)
+# Compact JSON has no layout to anchor on; a match inside a string only costs a fallback.
+_COMPACT_FLOAT_RE = re.compile(rb"[:,\[]-?\d+[.eE]")
+_JSON_PARSE_RE = re.compile(r"JSON\.parse\(\s*'")
+_FORMAT_PROBE_RE = re.compile(r"^export const \w+[^=\n]*=\s*JSON\.parse\(", re.MULTILINE)
+
+
+def with_native_newlines(data: bytes) -> bytes:
+  """Translate newlines the way ``Path.write_text`` does, for byte-identical files on Windows."""
+
+  return data if os.linesep == "\n" else data.replace(b"\n", os.linesep.encode("ascii"))
+
+
+def output_format_of(path: Path) -> str | None:
+  """The format of an existing generated module, or ``None`` when there is no file."""
+
+  if not path.exists():
+    return None
+  with path.open("r", encoding="utf-8") as handle:
+    head = handle.read(4096)
+  return "json" if _FORMAT_PROBE_RE.search(head) else "literal"
+
+
+def resolve_output_format(value: str, path: Path) -> str:
+  """Map ``--output-format auto`` to the format of the file at ``path`` (``literal`` for a new file)."""
+
+  if value == "auto":
+    return output_format_of(path) or "literal"
+  if value not in OUTPUT_FORMATS:
+    raise ValueError(f"Unknown output format {value!r}; expected auto or one of {', '.join(OUTPUT_FORMATS)}")
+  return value
+
+
+def json_payload_header(header: str) -> str:
+  """Turn a literal-array module header (ending in ``= [``) into its ``JSON.parse`` form."""
+
+  if not header.endswith("[\n"):
+    raise ValueError("Output header must end with the opening '[' of the page array")
+  if header.startswith(TS_NOCHECK):
+    header = header[len(TS_NOCHECK) :]
+  return header[:-2] + JSON_PAYLOAD_OPEN
+
+
+def json_payload_footer(footer: str) -> str:
+  if not footer.startswith("]"):
+    raise ValueError("Output footer must start with the closing ']' of the page array")
+  return JSON_PAYLOAD_CLOSE + footer[1:]
+
+
+def find_json_payload(text: str, start: int = 0) -> Tuple[int, int, str] | None:
+  """Locate ``JSON.parse('...')`` at or after ``start``.
+
+  Returns the offsets of the ``J`` and of the closing parenthesis, plus the decoded
+  JSON text, or ``None`` when the module has no JSON payload.
+  """
+
+  match = _JSON_PARSE_RE.search(text, start)
+  if not match:
+    return None
+  close_quote = text.rfind("'")
+  close_paren = text.find(")", close_quote)
+  if close_quote < match.end() or close_paren == -1:
+    return None
+  literal = text[match.end() : close_quote]
+  # Raw newlines only appear in the line continuations between pages. Every quote
+  # carries its own escaping backslash, so the remaining backslashes are pairs.
+  literal = literal.replace("\\\r\n", "").replace("\\\n", "")
+  literal = literal.replace("\\'", "'").replace("\\\\", "\\")
+  return match.start(), close_paren, literal
+
+
+def _js_escape(encoded: bytes) -> bytes:
+  return encoded.replace(b"\\", b"\\\\").replace(b"'", b"\\'")
+
+
+def _fix_apostrophes(encoded: bytes) -> bytes:
+  return encoded.replace(b"\\u2019", "’".encode("utf-8"))
+
+
+def _post_process(encoded: bytes) -> bytes:
+  return b"  " + _fix_apostrophes(encoded.replace(b"\n", b"\n  "))
+
+
+def _encode_json(page: Any) -> bytes:
+  return json.dumps(page, ensure_ascii=False, indent=2).encode("utf-8")
+
+
+def _encode_orjson(page: Any) -> bytes:
+  try:
+    encoded = orjson.dumps(page, option=orjson.OPT_INDENT_2)
+  except TypeError:  # orjson.JSONEncodeError subclasses TypeError
+    return _encode_json(page)
+  if _FLOAT_VALUE_RE.search(encoded):
+    return _encode_json(page)
+  return encoded
+
+
+def _encode_json_compact(page: Any) -> bytes:
+  return json.dumps(page, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def _encode_orjson_compact(page: Any) -> bytes:
+  try:
+    encoded = orjson.dumps(page)
+  except TypeError:
+    return _encode_json_compact(page)
+  if _COMPACT_FLOAT_RE.search(encoded):
+    return _encode_json_compact(page)
+  return encoded
+
+
+def json_payload_fragment(encoded: bytes) -> bytes:
+  """A compact JSON page as one line of the ``JSON.parse`` string literal."""
+
+  # Page text holding a literal backslash-u2019 sequence reads back as "’" from the
+  # literal format; its rewrite is not valid JSON, so swap the escaped sequence here.
+  return _js_escape(encoded.replace(b"\\\\u2019", "’".encode("utf-8")))
+
+
+class PageSerializer:
+  """Encode a page list as ``header + pages + footer``, re-encoding only new pages.
+
+  ``header`` and ``footer`` are given in the literal form (ending in ``= [`` and
+  starting with ``]``); the ``json`` format derives its ``JSON.parse`` wrapper from them.
+  """
+
+  def __init__(self, header: str, footer: str, *, backend: str = "auto", output_format: str = "literal"):
+    if backend not in BACKENDS:
+      raise ValueError(f"Unknown serializer backend {backend!r}; expected one of {', '.join(BACKENDS)}")
+    if backend == "orjson" and orjson is None:
+      raise RuntimeError("The orjson serializer backend needs the 'orjson' package (pip install orjson)")
+    if output_format not in OUTPUT_FORMATS:
+      raise ValueError(f"Unknown output format {output_format!r}; expected one of {', '.join(OUTPUT_FORMATS)}")
+    if backend == "auto":
+      backend = "json" if orjson is None else "orjson"
+    self.backend = backend
+    self.output_format = output_format
+    if output_format == "json":
+      self._encode = _encode_orjson_compact if backend == "orjson" else _encode_json_compact
+      self._finish = json_payload_fragment
+      self._separator, self._terminator = b",\\\n", b""
+    else:
+      self._encode = _encode_orjson if backend == "orjson" else _encode_json
+      self._finish = _post_process
+      self._separator, self._terminator = b",\n", b"\n"
+    self.header, self.footer = self.wrapper(header, footer)
+    # id(page) -> (page, fragment). Holding the page keeps its id from being reused.
+    self._fragments: Dict[int, Tuple[Any, bytes]] = {}
+    self.encoded = 0
+    self.reused = 0
+
+  def invalidate(self, page: Any) -> None:
+    """Forget the cached fragment of a page that was modified in place."""
+
+    self._fragments.pop(id(page), None)
+
+  def fragment(self, page: Any) -> bytes:
+    cached = self._fragments.get(id(page))
+    if cached is not None and cached[0] is page:
+      self.reused += 1
+      return cached[1]
+    fragment = self._finish(self._encode(page))
+    self._fragments[id(page)] = (page, fragment)
+    self.encoded += 1
+    return fragment
+
+  def wrapper(self, header: str, footer: str) -> Tuple[bytes, bytes]:
+    """Encode a literal-form header and footer for this serializer's output format."""
+
+    if self.output_format == "json":
+      header, footer = json_payload_header(header), json_payload_footer(footer)
+    return header.encode("utf-8"), footer.encode("utf-8")
+
+  def document(self, pages: Iterable[Any], header: bytes, footer: bytes) -> bytes:
+    """Join cached fragments between an encoded ``header`` and ``footer`` from ``wrapper``."""
+
+    fragments = self._separator.join(self.fragment(page) for page in pages)
+    return b"".join((header, fragments, self._terminator, footer))
+
+  def serialize(self, pages: Iterable[Any]) -> bytes:
+    pages = list(pages)
+    data = self.document(pages, self.header, self.footer)
+    # Drop pages that left the list so the cache never outgrows the output.
+    self._fragments = {id(page): self._fragments[id(page)] for page in pages}
+    return data
@@ -0,0 +1,177 @@
+"""Slug-hash sharding of a generation run and merging of the shard outputs.
+
+``--shard i/N`` keeps only the rows whose slug hashes to shard ``i`` (1-based) and
+writes them to ``<stem>.shard-i-of-N<suffix>`` next to the regular output. Its
+checkpoint journal, fingerprint manifest and batch directory follow that path.
+Several processes (or hosts, or API keys) can therefore work on disjoint slices of
+one CSV. The hash is SHA-256 based, so every process agrees on the partition
+regardless of ``PYTHONHASHSEED``.
+
+``merge`` folds the shard files back into the combined output. Pages already in the
+output keep their position and new slugs are appended in slug order, so the result
+does not depend on which shard finished first. A slug found in two shards with
+different content is reported as a conflict instead of being silently overwritten.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import re
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Sequence
+
+from programmatic_pipeline.journal import journal_path_for
+from programmatic_pipeline.manifest import FingerprintManifest, manifest_path_for
+
+_SHARD_ARG_RE = re.compile(r"^\s*(\d+)\s*/\s*(\d+)\s*$")
+_SHARD_NAME_RE = re.compile(r"\.shard-(\d+)-of-(\d+)$")
+MAX_REPORTED_CONFLICTS = 10
+
+
+class ShardConflictError(ValueError):
+  """Raised when shard outputs disagree and cannot be merged safely."""
+
+
+def shard_for(slug: str, count: int) -> int:
+  """Return the 0-based shard that owns ``slug`` out of ``count`` shards."""
+
+  digest = hashlib.sha256(slug.encode("utf-8")).digest()
+  return int.from_bytes(digest[:8], "big") % count
+
+
+@dataclass(frozen=True)
+class Shard:
+  index: int
+  count: int
+
+  def owns(self, slug: Any) -> bool:
+    return isinstance(slug, str) and shard_for(slug, self.count) == self.index - 1
+
+  @property
+  def label(self) -> str:
+    return f"{self.index}/{self.count}"
+
+
+def parse_shard(value: str | None) -> Shard | None:
+  """Parse a ``--shard i/N`` value (1 <= i <= N)."""
+
+  if not value:
+    return None
+  match = _SHARD_ARG_RE.match(value)
+  if not match:
+    raise ValueError(f"--shard expects i/N (for example 2/8), got {value!r}")
+  index, count = int(match.group(1)), int(match.group(2))
+  if count < 1 or not 1 <= index <= count:
+    raise ValueError(f"--shard index must be between 1 and N, got {value!r}")
+  return Shard(index, count)
+
+
+def shard_output_path(output_path: Path, shard: Shard) -> Path:
+  return output_path.with_name(f"{output_path.stem}.shard-{shard.index}-of-{shard.count}{output_path.suffix}")
+
+
+def shard_from_path(path: Path) -> Shard | None:
+  match = _SHARD_NAME_RE.search(path.stem)
+  if not match:
+    return None
+  return Shard(int(match.group(1)), int(match.group(2)))
+
+
+def find_shard_outputs(output_path: Path) -> List[Path]:
+  """Return every shard output written next to ``output_path``, in shard order."""
+
+  candidates = output_path.parent.glob(f"{output_path.stem}.shard-*-of-*{output_path.suffix}")
+  found = [(shard_from_path(path), path) for path in candidates]
+  return [path for shard, path in sorted((item for item in found if item[0]), key=lambda item: item[0].index)]
+
+
+@dataclass
+class MergeReport:
+  shards: List[Path]
+  pages: int = 0
+  updated: int = 0
+  added: int = 0
+  missing_shards: List[int] = field(default_factory=list)
+
+
+def merge_shard_outputs(
+  output_path: Path,
+  shard_paths: Sequence[Path],
+  *,
+  load_pages: Callable[[Path], List[Dict[str, Any]]],
+  write_pages: Callable[[Path, List[Dict[str, Any]]], None],
+) -> MergeReport:
+  """Merge shard outputs (and their fingerprint manifests) into ``output_path``."""
+
+  shard_paths = list(shard_paths) or find_shard_outputs(output_path)
+  if not shard_paths:
+    raise ValueError(f"No shard outputs found next to {output_path}")
+
+  shards: Dict[int, Path] = {}
+  counts = set()
+  for path in shard_paths:
+    shard = shard_from_path(path)
+    if shard is None:
+      raise ValueError(f"{path} is not a shard output (expected *.shard-i-of-N{output_path.suffix})")
+    if shard.index in shards:
+      raise ShardConflictError(f"Shard {shard.label} given twice: {shards[shard.index]} and {path}")
+    shards[shard.index] = path
+    counts.add(shard.count)
+  if len(counts) > 1:
+    raise ShardConflictError(f"Shard outputs come from different partitions: N = {sorted(counts)}")
+  count = counts.pop()
+
+  incoming: Dict[str, Dict[str, Any]] = {}
+  source: Dict[str, Path] = {}
+  conflicts: List[str] = []
+  for index in sorted(shards):
+    path = shards[index]
+    for page in load_pages(path):
+      slug = page.get("slug")
+      if not isinstance(slug, str):
+        continue
+      if slug in incoming and incoming[slug] != page:
+        conflicts.append(f"{slug} ({source[slug].name} vs {path.name})")
+        continue
+      incoming[slug] = page
+      source[slug] = path
+  if conflicts:
+    shown = ", ".join(conflicts[:MAX_REPORTED_CONFLICTS])
+    more = len(conflicts) - MAX_REPORTED_CONFLICTS
+    raise ShardConflictError(
+      f"{len(conflicts)} slug(s) differ between shards: {shown}" + (f" and {more} more" if more > 0 else "")
+    )
+
+  merged = load_pages(output_path)
+  report = MergeReport(shards=[shards[index] for index in sorted(shards)])
+  report.missing_shards = [index for index in range(1, count + 1) if index not in shards]
+  positions = {page.get("slug"): idx for idx, page in enumerate(merged)}
+  for slug in sorted(incoming):
+    page = incoming[slug]
+    if slug in positions:
+      if merged[positions[slug]] != page:
+        merged[positions[slug]] = page
+        report.updated += 1
+    else:
+      positions[slug] = len(merged)
+      merged.append(page)
+      report.added += 1
+  report.pages = len(merged)
+
+  write_pages(output_path, merged)
+  journal_path_for(output_path).unlink(missing_ok=True)
+
+  manifest = FingerprintManifest(manifest_path_for(output_path))
+  for path in report.shards:
+    manifest.adopt(FingerprintManifest(manifest_path_for(path)))
+  manifest.save()
+  return report
+
+
+def remove_shard_outputs(paths: Sequence[Path]) -> None:
+  """Delete merged shard outputs together with their journals and manifests."""
+
+  for path in paths:
+    for companion in (path, journal_path_for(path), manifest_path_for(path)):
+      companion.unlink(missing_ok=True)
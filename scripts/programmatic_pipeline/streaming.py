@@ -0,0 +1,279 @@
+"""Streaming completions with incremental JSON validation and early abort.
+
+A response that drifts from the schema (a fourth ``embeddedFlashcards`` item, an
+unexpected key inside ``linkingRecommendations``, a missing required section) is
+otherwise only detected after every one of its tokens has been paid for.
+``IncrementalJsonValidator`` consumes the streamed text one chunk at a time and
+checks the structural invariants of the request's JSON schema as keys and values
+arrive. The first violation raises ``StreamValidationError``; the stream is then
+closed so the retry can start straight away.
+"""
+
+from __future__ import annotations
+
+import bisect
+import threading
+import time
+from dataclasses import dataclass, field
+from types import SimpleNamespace
+from typing import Any, Dict, List
+
+_VALUE_TYPES = {
+  "{": "object",
+  "[": "array",
+  '"': "string",
+  "t": "boolean",
+  "f": "boolean",
+  "n": "null",
+}
+_WHITESPACE = " \t\r\n"
+
+
+class StreamValidationError(RuntimeError):
+  """Raised as soon as a streamed response can no longer satisfy its schema."""
+
+
+@dataclass
+class _Frame:
+  kind: str
+  schema: Dict[str, Any]
+  path: str
+  # object: "key" | "colon" | "value" | "comma"; array: "value" | "comma"
+  state: str = "value"
+  keys: set = field(default_factory=set)
+  count: int = 0
+  pending_key: str | None = None
+
+
+class IncrementalJsonValidator:
+  """Push-parser that validates the JSON Schema subset the generators use."""
+
+  def __init__(self, schema: Dict[str, Any]):
+    self.schema = schema or {}
+    self._stack: List[_Frame] = []
+    self._started = False
+    self._finished = False
+    self._in_string = False
+    self._escape = False
+    self._string_is_key = False
+    self._key_chars: List[str] = []
+    self._in_scalar = False
+
+  def feed(self, text: str) -> None:
+    for char in text:
+      self._feed_char(char)
+
+  def finish(self) -> None:
+    if self._in_scalar:
+      self._end_scalar()
+    if not self._finished:
+      raise StreamValidationError("Stream ended before the JSON document was complete")
+
+  def _fail(self, message: str) -> None:
+    raise StreamValidationError(message)
+
+  def _feed_char(self, char: str) -> None:
+    if self._in_string:
+      if self._escape:
+        self._escape = False
+      elif char == "\\":
+        self._escape = True
+      elif char == '"':
+        self._in_string = False
+        if self._string_is_key:
+          self._on_key("".join(self._key_chars))
+        else:
+          self._after_value()
+        return
+      if self._string_is_key:
+        self._key_chars.append(char)
+      return
+
+    if self._in_scalar:
+      if char not in _WHITESPACE and char not in ",]}":
+        return
+      self._end_scalar()
+
+    if char in _WHITESPACE:
+      return
+    if self._finished:
+      self._fail(f"Unexpected trailing content {char!r} after the JSON document")
+
+    frame = self._stack[-1] if self._stack else None
+    if frame is None:
+      if self._started:
+        self._fail(f"Unexpected {char!r} after the JSON document")
+      self._started = True
+      self._start_value(char, self.schema, "$")
+      return
+
+    if frame.kind == "object":
+      if frame.state == "key":
+        if char == '"':
+          self._in_string = True
+          self._string_is_key = True
+          self._key_chars = []
+        elif char == "}" and not frame.keys:
+          self._close(frame)
+        else:
+          self._fail(f"Expected a key in {frame.path}, got {char!r}")
+      elif frame.state == "colon":
+        if char != ":":
+          self._fail(f"Expected ':' after {frame.path}.{frame.pending_key}")
+        frame.state = "value"
+      elif frame.state == "value":
+        child_schema = (frame.schema.get("properties") or {}).get(frame.pending_key) or {}
+        self._start_value(char, child_schema, f"{frame.path}.{frame.pending_key}")
+      elif char == ",":
+        frame.state = "key"
+      elif char == "}":
+        self._close(frame)
+      else:
+        self._fail(f"Expected ',' or '}}' in {frame.path}, got {char!r}")
+      return
+
+    if frame.state == "value":
+      if char == "]" and frame.count == 0:
+        self._close(frame)
+        return
+      frame.count += 1
+      max_items = frame.schema.get("maxItems")
+      if max_items is not None and frame.count > max_items:
+        self._fail(f"{frame.path} has more than {max_items} items")
+      item_schema = frame.schema.get("items")
+      self._start_value(char, item_schema if isinstance(item_schema, dict) else {}, f"{frame.path}[{frame.count - 1}]")
+    elif char == ",":
+      frame.state = "value"
+    elif char == "]":
+      self._close(frame)
+    else:
+      self._fail(f"Expected ',' or ']' in {frame.path}, got {char!r}")
+
+  def _start_value(self, char: str, schema: Dict[str, Any], path: str) -> None:
+    if char in _VALUE_TYPES:
+      value_type = _VALUE_TYPES[char]
+    elif char == "-" or char.isdigit():
+      value_type = "number"
+    else:
+      self._fail(f"Unexpected {char!r} at {path}")
+
+    expected = schema.get("type")
+    if expected and not (expected == value_type or (expected == "integer" and value_type == "number")):
+      self._fail(f"{path} should be of type {expected}, got {value_type}")
+
+    if value_type in ("object", "array"):
+      self._stack.append(
+        _Frame(kind=value_type, schema=schema, path=path, state="key" if value_type == "object" else "value")
+      )
+    elif value_type == "string":
+      self._in_string = True
+      self._string_is_key = False
+    else:
+      self._in_scalar = True
+
+  def _end_scalar(self) -> None:
+    self._in_scalar = False
+    self._after_value()
+
+  def _on_key(self, key: str) -> None:
+    frame = self._stack[-1]
+    properties = frame.schema.get("properties") or {}
+    if frame.schema.get("additionalProperties") is False and key not in properties:
+      self._fail(f"{frame.path}.{key} is not allowed")
+    frame.keys.add(key)
+    frame.pending_key = key
+    frame.state = "colon"
+
+  def _close(self, frame: _Frame) -> None:
+    if frame.kind == "object":
+      missing = [key for key in frame.schema.get("required") or [] if key not in frame.keys]
+      if missing:
+        self._fail(f"{frame.path} is missing required keys: {', '.join(missing)}")
+    else:
+      min_items = frame.schema.get("minItems")
+      if min_items is not None and frame.count < min_items:
+        self._fail(f"{frame.path} should have at least {min_items} items")
+    self._stack.pop()
+    self._after_value()
+
+  def _after_value(self) -> None:
+    if not self._stack:
+      self._finished = True
+      return
+    self._stack[-1].state = "comma"
+
+
+class StreamStats:
+  """Thread-safe record of time-to-first-token and early aborts across a run."""
+
+  def __init__(self) -> None:
+    self.first_token_seconds: List[float] = []
+    self.aborted = 0
+    self._lock = threading.Lock()
+
+  def record_first_token(self, seconds: float) -> None:
+    with self._lock:
+      bisect.insort(self.first_token_seconds, seconds)
+
+  def record_abort(self) -> None:
+    with self._lock:
+      self.aborted += 1
+
+  def _percentile(self, fraction: float) -> float:
+    values = self.first_token_seconds
+    return values[min(len(values) - 1, int(fraction * len(values)))]
+
+  def summary_line(self) -> str:
+    if not self.first_token_seconds:
+      return f"Streaming: no tokens received ({self.aborted} streams aborted early)"
+    return (
+      f"Streaming: time to first token p50 {self._percentile(0.5):.2f}s / "
+      f"p95 {self._percentile(0.95):.2f}s over {len(self.first_token_seconds)} requests; "
+      f"{self.aborted} streams aborted early on schema violations"
+    )
+
+
+def stream_params(request_params: Dict[str, Any]) -> Dict[str, Any]:
+  return {**request_params, "stream": True, "stream_options": {"include_usage": True}}
+
+
+def response_schema(request_params: Dict[str, Any]) -> Dict[str, Any]:
+  response_format = request_params.get("response_format") or {}
+  return (response_format.get("json_schema") or {}).get("schema") or {}
+
+
+class StreamCollector:
+  """Accumulates streamed chunks, validating as it goes and timing the first token."""
+
+  def __init__(self, request_params: Dict[str, Any], stats: StreamStats | None):
+    self.validator = IncrementalJsonValidator(response_schema(request_params))
+    self.stats = stats
+    self.started = time.monotonic()
+    self.parts: List[str] = []
+    self.usage: Any = None
+
+  def add(self, chunk: Any) -> None:
+    if getattr(chunk, "usage", None) is not None:
+      self.usage = chunk.usage
+    for choice in getattr(chunk, "choices", None) or []:
+      text = getattr(getattr(choice, "delta", None), "content", None)
+      if not text:
+        continue
+      if not self.parts and self.stats is not None:
+        self.stats.record_first_token(time.monotonic() - self.started)
+      self.parts.append(text)
+      try:
+        self.validator.feed(text)
+      except StreamValidationError:
+        if self.stats is not None:
+          self.stats.record_abort()
+        raise
+
+  def response(self) -> Any:
+    """Return the collected text in the same shape as a non-streamed completion."""
+
+    content = "".join(self.parts)
+    if content:
+      self.validator.finish()
+    message = SimpleNamespace(content=content)
+    return SimpleNamespace(choices=[SimpleNamespace(message=message)], usage=self.usage)
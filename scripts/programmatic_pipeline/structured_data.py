@@ -0,0 +1,124 @@
+"""Build the JSON-LD that the programmatic landing routes serve.
+
+``lib/programmatic/flashcardPages.ts`` and ``mindMapPages.ts`` used to rebuild the
+``structuredData`` of every generated page each time they were imported. The
+generators now write the final graph into the output: a ``BreadcrumbList`` plus a
+``FAQPage`` node when the page has FAQ items, in the same shape and key order the
+TypeScript builds. The runtime pass then only fills in pages that carry none, such
+as the hand-written landings.
+
+Each generator supplies the breadcrumb trail; flashcard trails include the taxonomy
+hub and subhub. Trails depend on the taxonomy, so ``replace_structured_data``
+recomputes the graph of every existing page, not only of newly generated ones, and
+swaps in a new page dict for each page whose graph changed.
+
+Each page also carries ``structuredDataVersion``. The runtime keeps a precomputed
+graph only when that marker equals its own ``STRUCTURED_DATA_VERSION`` and rebuilds
+the rest, so outputs written before a shape change are never served stale. Bump
+the constant on both sides whenever the graph shape changes; loading an existing
+output then replaces every graph. The marker sits next to the graph rather than
+inside it so the served JSON-LD stays plain schema.org.
+
+``SITE_URL`` and ``SITE_TITLE`` mirror ``lib/siteMetadata.ts``.
+"""
+
+from __future__ import annotations
+
+from typing import Any, Callable, Dict, List, Mapping
+
+SITE_URL = "https://www.cogniguide.app"
+SITE_TITLE = "CogniGuide | AI Study Assistant for Mind Maps & Flashcards"
+HOME_URL = f"{SITE_URL}/"
+# Mirrors STRUCTURED_DATA_VERSION in lib/programmatic/flashcardPages.ts.
+STRUCTURED_DATA_VERSION = 1
+
+
+def _section(page: Mapping[str, Any], key: str) -> Mapping[str, Any]:
+  value = page.get(key)
+  return value if isinstance(value, Mapping) else {}
+
+
+def page_canonical(page: Mapping[str, Any], section_path: str) -> str:
+  """``metadata.canonical``, else the site URL plus the page path (``section_path/slug`` without one)."""
+
+  canonical = _section(page, "metadata").get("canonical")
+  if canonical is not None:
+    return canonical
+  path = page.get("path")
+  if path is None:
+    path = f"{section_path}/{page['slug']}"
+  return f"{SITE_URL}{path}"
+
+
+def page_name(page: Mapping[str, Any]) -> str:
+  """The last breadcrumb label: the meta title, else the hero heading, else the slug."""
+
+  for value in (_section(page, "metadata").get("title"), _section(page, "hero").get("heading")):
+    if value is not None:
+      return value
+  return page["slug"]
+
+
+def structured_data_graph(
+  page: Mapping[str, Any],
+  canonical: str,
+  breadcrumb_segments: List[Dict[str, str]],
+) -> Dict[str, Any]:
+  """The ``@graph`` document of ``page`` from its breadcrumb ``{name, item}`` segments."""
+
+  breadcrumb = {
+    "@type": "BreadcrumbList",
+    "itemListElement": [
+      {"@type": "ListItem", "position": position, "name": segment["name"], "item": segment["item"]}
+      for position, segment in enumerate(breadcrumb_segments, start=1)
+    ],
+  }
+  graph: List[Dict[str, Any]] = [breadcrumb]
+
+  items = _section(page, "faqSection").get("items")
+  faq_items = [item for item in items if isinstance(item, Mapping)] if isinstance(items, list) else []
+  if faq_items:
+    graph.append(
+      {
+        "@type": "FAQPage",
+        "mainEntity": [
+          {
+            "@type": "Question",
+            "name": item.get("question"),
+            "acceptedAnswer": {"@type": "Answer", "text": item.get("answer")},
+          }
+          for item in faq_items
+        ],
+        "url": canonical,
+        "inLanguage": "en",
+        "name": SITE_TITLE,
+        "@id": f"{canonical}#faq",
+      }
+    )
+
+  return {"@context": "https://schema.org", "@graph": graph}
+
+
+def replace_structured_data(
+  pages: List[Dict[str, Any]],
+  build: Callable[[Dict[str, Any]], Dict[str, Any]],
+) -> int:
+  """Recompute ``structuredData`` with ``build`` and replace the pages whose graph changed.
+
+  Pages whose ``structuredDataVersion`` is missing or stale are replaced as well.
+  Pages are replaced rather than edited so cached serializer fragments stay valid.
+  Returns the number of replaced pages.
+  """
+
+  replaced = 0
+  for idx, page in enumerate(pages):
+    if not isinstance(page, dict) or not isinstance(page.get("slug"), str):
+      continue
+    structured_data = build(page)
+    if (
+      page.get("structuredData") != structured_data
+      or page.get("structuredDataVersion") != STRUCTURED_DATA_VERSION
+    ):
+      pages[idx] = dict(page, structuredData=structured_data, structuredDataVersion=STRUCTURED_DATA_VERSION)
+      replaced += 1
+  return replaced
@@ -0,0 +1,217 @@
+"""Per-attempt telemetry, end-of-run performance summary and a live progress line.
+
+Every model request attempt produces one ``AttemptRecord``. The OpenAI clients are
+built without SDK retries, so an attempt is exactly one HTTP request, and a 429 or
+5xx shows up as a failed attempt of its own. A record holds the row it belongs to,
+the attempt number, how long it waited on the rate limiter and on the in-flight
+concurrency limit, how long the request itself took, its token usage and its
+outcome. Records are appended to an optional JSONL stream and aggregated in memory.
+Together with the time spent writing output, the summary shows whether a slow run
+is bound by quota, by model latency or by disk writes.
+
+The row label and attempt number travel in context variables. They are set by the
+generator's per-row callable (``label_request``) and by the retry loop, so
+``complete_json`` can record them without threading extra arguments through every
+layer. A ``--pack-size`` request also carries the slugs of the rows packed into it;
+its attempts count towards each of those rows in the per-row attempt histogram.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import sys
+import threading
+import time
+from collections import Counter
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Tuple
+
+from openai import APIStatusError, APITimeoutError, RateLimitError
+
+from programmatic_pipeline.streaming import StreamValidationError
+from programmatic_pipeline.usage import usage_breakdown
+
+REQUEST_LABEL: ContextVar[str | None] = ContextVar("request_label", default=None)
+REQUEST_ATTEMPT: ContextVar[int] = ContextVar("request_attempt", default=1)
+# Slugs of the rows a packed request generates; empty for a single-row request.
+REQUEST_ROWS: ContextVar[Tuple[str, ...]] = ContextVar("request_rows", default=())
+# Set by the hedging layer: whether this attempt is a duplicate, a per-leg usage sink
+# and a callback for when the attempt is admitted past the rate and concurrency limits.
+REQUEST_HEDGE: ContextVar[bool] = ContextVar("request_hedge", default=False)
+ATTEMPT_USAGE: ContextVar[List[Any] | None] = ContextVar("attempt_usage", default=None)
+ATTEMPT_ADMITTED: ContextVar[Callable[[], None] | None] = ContextVar("attempt_admitted", default=None)
+
+PROGRESS_LOG_INTERVAL = 30.0
+
+
+def label_request(label: str, rows: Iterable[str] = ()) -> None:
+  """Label the requests made from the current context; ``rows`` lists packed row slugs."""
+
+  REQUEST_LABEL.set(label)
+  # Worker threads keep their context between rows, so always reset the packed rows.
+  REQUEST_ROWS.set(tuple(rows))
+
+
+def outcome_for(exc: BaseException | None) -> str:
+  if exc is None:
+    return "ok"
+  if isinstance(exc, asyncio.CancelledError):
+    return "cancelled"
+  if isinstance(exc, RateLimitError) or getattr(exc, "status", None) == 429:
+    return "rate_limited"
+  if isinstance(exc, APITimeoutError):
+    return "timeout"
+  if isinstance(exc, APIStatusError):
+    return "server_error" if exc.status_code >= 500 else f"http_{exc.status_code}"
+  if isinstance(exc, StreamValidationError):
+    return "schema_abort"
+  if isinstance(exc, json.JSONDecodeError):
+    return "invalid_json"
+  return type(exc).__name__
+
+
+@dataclass
+class AttemptRecord:
+  """Timings for one request attempt; filled in by ``complete_json``."""
+
+  label: str | None = field(default_factory=REQUEST_LABEL.get)
+  attempt: int = field(default_factory=REQUEST_ATTEMPT.get)
+  rows: Tuple[str, ...] = field(default_factory=REQUEST_ROWS.get)
+  hedge: bool = field(default_factory=REQUEST_HEDGE.get)
+  started: float = field(default_factory=time.time)
+  rate_limit_wait: float = 0.0
+  queue_wait: float = 0.0
+  latency: float = 0.0
+  outcome: str = "ok"
+
+
+def _percentile(values: List[float], fraction: float) -> float:
+  if not values:
+    return 0.0
+  return values[min(len(values) - 1, int(fraction * len(values)))]
+
+
+class Telemetry:
+  """Thread-safe sink for ``AttemptRecord``s with an optional JSONL stream."""
+
+  def __init__(self, path: Path | None = None):
+    self.path = path
+    self._handle = None
+    if path is not None:
+      path.parent.mkdir(parents=True, exist_ok=True)
+      self._handle = path.open("a", encoding="utf-8")
+    self._lock = threading.Lock()
+    self.latencies: List[float] = []
+    self.outcomes: Counter = Counter()
+    self.final_attempts: Dict[str, int] = {}
+    self.rate_limit_wait = 0.0
+    self.queue_wait = 0.0
+    self.write_seconds = 0.0
+
+  def record(self, attempt: AttemptRecord, usage: Any) -> None:
+    breakdown = usage_breakdown(usage) if usage is not None else {}
+    line = {
+      "ts": round(attempt.started, 3),
+      "slug": attempt.label,
+      "attempt": attempt.attempt,
+      "packed_rows": list(attempt.rows) or None,
+      "hedge": attempt.hedge,
+      "latency_s": round(attempt.latency, 4),
+      "queue_wait_s": round(attempt.queue_wait, 4),
+      "rate_limit_wait_s": round(attempt.rate_limit_wait, 4),
+      "prompt_tokens": breakdown.get("prompt_tokens"),
+      "completion_tokens": breakdown.get("completion_tokens"),
+      "thinking_tokens": breakdown.get("thinking_tokens"),
+      "outcome": attempt.outcome,
+    }
+    with self._lock:
+      self.latencies.append(attempt.latency)
+      self.outcomes[attempt.outcome] += 1
+      row_labels = attempt.rows or ((attempt.label,) if attempt.label is not None else ())
+      for label in row_labels:
+        self.final_attempts[label] = max(attempt.attempt, self.final_attempts.get(label, 0))
+      self.rate_limit_wait += attempt.rate_limit_wait
+      self.queue_wait += attempt.queue_wait
+      if self._handle is not None:
+        self._handle.write(json.dumps(line) + "\n")
+
+  def add_write_time(self, seconds: float) -> None:
+    with self._lock:
+      self.write_seconds += seconds
+
+  def summary_lines(self, elapsed: float, rows_done: int) -> List[str]:
+    with self._lock:
+      latencies = sorted(self.latencies)
+      histogram = Counter(self.final_attempts.values())
+      outcomes = dict(self.outcomes)
+      rate_limit_wait = self.rate_limit_wait
+      queue_wait = self.queue_wait
+      write_seconds = self.write_seconds
+    if not latencies:
+      return []
+    throughput = rows_done / elapsed if elapsed > 0 else 0.0
+    return [
+      f"Throughput: {rows_done} rows in {elapsed:.1f}s ({throughput:.2f} rows/s, {len(latencies)} attempts)",
+      f"Request latency: p50 {_percentile(latencies, 0.5):.2f}s / p95 {_percentile(latencies, 0.95):.2f}s / "
+      f"p99 {_percentile(latencies, 0.99):.2f}s / max {latencies[-1]:.2f}s",
+      f"Time spent: {sum(latencies):.1f}s in requests, {rate_limit_wait:.1f}s waiting on the rate limiter, "
+      f"{queue_wait:.1f}s queued for a concurrency slot (summed over workers), {write_seconds:.1f}s writing output",
+      "Attempts per row: " + ", ".join(f"{count}x{attempts}" for attempts, count in sorted(histogram.items())),
+      "Outcomes: " + ", ".join(f"{name} {count}" for name, count in sorted(outcomes.items())),
+    ]
+
+  def close(self) -> None:
+    with self._lock:
+      if self._handle is not None:
+        self._handle.close()
+        self._handle = None
+
+
+class ProgressReporter:
+  """Single-line progress with ETA on a TTY; a periodic log line otherwise."""
+
+  def __init__(self, total: int, *, enabled: bool = True, stream: Any = None):
+    self.total = total
+    self.done = 0
+    self.failed = 0
+    self.stream = stream or sys.stderr
+    self.enabled = enabled and total > 0
+    self.interactive = bool(getattr(self.stream, "isatty", lambda: False)())
+    self.started = time.monotonic()
+    self._last_render = 0.0
+
+  def advance(self, *, failed: bool = False) -> None:
+    self.done += 1
+    if failed:
+      self.failed += 1
+    if not self.enabled:
+      return
+    now = time.monotonic()
+    interval = 0.5 if self.interactive else PROGRESS_LOG_INTERVAL
+    if self.done == self.total or now - self._last_render >= interval:
+      self._last_render = now
+      self._render(now)
+
+  def _render(self, now: float) -> None:
+    elapsed = now - self.started
+    rate = self.done / elapsed if elapsed > 0 else 0.0
+    remaining = self.total - self.done
+    eta = f"{remaining / rate:.0f}s" if rate > 0 else "?"
+    line = (
+      f"Progress: {self.done}/{self.total} rows ({self.done / self.total:.0%}), "
+      f"{self.failed} failed, {rate:.2f} rows/s, ETA {eta}"
+    )
+    if self.interactive:
+      end = "\n" if self.done == self.total else ""
+      self.stream.write(f"\r\033[K{line}{end}")
+    else:
+      self.stream.write(line + "\n")
+    self.stream.flush()
+
+  def finish(self) -> None:
+    if self.enabled and self.interactive and self.done != self.total:
+      self.stream.write("\n")
+      self.stream.flush()
@@ -0,0 +1,233 @@
+"""Shared HTTP transport for the OpenAI clients, sized from ``--concurrency``.
+
+The SDK's default client allows up to 1000 connections but keeps only 100 alive, each
+for just a few seconds, whatever the run's concurrency. A busy run therefore keeps
+paying for new TCP/TLS handshakes, and a small one holds sockets it never uses.
+``HttpTransport`` builds the sync and async clients for both generators:
+
+- The pool allows ``POOL_PER_WORKER`` connections per worker, leaving headroom for
+  hedged duplicates and batch/file calls.
+- One idle connection per worker is kept alive for ``--keepalive-expiry`` seconds.
+- HTTP/2 multiplexes requests over fewer connections when the ``h2`` package is
+  installed.
+- ``--connect-timeout`` and ``--read-timeout`` are explicit.
+
+Both transports are metered through httpcore's ``trace`` extension. The time from
+handing a request to the pool until it is assigned a connection is a pool wait. A
+``connect_tcp`` event is a new connection (and ``start_tls`` a TLS handshake). The
+end-of-run summary shows how often requests queued for a connection and how often a
+new connection had to be opened.
+"""
+
+from __future__ import annotations
+
+import importlib.util
+import sys
+import threading
+import time
+from typing import Any, Dict
+
+from openai import DefaultAsyncHttpxClient, DefaultHttpxClient
+
+try:
+  import httpx
+except ImportError:  # openai >= 3 depends on the httpx2 fork instead
+  import httpx2 as httpx  # type: ignore[no-redef]
+
+POOL_PER_WORKER = 2
+DEFAULT_CONNECT_TIMEOUT = 10.0
+DEFAULT_READ_TIMEOUT = 600.0
+DEFAULT_KEEPALIVE_EXPIRY = 60.0
+# Waits shorter than this are lock hand-offs, not queueing for a connection.
+POOL_WAIT_THRESHOLD = 0.005
+
+_ASSIGNED_EVENTS = (
+  "connection.connect_tcp.started",
+  "connection.connect_unix_socket.started",
+  "http11.send_request_headers.started",
+  "http2.send_request_headers.started",
+)
+
+
+def http2_available() -> bool:
+  return importlib.util.find_spec("h2") is not None
+
+
+class PoolStats:
+  """Thread-safe counters for connection reuse and pool queueing."""
+
+  def __init__(self) -> None:
+    self.started = time.monotonic()
+    self.requests = 0
+    self.http2_requests = 0
+    self.new_connections = 0
+    self.tls_handshakes = 0
+    self.connect_seconds = 0.0
+    self.pool_waits = 0
+    self.pool_wait_seconds = 0.0
+    self.max_pool_wait = 0.0
+    self._lock = threading.Lock()
+
+  def _begin(self) -> None:
+    with self._lock:
+      self.requests += 1
+
+  def _assigned(self, waited: float) -> None:
+    if waited < POOL_WAIT_THRESHOLD:
+      return
+    with self._lock:
+      self.pool_waits += 1
+      self.pool_wait_seconds += waited
+      self.max_pool_wait = max(self.max_pool_wait, waited)
+
+  def _connected(self, name: str, seconds: float) -> None:
+    with self._lock:
+      self.connect_seconds += seconds
+      if name == "connection.connect_tcp":
+        self.new_connections += 1
+      elif name == "connection.start_tls":
+        self.tls_handshakes += 1
+
+  def _http2(self) -> None:
+    with self._lock:
+      self.http2_requests += 1
+
+  def summary_line(self) -> str:
+    with self._lock:
+      elapsed_minutes = max(time.monotonic() - self.started, 1e-9) / 60
+      reused = self.requests - self.new_connections
+      share = reused / self.requests if self.requests else 0.0
+      line = (
+        f"HTTP pool: {self.requests} requests over {self.new_connections} new connections "
+        f"({self.new_connections / elapsed_minutes:.1f}/min, {self.tls_handshakes} TLS handshakes, "
+        f"{share:.0%} reused"
+      )
+      if self.new_connections:
+        line += f", {self.connect_seconds / self.new_connections * 1000:.0f}ms avg to connect"
+      line += ")"
+      if self.http2_requests:
+        line += f", {self.http2_requests} over HTTP/2"
+      if self.pool_waits:
+        line += (
+          f"; {self.pool_waits} waited for a connection "
+          f"(avg {self.pool_wait_seconds / self.pool_waits * 1000:.0f}ms, max {self.max_pool_wait * 1000:.0f}ms)"
+        )
+      else:
+        line += "; no request waited for a connection"
+    return line
+
+
+class _RequestTrace:
+  """Turns httpcore trace events for one request into ``PoolStats`` updates."""
+
+  def __init__(self, stats: PoolStats, chained: Any = None):
+    self.stats = stats
+    self.chained = chained
+    self.submitted = time.monotonic()
+    self.assigned = False
+    self.phases: Dict[str, float] = {}
+
+  def event(self, name: str) -> None:
+    now = time.monotonic()
+    if not self.assigned and name in _ASSIGNED_EVENTS:
+      self.assigned = True
+      self.stats._assigned(now - self.submitted)
+    if name == "http2.send_request_headers.started":
+      self.stats._http2()
+    if name.startswith("connection."):
+      phase, _, state = name.rpartition(".")
+      if state == "started":
+        self.phases[phase] = now
+      elif state == "complete" and phase in self.phases:
+        self.stats._connected(phase, now - self.phases.pop(phase))
+
+  def sync(self, name: str, info: Dict[str, Any]) -> None:
+    self.event(name)
+    if self.chained is not None:
+      self.chained(name, info)
+
+  async def async_(self, name: str, info: Dict[str, Any]) -> None:
+    self.event(name)
+    if self.chained is not None:
+      await self.chained(name, info)
+
+
+class MeteredTransport(httpx.HTTPTransport):
+  def __init__(self, stats: PoolStats, **kwargs: Any):
+    super().__init__(**kwargs)
+    self.stats = stats
+
+  def handle_request(self, request: Any) -> Any:
+    trace = _RequestTrace(self.stats, request.extensions.get("trace"))
+    request.extensions = {**request.extensions, "trace": trace.sync}
+    self.stats._begin()
+    return super().handle_request(request)
+
+
+class AsyncMeteredTransport(httpx.AsyncHTTPTransport):
+  def __init__(self, stats: PoolStats, **kwargs: Any):
+    super().__init__(**kwargs)
+    self.stats = stats
+
+  async def handle_async_request(self, request: Any) -> Any:
+    trace = _RequestTrace(self.stats, request.extensions.get("trace"))
+    request.extensions = {**request.extensions, "trace": trace.async_}
+    self.stats._begin()
+    return await super().handle_async_request(request)
+
+
+class HttpTransport:
+  """Pool, timeout and protocol settings shared by a run's sync and async clients."""
+
+  def __init__(
+    self,
+    *,
+    concurrency: int,
+    pool_size: int | None = None,
+    connect_timeout: float = DEFAULT_CONNECT_TIMEOUT,
+    read_timeout: float = DEFAULT_READ_TIMEOUT,
+    keepalive_expiry: float = DEFAULT_KEEPALIVE_EXPIRY,
+    http2: bool | None = None,
+  ):
+    workers = max(1, concurrency)
+    max_connections = pool_size if pool_size and pool_size > 0 else POOL_PER_WORKER * workers
+    self.limits = httpx.Limits(
+      max_connections=max_connections,
+      max_keepalive_connections=min(workers, max_connections),
+      keepalive_expiry=keepalive_expiry,
+    )
+    # Waiting for a pooled connection is bounded by the read timeout, not the connect one.
+    self.timeout = httpx.Timeout(read_timeout, connect=connect_timeout, pool=read_timeout)
+    available = http2_available()
+    if http2 and not available:
+      print("Warning: --http2 needs the 'h2' package (pip install h2); using HTTP/1.1.", file=sys.stderr)
+    self.http2 = available if http2 is None else bool(http2 and available)
+    self.stats = PoolStats()
+
+  def _options(self) -> Dict[str, Any]:
+    return {"limits": self.limits, "http2": self.http2}
+
+  def client(self) -> Any:
+    """Sync client for ``OpenAI(http_client=...)``."""
+
+    return DefaultHttpxClient(
+      timeout=self.timeout,
+      limits=self.limits,
+      transport=MeteredTransport(self.stats, **self._options()),
+    )
+
+  def async_client(self) -> Any:
+    """A fresh async client; each event loop (one per ``run_async``) needs its own pool."""
+
+    return DefaultAsyncHttpxClient(
+      timeout=self.timeout,
+      limits=self.limits,
+      transport=AsyncMeteredTransport(self.stats, **self._options()),
+    )
+
+  def summary_line(self) -> str:
+    protocol = "HTTP/2" if self.http2 else "HTTP/1.1"
+    return (
+      f"{self.stats.summary_line()} [{protocol}, pool {self.limits.max_connections}, "
+      f"keep-alive {self.limits.max_keepalive_connections} for {self.limits.keepalive_expiry:g}s]"
+    )
@@ -0,0 +1,68 @@
+"""Run-wide token accounting from the ``usage`` block of each response."""
+
+from __future__ import annotations
+
+import threading
+from typing import Any, Dict
+
+
+def usage_breakdown(usage: Any) -> Dict[str, int]:
+  """Return prompt, cached, completion and thinking token counts from ``usage``."""
+
+  prompt_tokens = int(_usage_value(usage, "prompt_tokens") or 0)
+  completion_tokens = int(_usage_value(usage, "completion_tokens") or 0)
+  total_tokens = int(_usage_value(usage, "total_tokens") or 0)
+
+  cached_tokens = _usage_value(_usage_value(usage, "prompt_tokens_details"), "cached_tokens")
+  if cached_tokens is None:
+    cached_tokens = _usage_value(usage, "cached_content_token_count")
+
+  thinking_tokens = _usage_value(_usage_value(usage, "completion_tokens_details"), "reasoning_tokens")
+  if thinking_tokens is None:
+    # Gemini's compatibility layer folds thoughts into total_tokens only.
+    thinking_tokens = max(0, total_tokens - prompt_tokens - completion_tokens)
+
+  return {
+    "prompt_tokens": prompt_tokens,
+    "cached_tokens": int(cached_tokens or 0),
+    "completion_tokens": completion_tokens,
+    "thinking_tokens": int(thinking_tokens or 0),
+  }
+
+
+class UsageTotals:
+  """Thread-safe tally of prompt (cached vs uncached), completion and thinking tokens."""
+
+  def __init__(self) -> None:
+    self.requests = 0
+    self.prompt_tokens = 0
+    self.cached_tokens = 0
+    self.completion_tokens = 0
+    self.thinking_tokens = 0
+    self._lock = threading.Lock()
+
+  def record(self, usage: Any) -> None:
+    if usage is None:
+      return
+    breakdown = usage_breakdown(usage)
+    with self._lock:
+      self.requests += 1
+      self.prompt_tokens += breakdown["prompt_tokens"]
+      self.cached_tokens += breakdown["cached_tokens"]
+      self.completion_tokens += breakdown["completion_tokens"]
+      self.thinking_tokens += breakdown["thinking_tokens"]
+
+  def summary_line(self) -> str:
+    uncached = max(0, self.prompt_tokens - self.cached_tokens)
+    share = (self.cached_tokens / self.prompt_tokens * 100) if self.prompt_tokens else 0.0
+    return (
+      f"Token usage over {self.requests} requests: {self.prompt_tokens} input "
+      f"({self.cached_tokens} cached / {uncached} uncached, {share:.1f}% cached), "
+      f"{self.completion_tokens} output, {self.thinking_tokens} thinking"
+    )
+
+
+def _usage_value(usage: Any, field: str) -> Any:
+  if usage is None:
+    return None
+  return usage.get(field) if isinstance(usage, dict) else getattr(usage, field, None)
@@ -0,0 +1,5 @@
+import sys
+from pathlib import Path
+
+# The generators run as ``python scripts/<name>.py``, so ``scripts/`` is their import root.
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
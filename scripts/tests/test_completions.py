@@ -0,0 +1,112 @@
+from __future__ import annotations
+
+import contextvars
+import json
+import time
+from typing import List
+
+from programmatic_pipeline import runner
+from programmatic_pipeline.completions import (
+  RequestControls,
+  build_request_params,
+  call_with_cache,
+  call_with_retries,
+  complete_json,
+  response_model,
+)
+from programmatic_pipeline.concurrency import AdaptiveConcurrencyLimiter
+from programmatic_pipeline.hedging import Hedger
+from programmatic_pipeline.response_cache import ResponseCache, request_cache_key
+from programmatic_pipeline.telemetry import Telemetry, label_request
+from programmatic_pipeline.transport import httpx
+
+COMPLETION = {
+  "id": "chatcmpl-test",
+  "object": "chat.completion",
+  "created": 0,
+  "model": "test-model",
+  "choices": [
+    {
+      "index": 0,
+      "message": {"role": "assistant", "content": json.dumps({"ok": True})},
+      "finish_reason": "stop",
+    }
+  ],
+  "usage": {"prompt_tokens": 10, "completion_tokens": 5, "total_tokens": 15},
+}
+
+
+def scripted_client(statuses: List[int], seen: List[int]):
+  """A client whose transport answers the chat requests with ``statuses`` in turn."""
+
+  def handle(request):
+    status = statuses[len(seen)]
+    seen.append(status)
+    if status == 200:
+      return httpx.Response(200, json=COMPLETION)
+    return httpx.Response(status, json={"error": {"message": f"status {status}"}})
+
+  return runner.openai_client("test-key", "http://mock.test/v1", httpx.Client(transport=httpx.MockTransport(handle)))
+
+
+def request_params():
+  return build_request_params("test-model", 1.0, "system", "user", "page", {"type": "object"})
+
+
+def test_transport_429_cuts_the_adaptive_limit():
+  seen: List[int] = []
+  client = scripted_client([429, 200], seen)
+  limiter = AdaptiveConcurrencyLimiter(4)
+  controls = RequestControls(concurrency_limiter=limiter)
+
+  result = call_with_retries(lambda: complete_json(client, request_params(), controls), initial_delay=0.0)
+
+  assert result == {"ok": True}
+  # The SDK must not retry on its own: the 429 reaches call_with_retries and the limiter.
+  assert seen == [429, 200]
+  assert limiter.decreases == 1
+  assert limiter.current_limit == 2
+
+
+def test_transport_429_is_recorded_as_its_own_failed_attempt():
+  seen: List[int] = []
+  client = scripted_client([429, 200], seen)
+  telemetry = Telemetry()
+  controls = RequestControls(telemetry=telemetry)
+
+  def generate():
+    label_request("biology")
+    return call_with_retries(lambda: complete_json(client, request_params(), controls), initial_delay=0.0)
+
+  assert contextvars.copy_context().run(generate) == {"ok": True}
+
+  assert dict(telemetry.outcomes) == {"rate_limited": 1, "ok": 1}
+  assert telemetry.final_attempts == {"biology": 2}
+  assert len(telemetry.latencies) == 2
+
+
+def test_hedge_model_win_is_not_cached_as_the_primary_model(tmp_path):
+  def handle(request):
+    if json.loads(request.content)["model"] == "test-model":
+      time.sleep(0.3)
+    return httpx.Response(200, json=COMPLETION)
+
+  client = runner.openai_client("test-key", "http://mock.test/v1", httpx.Client(transport=httpx.MockTransport(handle)))
+  hedger = Hedger(model="fallback-model", min_samples=1)
+  hedger.observe(0.01)
+  cache = ResponseCache(tmp_path / "responses.sqlite3")
+  params = request_params()
+
+  def generate():
+    result = call_with_cache(cache, params, lambda: complete_json(client, params, RequestControls(hedger=hedger)))
+    return result, response_model(params)
+
+  try:
+    result, model = contextvars.copy_context().run(generate)
+  finally:
+    hedger.close()
+
+  assert hedger.hedge_wins == 1
+  assert model == "fallback-model"
+  assert cache.get(request_cache_key(params)) is None
+  assert cache.get(request_cache_key({**params, "model": "fallback-model"})) == result
@@ -0,0 +1,73 @@
+from __future__ import annotations
+
+import json
+
+import pytest
+
+import generate_programmatic_flashcards
+from programmatic_pipeline import runner
+from programmatic_pipeline.content import ContentOutput
+
+CONTENT = generate_programmatic_flashcards.CONTENT_TYPE
+
+
+def make_output(tmp_path, **kwargs) -> ContentOutput:
+  return ContentOutput(
+    CONTENT,
+    tmp_path / "pages.ts",
+    model=runner.DEFAULT_MODEL,
+    checkpoint_every=kwargs.pop("checkpoint_every", 100),
+    checkpoint_interval=kwargs.pop("checkpoint_interval", 3600.0),
+  )
+
+
+def make_row(slug: str):
+  return CONTENT.make_row(slug, {"slug": slug, "target_keyword": slug.replace("-", " ")})
+
+
+def test_journal_failure_leaves_pages_and_manifest_untouched(tmp_path, monkeypatch):
+  output = make_output(tmp_path)
+
+  def broken_append(page):
+    raise OSError("disk full")
+
+  monkeypatch.setattr(output.journal, "append", broken_append)
+  with pytest.raises(OSError):
+    output.store(make_row("biology"), {"slug": "biology"})
+
+  assert output.pages == []
+  assert "biology" not in output.slug_to_index
+  assert output.manifest.fingerprint("biology") is None
+  assert output.generated == 0
+
+
+def test_failed_store_can_be_dead_lettered_and_the_run_continues(tmp_path, monkeypatch):
+  output = make_output(tmp_path, checkpoint_every=1)
+
+  def broken_write(path, pages):
+    raise PermissionError("output is locked")
+
+  with monkeypatch.context() as patch:
+    patch.setattr(CONTENT.output, "write", broken_write)
+    with pytest.raises(PermissionError) as excinfo:
+      output.store(make_row("chemistry"), {"slug": "chemistry"})
+  output.fail(make_row("chemistry"), excinfo.value, stage="store", raw_response={"slug": "chemistry"}, attempt_pass=1)
+
+  assert output.generated == 0
+  assert "chemistry" in output.failed
+  output.store(make_row("physics"), {"slug": "physics"})
+  assert output.generated == 1
+
+  output.finish()
+  entries = [json.loads(line) for line in output.dead_letters.path.read_text(encoding="utf-8").splitlines()]
+  assert [(entry["slug"], entry["stage"]) for entry in entries] == [("chemistry", "store")]
+
+
+def test_page_from_another_model_is_fingerprinted_as_stale(tmp_path):
+  output = make_output(tmp_path)
+  row = make_row("biology")
+
+  output.store(row, {"slug": "biology"}, model="fallback-model")
+
+  assert output.manifest.entries["biology"]["model"] == "fallback-model"
+  assert output.manifest.is_stale("biology", output.fingerprint(row))
@@ -0,0 +1,35 @@
+from __future__ import annotations
+
+import pytest
+
+import generate_programmatic_flashcards
+import generate_programmatic_mindmaps
+from programmatic_pipeline import runner
+from programmatic_pipeline.manifest import input_fingerprint
+
+RAGGED_CSV = (
+  "slug,target_keyword,secondary_keywords\n"
+  "quizlet-maker,quizlet flashcard maker,make flashcards, make flashcards quizlet\n"
+  "plain,plain keyword,one\n"
+)
+
+
+@pytest.mark.parametrize("generator", [generate_programmatic_flashcards, generate_programmatic_mindmaps])
+def test_ragged_row_is_folded_into_last_column_and_fingerprints(tmp_path, generator):
+  path = tmp_path / "pages.csv"
+  path.write_text(RAGGED_CSV, encoding="utf-8")
+
+  rows = list(generator.CONTENT_TYPE.iter_rows(path))
+
+  assert [row.slug for row in rows] == ["quizlet-maker", "plain"]
+  ragged = rows[0]
+  assert None not in ragged.data
+  assert ragged.data["secondary_keywords"] == "make flashcards, make flashcards quizlet"
+  for row in rows:
+    fingerprint = input_fingerprint(
+      row.data,
+      prompt_template=generator.PROMPT_TEMPLATE,
+      model=runner.DEFAULT_MODEL,
+      schema=generator.RESPONSE_SCHEMA,
+    )
+    assert len(fingerprint) == 64
@@ -0,0 +1,71 @@
+from __future__ import annotations
+
+import asyncio
+import time
+
+from programmatic_pipeline.hedging import Hedger
+from programmatic_pipeline.telemetry import ATTEMPT_ADMITTED
+
+QUEUE_SECONDS = 0.3
+SERVICE_SECONDS = 0.01
+
+
+def warmed_hedger() -> Hedger:
+  hedger = Hedger(min_samples=1)
+  hedger.observe(0.05)
+  return hedger
+
+
+def admit() -> None:
+  on_admitted = ATTEMPT_ADMITTED.get()
+  if on_admitted is not None:
+    on_admitted()
+
+
+def test_queued_primary_is_not_hedged():
+  hedger = warmed_hedger()
+
+  def primary():
+    # Waiting on the rate limiter or a concurrency slot, then a fast request.
+    time.sleep(QUEUE_SECONDS)
+    admit()
+    time.sleep(SERVICE_SECONDS)
+    return "primary"
+
+  try:
+    assert hedger.run(primary, lambda: "backup") == "primary"
+  finally:
+    hedger.close()
+  assert hedger.sent == 0
+
+
+def test_queued_primary_is_not_hedged_async():
+  hedger = warmed_hedger()
+
+  async def primary():
+    await asyncio.sleep(QUEUE_SECONDS)
+    admit()
+    await asyncio.sleep(SERVICE_SECONDS)
+    return "primary"
+
+  async def backup():
+    return "backup"
+
+  assert asyncio.run(hedger.run_async(primary, backup)) == "primary"
+  assert hedger.sent == 0
+
+
+def test_slow_admitted_primary_is_hedged():
+  hedger = warmed_hedger()
+
+  def primary():
+    admit()
+    time.sleep(QUEUE_SECONDS)
+    return "primary"
+
+  try:
+    assert hedger.run(primary, lambda: "backup") == "backup"
+  finally:
+    hedger.close()
+  assert hedger.sent == 1
+  assert hedger.hedge_wins == 1
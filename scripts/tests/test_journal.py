@@ -0,0 +1,92 @@
+from __future__ import annotations
+
+import os
+import subprocess
+import sys
+import textwrap
+from pathlib import Path
+
+import generate_programmatic_flashcards
+from programmatic_pipeline import runner
+from programmatic_pipeline.content import ContentOutput
+from programmatic_pipeline.journal import journal_path_for, replay_journal
+
+CONTENT = generate_programmatic_flashcards.CONTENT_TYPE
+SCRIPTS_DIR = Path(__file__).resolve().parents[1]
+SLUGS = ["biology", "chemistry", "physics", "geology"]
+
+# Stores the first three slugs, then dies without finish() or any cleanup, as a killed run would.
+CRASHING_RUN = textwrap.dedent(
+  """
+  import os
+  import sys
+  from pathlib import Path
+
+  import generate_programmatic_flashcards
+  from programmatic_pipeline import runner
+  from programmatic_pipeline.content import ContentOutput
+
+  content = generate_programmatic_flashcards.CONTENT_TYPE
+  output = ContentOutput(
+    content,
+    Path(sys.argv[1]),
+    model=runner.DEFAULT_MODEL,
+    checkpoint_every=100,
+    checkpoint_interval=3600.0,
+  )
+  for slug in sys.argv[2:]:
+    row = content.make_row(slug, {"slug": slug, "target_keyword": slug})
+    output.store(row, {"slug": slug, "title": slug.title()})
+  os._exit(1)
+  """
+)
+
+
+def make_output(path: Path) -> ContentOutput:
+  return ContentOutput(CONTENT, path, model=runner.DEFAULT_MODEL, checkpoint_every=100, checkpoint_interval=3600.0)
+
+
+def make_row(slug: str):
+  return CONTENT.make_row(slug, {"slug": slug, "target_keyword": slug})
+
+
+def crash_mid_run(path: Path, slugs) -> None:
+  env = {**os.environ, "PYTHONPATH": str(SCRIPTS_DIR)}
+  result = subprocess.run([sys.executable, "-c", CRASHING_RUN, str(path), *slugs], env=env, capture_output=True)
+  assert result.returncode == 1, result.stderr.decode()
+
+
+def test_truncated_final_line_is_skipped_with_a_warning(tmp_path, capsys):
+  path = tmp_path / "pages.ts.journal.jsonl"
+  path.write_text('{"slug": "biology"}\n{"slug": "chemistry"}\n{"slug": "phys', encoding="utf-8")
+
+  assert [page["slug"] for page in replay_journal(path)] == ["biology", "chemistry"]
+  assert "line 3" in capsys.readouterr().err
+
+
+def test_killed_run_is_replayed_and_resumed(tmp_path, capsys):
+  path = tmp_path / "pages.ts"
+  crash_mid_run(path, SLUGS[:3])
+
+  # The run never compacted, so its pages only exist in the journal.
+  assert not path.exists()
+  journal = journal_path_for(path)
+  with journal.open("a", encoding="utf-8") as handle:
+    # A write cut short by the kill.
+    handle.write('{"slug": "geology", "title": "Geo')
+
+  output = make_output(path)
+
+  assert [page["slug"] for page in output.pages] == SLUGS[:3]
+  assert "Ignoring unreadable journal entry on line 4" in capsys.readouterr().err
+  wanted = [slug for slug in SLUGS if output.wants(make_row(slug), rerun_existing=False, regenerate_stale=False)]
+  assert wanted == ["geology"]
+
+  output.store(make_row("geology"), {"slug": "geology", "title": "Geology"})
+  output.finish()
+
+  assert not journal.exists()
+  resumed = make_output(path)
+  assert [page["slug"] for page in resumed.pages] == SLUGS
+  assert resumed.pages[0]["title"] == "Biology"
+  assert not any(resumed.wants(make_row(slug), rerun_existing=False, regenerate_stale=False) for slug in SLUGS)
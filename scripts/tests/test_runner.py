@@ -0,0 +1,27 @@
+from __future__ import annotations
+
+import generate_programmatic_flashcards  # noqa: F401
+import generate_programmatic_mindmaps
+from programmatic_pipeline import runner
+from programmatic_pipeline.content import CONTENT_TYPES
+
+
+def combined_args(*argv: str):
+  return runner.parse_args(list(CONTENT_TYPES.values()), ["--input", "pages.csv", *argv], combined=True)
+
+
+def test_combined_run_keeps_each_content_types_rate_limit():
+  args = combined_args()
+
+  assert args.content_options["flashcards"]["max_requests_per_minute"] == 0
+  assert args.content_options["mindmaps"]["max_requests_per_minute"] == 10
+  # Same default as the standalone mind map script.
+  standalone = runner.parse_args([generate_programmatic_mindmaps.CONTENT_TYPE], ["--input", "pages.csv"])
+  assert standalone.content_options["mindmaps"] == args.content_options["mindmaps"]
+
+
+def test_explicit_rate_limit_applies_to_every_content_type():
+  args = combined_args("--max-requests-per-minute", "30")
+
+  assert {options["max_requests_per_minute"] for options in args.content_options.values()} == {30}
+  assert args.max_requests_per_minute == 30
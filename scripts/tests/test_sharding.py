@@ -0,0 +1,103 @@
+from __future__ import annotations
+
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+import generate_programmatic_flashcards
+from programmatic_pipeline import runner
+from programmatic_pipeline.content import ContentOutput
+from programmatic_pipeline.manifest import manifest_path_for
+from programmatic_pipeline.sharding import Shard, ShardConflictError, merge_shard_outputs, shard_for, shard_output_path
+
+CONTENT = generate_programmatic_flashcards.CONTENT_TYPE
+SCRIPTS_DIR = Path(__file__).resolve().parents[1]
+SLUGS = [f"topic-{number:02d}" for number in range(1, 17)]
+SHARDS = 4
+
+
+def make_output(path: Path, shard: Shard | None = None) -> ContentOutput:
+  return ContentOutput(
+    CONTENT,
+    path,
+    model=runner.DEFAULT_MODEL,
+    checkpoint_every=100,
+    checkpoint_interval=3600.0,
+    shard=shard,
+  )
+
+
+def make_row(slug: str):
+  return CONTENT.make_row(slug, {"slug": slug, "target_keyword": slug.replace("-", " ")})
+
+
+def make_page(slug: str, version: int = 1):
+  # Finished the way normalise_page finishes a model response.
+  page = {"slug": slug, "title": f"{slug} v{version}"}
+  placement = generate_programmatic_flashcards.load_taxonomy_map().get(slug)
+  page["structuredData"] = generate_programmatic_flashcards.build_structured_data(page, placement)
+  page["structuredDataVersion"] = generate_programmatic_flashcards.STRUCTURED_DATA_VERSION
+  return page
+
+
+def generate(path: Path, slugs, *, shard: Shard | None = None, version: int = 1) -> None:
+  output = make_output(path, shard)
+  for slug in slugs:
+    if shard is None or shard.owns(slug):
+      output.store(make_row(slug), make_page(slug, version))
+  output.finish()
+
+
+def merge(path: Path) -> int:
+  return runner.merge_main([CONTENT], ["--output", str(path)])
+
+
+def test_shard_assignment_is_stable_across_processes():
+  assert [shard_for(slug, 4) for slug in ("algebra", "biology", "chemistry", "geology")] == [0, 3, 1, 3]
+
+  script = "import sys\nfrom programmatic_pipeline.sharding import shard_for\nprint([shard_for(s, 4) for s in sys.argv[1:]])"
+  seen = set()
+  for seed in ("0", "1", "random"):
+    env = {**os.environ, "PYTHONPATH": str(SCRIPTS_DIR), "PYTHONHASHSEED": seed}
+    result = subprocess.run([sys.executable, "-c", script, *SLUGS], env=env, capture_output=True, text=True, check=True)
+    seen.add(result.stdout)
+  assert seen == {f"{[shard_for(slug, 4) for slug in SLUGS]}\n"}
+
+  for slug in SLUGS:
+    assert sum(Shard(index, SHARDS).owns(slug) for index in range(1, SHARDS + 1)) == 1
+
+
+def test_merge_stops_on_a_slug_that_differs_between_shards(tmp_path):
+  path = tmp_path / "pages.ts"
+  first, second = shard_output_path(path, Shard(1, 2)), shard_output_path(path, Shard(2, 2))
+  CONTENT.output.write(first, [make_page("biology"), make_page("chemistry")])
+  CONTENT.output.write(second, [make_page("biology", version=2)])
+
+  with pytest.raises(ShardConflictError, match="biology"):
+    merge_shard_outputs(path, [first, second], load_pages=CONTENT.output.load_existing, write_pages=CONTENT.output.write)
+  assert not path.exists()
+  assert merge(path) == 1
+
+
+@pytest.mark.parametrize("existing", [False, True], ids=["fresh", "regenerated"])
+def test_merged_shards_match_an_unsharded_run(tmp_path, existing):
+  single, sharded = tmp_path / "single" / "pages.ts", tmp_path / "sharded" / "pages.ts"
+  if existing:
+    # Existing pages keep their position, whatever order they were generated in.
+    for path in (single, sharded):
+      generate(path, list(reversed(SLUGS)))
+    slugs = SLUGS[::2]
+  else:
+    # New slugs are appended in slug order.
+    slugs = SLUGS
+
+  generate(single, slugs, version=2)
+  for index in range(1, SHARDS + 1):
+    generate(sharded, slugs, shard=Shard(index, SHARDS), version=2)
+  assert merge(sharded) == 0
+
+  assert sharded.read_bytes() == single.read_bytes()
+  assert manifest_path_for(sharded).read_bytes() == manifest_path_for(single).read_bytes()
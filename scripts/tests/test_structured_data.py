@@ -0,0 +1,21 @@
+from __future__ import annotations
+
+from programmatic_pipeline.structured_data import STRUCTURED_DATA_VERSION, replace_structured_data
+
+
+def _build(page):
+  return {"@context": "https://schema.org", "@graph": [{"@type": "BreadcrumbList", "name": page["slug"]}]}
+
+
+def test_unversioned_graph_is_replaced_even_when_unchanged():
+  current = {"slug": "a", "structuredData": _build({"slug": "a"})}
+  stale = {"slug": "b", "structuredData": {"@context": "https://schema.org", "@type": "FAQPage"}}
+  pages = [current, stale]
+
+  assert replace_structured_data(pages, _build) == 2
+  assert all(page["structuredDataVersion"] == STRUCTURED_DATA_VERSION for page in pages)
+  assert pages[1]["structuredData"] == _build({"slug": "b"})
+  # The originals are replaced, not edited in place.
+  assert "structuredDataVersion" not in current
+
+  assert replace_structured_data(pages, _build) == 0
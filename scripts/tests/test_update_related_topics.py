@@ -0,0 +1,37 @@
+from __future__ import annotations
+
+import pytest
+
+from programmatic_pipeline.serializer import TS_NOCHECK
+from update_related_topics import load_pages, write_pages
+
+HEADER = "import type { ProgrammaticFlashcardPage } from '../flashcardPages';\n\nexport const generatedFlashcardPages: ProgrammaticFlashcardPage[] = "
+
+
+def _rewrite(path, output_format):
+  original_text, start, end, pages = load_pages(path)
+  write_pages(path, original_text, start, end, pages, output_format)
+  return path.read_text(encoding="utf-8")
+
+
+@pytest.mark.parametrize("pragma", ["", TS_NOCHECK])
+def test_literal_rewrite_keeps_header(tmp_path, pragma):
+  path = tmp_path / "pages.ts"
+  path.write_text(f'{pragma}{HEADER}[\n  {{"slug": "a"}}\n];\n', encoding="utf-8")
+
+  text = _rewrite(path, "literal")
+
+  assert text.startswith(pragma + HEADER)
+  assert text.count(TS_NOCHECK) == (1 if pragma else 0)
+
+
+def test_format_conversion_toggles_pragma(tmp_path):
+  path = tmp_path / "pages.ts"
+  path.write_text(f"{TS_NOCHECK}{HEADER}[\n  {{\"slug\": \"a\"}}\n];\n", encoding="utf-8")
+
+  text = _rewrite(path, "json")
+  assert text.startswith(HEADER + "JSON.parse(")
+  assert load_pages(path)[3] == [{"slug": "a"}]
+
+  text = _rewrite(path, "literal")
+  assert text.startswith(TS_NOCHECK + HEADER + "[")
@@ -17,6 +17,14 @@ from dataclasses import dataclass
 from pathlib import Path
 from typing import Dict, List, Sequence, Set, Tuple
 
+from programmatic_pipeline.serializer import (
+    OUTPUT_FORMATS,
+    TS_NOCHECK,
+    PageSerializer,
+    find_json_payload,
+    resolve_output_format,
+)
+
 
 DEFAULT_SOURCE = Path("lib/programmatic/generated/flashcardPages.ts")
 CONTENT_TYPES = {
@@ -165,13 +173,30 @@ def parse_arguments() -> argparse.Namespace:
         default=MAX_LINKS,
         help="Maximum links per page (default: %(default)s).",
     )
+    parser.add_argument(
+        "--output-format",
+        choices=("auto", *OUTPUT_FORMATS),
+        default="auto",
+        help=(
+            "Write the pages as an object literal or a JSON.parse payload "
+            "(default: %(default)s, which keeps the source file's format)."
+        ),
+    )
     return parser.parse_args()
 
 
 def load_pages(path: Path) -> Tuple[str, int, int, List[Dict]]:
-    """Load the JSON array embedded in the generated TypeScript file."""
+    """Load the JSON array embedded in the generated TypeScript file.
+
+    Both output formats are understood; for a ``JSON.parse('...')`` payload the
+    returned offsets span the whole ``JSON.parse(...)`` call instead of the array.
+    """
     text = path.read_text(encoding="utf-8")
     assign_idx = text.index("=")
+    payload = find_json_payload(text, assign_idx)
+    if payload is not None:
+        start_idx, end_idx, array_text = payload
+        return text, start_idx, end_idx, json.loads(array_text)
     start_idx = text.index("[", assign_idx)
     end_idx = text.rfind("]")
 
@@ -392,9 +417,33 @@ def replace_related_links(
     return updated_count
 
 
-def write_pages(path: Path, original_text: str, start: int, end: int, pages: Sequence[Dict]) -> None:
-    json_payload = json.dumps(pages, indent=2, ensure_ascii=False)
-    new_text = f"{original_text[:start]}{json_payload}{original_text[end + 1 :]}"
+def write_pages(
+    path: Path,
+    original_text: str,
+    start: int,
+    end: int,
+    pages: Sequence[Dict],
+    output_format: str = "literal",
+) -> None:
+    """Replace the page array between ``start`` and ``end`` (inclusive) in ``output_format``.
+
+    The module header is kept as it is unless the file changes format: the
+    ``// @ts-nocheck`` pragma is dropped when converting to ``JSON.parse`` and added
+    when converting back to a literal array.
+    """
+    prefix = original_text[:start]
+    source_format = "json" if find_json_payload(original_text, original_text.index("=")) else "literal"
+    converting = source_format != output_format
+    if output_format == "json":
+        json_payload = PageSerializer("[\n", "]", output_format="json").serialize(pages).decode("utf-8")
+        # The payload type-checks cheaply, so the literal format's pragma can go.
+        if converting and prefix.startswith(TS_NOCHECK):
+            prefix = prefix[len(TS_NOCHECK) :]
+    else:
+        json_payload = json.dumps(pages, indent=2, ensure_ascii=False)
+        if converting and not prefix.startswith(TS_NOCHECK):
+            prefix = TS_NOCHECK + prefix
+    new_text = f"{prefix}{json_payload}{original_text[end + 1 :]}"
     path.write_text(new_text, encoding="utf-8")
 
 
@@ -417,6 +466,7 @@ def main() -> None:
     placeholders = set(content_config["placeholders"])
     base_path = content_config["base_path"]
 
+    output_format = resolve_output_format(args.output_format, source_path)
     original_text, start_idx, end_idx, pages = load_pages(source_path)
 
     placeholder_indices = find_placeholder_indices(pages, placeholders)
@@ -431,7 +481,7 @@ def main() -> None:
     link_map = build_link_entries(pages, contexts, selections)
 
     updated = replace_related_links(pages, link_map, placeholder_indices)
-    write_pages(source_path, original_text, start_idx, end_idx, pages)
+    write_pages(source_path, original_text, start_idx, end_idx, pages, output_format)
 
     print(f"Updated relatedTopicsSection links for {updated} pages.")
 